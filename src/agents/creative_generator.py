@@ -6,14 +6,29 @@ Key improvements:
 - Normalize campaign names (collapse whitespace/punctuation, lowercase) to avoid near-duplicates.
 - Prefer meaningful product terms (skip gender tokens like 'men', 'women') when building templates.
 - Group creative messages by normalized campaign name for stable candidate generation.
+- Collapses near-duplicate creative messages (MinHash, utils.minhash) before term extraction;
+  terms come from count-weighted cluster representatives and anchors are distinct clusters.
+- Grounds every candidate in its k nearest high-performing historical messages
+  (TF-IDF kNN weighted by CTR / ROAS, utils.retrieval); the index is built once per run.
+- Hands each finished campaign to inputs["on_campaign"] (if given) so callers can stream
+  creatives while the remaining campaigns are still being generated.
+- Sizes the A/B test for every candidate: impressions per arm, expected duration and the
+  minimum detectable CTR lift, from each campaign's baseline CTR and daily impressions in
+  the summary (utils.metrics.ab_test_plan, one vectorized call for all campaigns).
+- Reads messages from DataAgent's creative leaderboard (inputs["leaderboard"], built during
+  ingestion) when available, so the CSV is only re-read as a fallback. Each campaign's
+  source messages are its best-CTR messages with at least `leaderboard_min_impressions`
+  (the leaderboard's campaign index + top_k), with terms weighted by clicks.
 - Keeps optional LLM rewrite hook behind config flag `use_llm` (default: False).
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from agents.agent_base import AgentBase
 from utils.logger import log_agent
-from utils.io import load_csv
-import os
+from utils.io import expand_paths, load_csv
+from utils.metrics import ab_test_plan
+from utils.minhash import cluster_near_duplicates
+from utils.retrieval import PERF_COLUMNS, CreativeIndex
 import re
 import pandas as pd
 
@@ -21,6 +36,11 @@ import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
 
+# test_plans key of the account-level plan (used for the global suggestions)
+ACCOUNT_PLAN = "global_recommendations"
+# best-CTR leaderboard messages read per campaign
+SOURCE_MESSAGES = 20
+
 # gender / category tokens to avoid picking as 'primary'
 GENDER_TOKENS = {"men", "women", "man", "woman", "male", "female", "girls", "boys", "kid", "kids", "mens", "womens"}
 
@@ -47,9 +67,10 @@ def _normalize_campaign_name(name: str) -> str:
     n = re.sub(r"\s+", " ", n).strip()
     return n
 
-def _top_n_terms(corpus: List[str], n: int = 5) -> List[str]:
+def _top_n_terms(corpus: List[str], n: int = 5, weights: List[float] = None) -> List[str]:
     """
-    Return top-n terms from corpus by TF-IDF average weights.
+    Return top-n terms from corpus by TF-IDF average weights
+    (weighted average when `weights`, e.g. near-duplicate cluster sizes, are given).
     """
     if not corpus:
         return []
@@ -57,7 +78,11 @@ def _top_n_terms(corpus: List[str], n: int = 5) -> List[str]:
     try:
         vec = TfidfVectorizer(max_features=500, stop_words="english", ngram_range=(1, 2))
         X = vec.fit_transform(corpus_clean)
-        scores = np.asarray(X.mean(axis=0)).ravel()
+        if weights is not None:
+            w = np.asarray(weights, dtype=float)
+            scores = np.asarray(X.T @ w).ravel() / max(float(w.sum()), 1e-9)
+        else:
+            scores = np.asarray(X.mean(axis=0)).ravel()
         terms = np.array(vec.get_feature_names_out())
         top_idx = np.argsort(scores)[::-1][:n]
         top_terms = terms[top_idx].tolist()
@@ -74,6 +99,38 @@ def _top_n_terms(corpus: List[str], n: int = 5) -> List[str]:
         sorted_terms = sorted(freq.items(), key=lambda x: x[1], reverse=True)
         return [t for t, _ in sorted_terms[:n]]
 
+def _collapse_messages(messages: List[str], threshold: float, weights: List[float] = None) -> Tuple[List[str], List[float]]:
+    """
+    Near-duplicate collapse: (representatives, counts), heaviest cluster first.
+    `weights` are per-message occurrence counts (default 1 each).
+    threshold <= 0 disables clustering (exact duplicates are still counted).
+    """
+    if not messages:
+        return [], []
+    if weights is None:
+        counts = pd.Series(messages).value_counts(sort=True)
+    else:
+        counts = pd.Series(weights, index=messages, dtype=float).groupby(level=0, sort=False).sum()
+        counts = counts.sort_values(ascending=False, kind="mergesort")
+    if not threshold or threshold <= 0:
+        return counts.index.tolist(), counts.astype(float).tolist()
+    clusters = cluster_near_duplicates(counts.index.tolist(), counts.to_numpy(), threshold=threshold)
+    return [c["representative"] for c in clusters], [c["count"] for c in clusters]
+
+def _messages(frame: pd.DataFrame) -> Tuple[List[str], List[float]]:
+    """(messages, occurrence counts) of a CSV or leaderboard frame (`rows` column = count)."""
+    frame = frame[frame["creative_message"].notna()]
+    return frame["creative_message"].astype(str).tolist(), frame["rows"].astype(float).tolist()
+
+
+def _leaderboard_messages(leaderboard, campaign: Optional[str], min_impressions: float) -> Tuple[List[str], List[float], float]:
+    """
+    (messages, click weights, rows behind them) of the SOURCE_MESSAGES best-CTR messages of
+    `campaign` (None: the whole account) with at least `min_impressions`.
+    """
+    top = [t for t in leaderboard.top_k("ctr", SOURCE_MESSAGES, min_impressions=min_impressions, campaign=campaign) if t["message"]]
+    return [str(t["message"]) for t in top], [max(t["clicks"], 1.0) for t in top], float(sum(t["rows"] for t in top))
+
 def _choose_primary_term(terms: List[str]) -> str:
     """
     Prefer first non-gender token (and non-generic tokens) as primary.
@@ -139,25 +196,52 @@ class CreativeGenerator(AgentBase):
     Creative Improvement Generator Agent (improved)
     """
 
+    # summary sections run() reads; watch mode reruns the agent only when one of them changed
+    SUMMARY_SECTIONS = (
+        "global", "campaign_summaries", "low_ctr_campaigns", "campaign_trends",
+    )
+
     def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         try:
             # Summary contains low_ctr_campaigns
             summary = inputs.get("summary") or inputs.get("payload") or {}
             low_ctr_campaigns = summary.get("low_ctr_campaigns", []) or []
-            csv_path = self.config.get("data_csv")
-
-            if not csv_path or not os.path.exists(csv_path):
-                log_agent("creative_generator", f"CSV not available at {csv_path}")
-                return {"status": "error", "error": "CSV not found", "confidence": 0.0}
-
-            df = load_csv(csv_path)
-            if "creative_message" not in df.columns:
-                log_agent("creative_generator", "CSV missing creative_message column")
-                return {"status": "error", "error": "creative_message column missing", "confidence": 0.0}
-
-            # Normalize campaign names in the dataframe to group correctly
-            df = df.copy()
-            df["campaign_norm"] = df["campaign_name"].apply(lambda x: _normalize_campaign_name(x or ""))
+            leaderboard = inputs.get("leaderboard")
+            if leaderboard is not None and not len(leaderboard):
+                leaderboard = None
+            min_impressions = float(self.config.get("leaderboard_min_impressions", 0) or 0)
+
+            if leaderboard is not None:
+                # ingestion-time index: one row per (message, campaign, creative type) with its row count
+                df = leaderboard.rows().rename(columns={"message": "creative_message", "campaign": "campaign_name"})
+                df["campaign_norm"] = df["campaign_canon"]
+                log_agent("creative_generator", f"Using creative leaderboard ({len(leaderboard)} messages)")
+            else:
+                csv_path = self.config.get("data_csv")
+                try:
+                    csv_files = expand_paths(csv_path) if csv_path else []
+                except FileNotFoundError:
+                    csv_files = []
+                if not csv_files:
+                    log_agent("creative_generator", f"CSV not available at {csv_path}")
+                    return {"status": "error", "error": "CSV not found", "confidence": 0.0}
+
+                # text columns + the performance columns for the anchor index; reuse the planner's row filters
+                row_filters = {k: v for k, v in (inputs.get("filters") or {}).items() if k != "campaign"}
+                df = load_csv(
+                    csv_files,
+                    usecols=["campaign_name", "creative_message"] + PERF_COLUMNS,
+                    filters=row_filters,
+                    workers=self.config.get("ingest_workers"),
+                )
+                if "creative_message" not in df.columns:
+                    log_agent("creative_generator", "CSV missing creative_message column")
+                    return {"status": "error", "error": "creative_message column missing", "confidence": 0.0}
+
+                # Normalize campaign names in the dataframe to group correctly
+                df = df.copy()
+                df["campaign_norm"] = df["campaign_name"].apply(lambda x: _normalize_campaign_name(x or ""))
+                df["rows"] = 1
 
             # Build a mapping: normalized_campaign -> original_campaign_examples (first seen original values)
             camp_label_map = {}
@@ -166,6 +250,7 @@ class CreativeGenerator(AgentBase):
                     camp_label_map[norm] = orig
 
             creatives_output = []
+            dedup_threshold = float(self.config.get("creative_dedup_threshold", 0.7) or 0)
 
             # If user didn't provide low_ctr list, derive conservative set from summary
             if not low_ctr_campaigns:
@@ -185,6 +270,11 @@ class CreativeGenerator(AgentBase):
                 else:
                     normalized_low_ctr = []
 
+            # anchor index and test plans are built once; each campaign is grounded (and reported) as soon as it is done
+            anchor_index = self._anchor_index(df)
+            test_plans = self._test_plans(summary, normalized_low_ctr)
+            on_campaign = inputs.get("on_campaign")
+
             # Produce creatives for each normalized campaign (unique)
             processed = set()
             for norm_c in normalized_low_ctr:
@@ -192,22 +282,32 @@ class CreativeGenerator(AgentBase):
                     continue
                 processed.add(norm_c)
 
-                # Filter by normalized campaign
-                camp_df = df[df["campaign_norm"] == norm_c]
-                camp_msgs = camp_df["creative_message"].dropna().astype(str).tolist()
-
-                # If not enough campaign messages, fall back to broadly similar campaigns or global
-                if len(camp_msgs) < 3:
-                    # try to pick messages from rows that contain norm token in campaign_name
-                    cand = df[df["campaign_norm"].str.contains(norm_c.split()[0])] if norm_c.split() else pd.DataFrame()
-                    if cand is not None and not cand.empty:
-                        camp_msgs = cand["creative_message"].dropna().astype(str).tolist()
-                if len(camp_msgs) < 3:
-                    # fallback to top global creatives
-                    camp_msgs = df["creative_message"].dropna().astype(str).tolist()[:20]
-
-                # extract terms and build templates
-                top_terms = _top_n_terms(camp_msgs, n=6)
+                if leaderboard is not None:
+                    # the campaign's best messages, else the account's
+                    camp_msgs, camp_weights, support = _leaderboard_messages(leaderboard, norm_c, min_impressions)
+                    if len(camp_msgs) < 3:
+                        camp_msgs, camp_weights, support = _leaderboard_messages(leaderboard, None, min_impressions)
+                    if not camp_msgs:
+                        camp_msgs, camp_weights, support = _leaderboard_messages(leaderboard, norm_c, 0)
+                else:
+                    # Filter by normalized campaign
+                    camp_df = df[df["campaign_norm"] == norm_c]
+                    camp_msgs, camp_weights = _messages(camp_df)
+
+                    # If not enough campaign messages, fall back to broadly similar campaigns or global
+                    if sum(camp_weights) < 3:
+                        # try to pick messages from rows that contain norm token in campaign_name
+                        cand = df[df["campaign_norm"].str.contains(norm_c.split()[0])] if norm_c.split() else pd.DataFrame()
+                        if cand is not None and not cand.empty:
+                            camp_msgs, camp_weights = _messages(cand)
+                    if sum(camp_weights) < 3:
+                        # fallback to top global creatives
+                        camp_msgs, camp_weights = _messages(df.head(20))
+                    support = sum(camp_weights)
+
+                # collapse near-duplicates, then extract terms from weighted representatives
+                reps, rep_counts = _collapse_messages(camp_msgs, dedup_threshold, camp_weights)
+                top_terms = _top_n_terms(reps, n=6, weights=rep_counts)
                 templates = _templates_from_terms(top_terms)
 
                 generated = []
@@ -217,8 +317,8 @@ class CreativeGenerator(AgentBase):
                         "message": t["message"],
                         "cta": _choose_cta(),
                         "rationale": t["rationale"],
-                        "anchor_examples": camp_msgs[:3],
-                        "confidence": round(min(0.9, 0.4 + len(camp_msgs) * 0.05), 2)
+                        "anchor_examples": reps[:3],
+                        "confidence": round(min(0.9, 0.4 + support * 0.05), 2)
                     }
 
                     # Optional LLM rewrite (if enabled)
@@ -227,6 +327,8 @@ class CreativeGenerator(AgentBase):
                         # Example: candidate = self._call_llm_refine(candidate, camp_msgs)
                         pass
 
+                    if norm_c in test_plans:
+                        candidate["test_plan"] = dict(test_plans[norm_c])
                     generated.append(candidate)
 
                 # map normalized campaign to a display label (first original found)
@@ -237,11 +339,16 @@ class CreativeGenerator(AgentBase):
                     "campaign_norm": norm_c,
                     "generated": generated
                 })
+                self._attach_anchors(anchor_index, creatives_output[-1:])
+                if on_campaign:
+                    on_campaign(creatives_output[-1])
 
             # If creatives_output empty (no low-ctr cams), produce a few global suggestions
             if not creatives_output:
-                all_msgs = df["creative_message"].dropna().astype(str).tolist()
-                top_terms = _top_n_terms(all_msgs, n=6)
+                top_msgs, top_weights, _ = _leaderboard_messages(leaderboard, None, min_impressions) if leaderboard is not None else ([], [], 0)
+                all_msgs, all_weights = (top_msgs, top_weights) if top_msgs else _messages(df)
+                reps, rep_counts = _collapse_messages(all_msgs, dedup_threshold, all_weights)
+                top_terms = _top_n_terms(reps, n=6, weights=rep_counts)
                 templates = _templates_from_terms(top_terms)
                 generated = []
                 for t in templates[:4]:
@@ -250,14 +357,19 @@ class CreativeGenerator(AgentBase):
                         "message": t["message"],
                         "cta": _choose_cta(),
                         "rationale": t["rationale"],
-                        "anchor_examples": all_msgs[:3],
+                        "anchor_examples": reps[:3],
                         "confidence": 0.5
                     })
+                    if ACCOUNT_PLAN in test_plans:
+                        generated[-1]["test_plan"] = dict(test_plans[ACCOUNT_PLAN])
                 creatives_output.append({
                     "campaign": "global_recommendations",
                     "campaign_norm": "global_recommendations",
                     "generated": generated
                 })
+                self._attach_anchors(anchor_index, creatives_output[-1:])
+                if on_campaign:
+                    on_campaign(creatives_output[-1])
 
             # compute final confidence as average of first candidates (safe fallback)
             if creatives_output:
@@ -275,3 +387,88 @@ class CreativeGenerator(AgentBase):
         except Exception as e:
             log_agent("creative_generator", f"ERROR: {str(e)}")
             return {"status": "error", "error": str(e), "confidence": 0.0}
+
+    def _test_plans(self, summary: Dict[str, Any], campaign_norms: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        A/B test plan per normalized campaign (and ACCOUNT_PLAN for the whole account).
+        Baseline CTR is clicks / impressions; daily impressions divide by the campaign's
+        observed days (campaign_trends) or else the account's date span.
+        """
+        glob = summary.get("global") or {}
+        dates = glob.get("date_range") or {}
+        try:
+            span = (pd.Timestamp(dates["max"]) - pd.Timestamp(dates["min"])).days + 1
+        except (KeyError, TypeError, ValueError):
+            span = np.nan
+        observed = {t["campaign_canon"]: t.get("days") for t in summary.get("campaign_trends") or []}
+        wanted = set(campaign_norms)
+
+        keys, clicks, impressions, days = [ACCOUNT_PLAN], [glob.get("total_clicks", 0)], [glob.get("total_impressions", 0)], [span]
+        for c in summary.get("campaign_summaries") or []:
+            norm = _normalize_campaign_name(c.get("campaign_canon", ""))
+            if norm in wanted:
+                keys.append(norm)
+                clicks.append(c.get("clicks", 0))
+                impressions.append(c.get("impressions", 0))
+                days.append(observed.get(c["campaign_canon"]) or span)
+        if not any(impressions):
+            return {}
+
+        impressions = np.asarray(impressions, dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            baseline = np.asarray(clicks, dtype=float) / impressions
+            daily = impressions / np.asarray(days, dtype=float)
+        lift = float(self.config.get("ab_test_lift", 0.1))
+        max_days = int(self.config.get("ab_test_max_days", 14))
+        plan = ab_test_plan(
+            baseline,
+            daily,
+            lift=lift,
+            alpha=float(self.config.get("ab_test_alpha", 0.05)),
+            power=float(self.config.get("ab_test_power", 0.8)),
+            traffic_share=float(self.config.get("ab_test_traffic_share", 1.0)),
+            max_days=max_days,
+        )
+
+        def _num(x, digits=None):
+            return None if not np.isfinite(x) else (round(float(x), digits) if digits else int(x))
+
+        return {
+            key: {
+                "baseline_ctr": _num(baseline[i], 6),
+                "target_lift": lift,
+                "daily_impressions": _num(daily[i], 1),
+                "impressions_per_arm": _num(plan["impressions_per_arm"][i]),
+                "total_impressions": _num(plan["total_impressions"][i]),
+                "days": _num(plan["days"][i]),
+                "mde_lift": _num(plan["mde_lift"][i], 4),
+                "max_days": max_days,
+            }
+            for i, key in enumerate(keys)
+        }
+
+    def _anchor_index(self, df: pd.DataFrame) -> Optional[CreativeIndex]:
+        """Retrieval index over the historical messages (None when there are none)."""
+        if df["creative_message"].dropna().empty:
+            return None
+        return CreativeIndex(
+            df,
+            prior_impressions=float(self.config.get("anchor_prior_impressions", 1000)),
+            min_performance=float(self.config.get("anchor_min_performance", 1.0)),
+            diversity_threshold=float(self.config.get("creative_dedup_threshold", 0.7) or 0),
+        )
+
+    def _attach_anchors(self, index: Optional[CreativeIndex], creatives_output: List[Dict[str, Any]]) -> None:
+        """
+        Replace each candidate's anchor_examples with the k most similar high-performing
+        historical messages (kept as-is when the index returns nothing for a candidate).
+        """
+        candidates = [g for item in creatives_output for g in item["generated"]]
+        if not candidates or index is None:
+            return
+        k = int(self.config.get("anchor_k", 3))
+        neighbours = index.query([f"{g['headline']} {g['message']}" for g in candidates], k=k)
+        for g, hits in zip(candidates, neighbours):
+            if hits:
+                g["anchor_examples"] = [h["message"] for h in hits]
+                g["anchor_scores"] = hits
@@ -1,11 +1,25 @@
 # src/agents/data_agent.py
 
 from agents.agent_base import AgentBase
-from utils.io import load_csv
+from utils.drilldown import DrillDown
+from utils.io import expand_paths, file_lock, filter_frame, iter_csv, load_csv, window_start
+from utils.lazy import LazyDict
 from utils.logger import log_agent
+from utils.leaderboard import CreativeLeaderboard
+from utils.quality import RowValidator, quality_section, quarantine_frame
+from utils.sampling import restrict, sample_intervals, stratified_sample
+from utils.shared_dataset import attach
+from utils.similarity import SimilarityIndex
+from utils.summary_shards import (
+    PART_COLUMNS, SECTION_PARTS, partial_from_frame, merge_partials, finalize_partial, read_partial, section_parts,
+)
+from utils.sqlite_store import SQLiteStore
+import numpy as np
 import pandas as pd
+import json
+import os
 import re
-from collections import Counter
+import tempfile
 from difflib import SequenceMatcher
 from typing import List, Dict, Tuple, Set
 
@@ -93,6 +107,49 @@ def combined_similarity(a: str, b: str) -> float:
     return 0.55 * token_jaccard(a, b) + 0.45 * seq_ratio(a, b)
 
 
+def _assign_to_groups(
+    sorted_names: List[str],
+    groups: List[Tuple[str, Set[str]]],
+    mapping: Dict[str, str],
+    threshold: float,
+) -> None:
+    """
+    Greedy assignment shared by full and incremental clustering: each name joins the first
+    group whose canonical (or any member) is similar enough, else it starts a new group.
+    Mutates `groups` and `mapping` in place.
+
+    Every grouped name is scored at once with utils.similarity.SimilarityIndex, an upper
+    bound of combined_similarity; only names reaching the threshold there are checked with
+    combined_similarity, so the groups are the same as comparing every pair.
+    """
+    index = SimilarityIndex()
+    owners: List[int] = []  # group position of each indexed name
+    for gi, (canon, members) in enumerate(groups):
+        for m in [canon] + sorted(members - {canon}):
+            index.add(m)
+            owners.append(gi)
+
+    for name in sorted_names:
+        target = None
+        by_group: Dict[int, List[int]] = {}
+        for pos in index.candidates(name, threshold):
+            by_group.setdefault(owners[pos], []).append(pos)
+        # first group (in creation order) with a member that passes the exact check
+        for gi in sorted(by_group):
+            if any(combined_similarity(name, index.names[pos]) >= threshold for pos in by_group[gi]):
+                target = gi
+                break
+        if target is None:
+            # create new group with name as canonical label
+            groups.append((name, set([name])))
+            target = len(groups) - 1
+        else:
+            groups[target][1].add(name)
+        mapping[name] = groups[target][0]
+        index.add(name)
+        owners.append(target)
+
+
 def build_fuzzy_groups(names: List[str], counts: Dict[str, int], threshold: float = 0.78) -> Dict[str, str]:
     """
     Greedy clustering: iterate names ordered by descending frequency; assign each name to an existing
@@ -102,50 +159,212 @@ def build_fuzzy_groups(names: List[str], counts: Dict[str, int], threshold: floa
     groups: List[Tuple[str, Set[str]]] = []  # (canonical_name, set(members))
     mapping: Dict[str, str] = {}
 
-    for name in sorted_names:
-        assigned = False
-        for i, (canon, members) in enumerate(groups):
-            # compute similarity to canonical representative (canon)
-            sim = combined_similarity(name, canon)
-            if sim >= threshold:
-                members.add(name)
-                mapping[name] = canon
-                assigned = True
-                break
-            # also check similarity to any member for safety (rare)
-            if not assigned:
-                for m in list(members):
-                    if combined_similarity(name, m) >= threshold:
-                        members.add(name)
-                        mapping[name] = canon
-                        assigned = True
-                        break
-            if assigned:
-                break
-        if not assigned:
-            # create new group with name as canonical label
-            groups.append((name, set([name])))
-            mapping[name] = name
+    _assign_to_groups(sorted_names, groups, mapping, threshold)
 
     # optional: pick a nicer canonical label for each group (choose most common original form)
     # but here canonical is the highest-frequency normalized name (already sorted)
     return mapping
 
 
+def extend_fuzzy_groups(
+    new_names: List[str],
+    counts: Dict[str, int],
+    known: Dict[str, str],
+    threshold: float = 0.78,
+) -> Dict[str, str]:
+    """
+    Incremental clustering: rebuild groups from an existing name->canonical mapping and
+    assign only `new_names` against them (same greedy rule as build_fuzzy_groups).
+    Existing assignments never move, so canonical labels stay stable across runs.
+    Returns the mapping for `new_names` only.
+    """
+    members_by_canon: Dict[str, Set[str]] = {}
+    for name, canon in known.items():
+        members_by_canon.setdefault(canon, {canon}).add(name)
+    groups: List[Tuple[str, Set[str]]] = list(members_by_canon.items())
+
+    mapping: Dict[str, str] = {}
+    sorted_names = sorted(
+        (n for n in new_names if n not in known), key=lambda x: -counts.get(x, 0)
+    )
+    _assign_to_groups(sorted_names, groups, mapping, threshold)
+    return mapping
+
+
+# ------------------ alias store ------------------
+class CampaignAliasStore:
+    """
+    Persistent normalized-name -> canonical mapping.
+
+    File layout (JSON):
+    {
+      "aliases":   {"men comfortmax launch": "men comfortmax launch", ...},   # learned
+      "overrides": {"mens comfort max": "men comfortmax launch", ...}        # manual
+    }
+
+    Learned aliases are only ever added, never re-clustered, so canonical labels are stable
+    for downstream joins. Overrides win over learned aliases; an override keyed by a canonical
+    label also redirects every alias that points at it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pinned: Set[str] = set()
+        self._dirty = False
+        self.aliases, self.overrides = self._read()
+
+    def _read(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        if not os.path.exists(self.path):
+            return {}, {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f) or {}
+        return dict(data.get("aliases", {})), dict(data.get("overrides", {}))
+
+    def set_override(self, name: str, canonical: str) -> None:
+        """Pin a (raw or normalized) campaign name to a canonical label."""
+        key = _normalize_campaign_name(name)
+        self.overrides[key] = _normalize_campaign_name(canonical)
+        self._pinned.add(key)
+        self._dirty = True
+
+    def canonical_for(self, name: str) -> str:
+        canon = self.aliases.get(name, name)
+        return self.overrides.get(name, self.overrides.get(canon, canon))
+
+    def resolve(self, names: List[str], counts: Dict[str, int], threshold: float = 0.78) -> Dict[str, str]:
+        """
+        Return name->canonical for `names`, clustering only names not seen in earlier runs.
+        """
+        known = dict(self.aliases)
+        known.update(self.overrides)
+        new_names = [n for n in names if n not in known]
+        if new_names:
+            self.aliases.update(extend_fuzzy_groups(new_names, counts, known, threshold=threshold))
+            self._dirty = True
+        return {n: self.canonical_for(n) for n in names}
+
+    def save(self) -> None:
+        """
+        Write the store atomically (only if something changed). Concurrent runs may share the
+        file: under an exclusive lock the current file is re-read and merged first. Aliases
+        already on disk keep their label, overrides set through this store win.
+        """
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(f"{self.path}.lock"):
+            aliases, overrides = self._read()
+            self.aliases = {**self.aliases, **aliases}
+            self.overrides = {**overrides, **{k: self.overrides[k] for k in self._pinned}}
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".aliases-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"aliases": self.aliases, "overrides": self.overrides},
+                        f, indent=2, sort_keys=True
+                    )
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        self._pinned.clear()
+        self._dirty = False
+
+
 # ------------------ DataAgent ------------------
+# columns the summary cannot be built without
+REQUIRED_COLUMNS = ["spend", "revenue", "ctr", "roas", "clicks", "impressions", "campaign_name", "date"]
+# read with config `drilldown` so the loaded rows can back a campaign -> adset -> creative drill-down
+DRILLDOWN_COLUMNS = ["adset_name", "creative_message"]
+# read for the data-quality checks (duplicate keys, whole-number counts) unless `validation: off`
+VALIDATION_COLUMNS = ["adset_name", "purchases"]
+VALIDATION_MODES = ("quarantine", "flag", "off")
+
+
+def _require_columns(df: pd.DataFrame) -> None:
+    missing = set(REQUIRED_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"Dataset missing required columns: {missing}")
+
+
 class DataAgent(AgentBase):
+    """
+    Summarizes the ad rows (CSV, SQLite or merged partials). Besides the JSON summary
+    payload, run() returns `artifacts` with in-memory results for later agents:
+    `creative_leaderboard` (utils.leaderboard.CreativeLeaderboard, or None without messages)
+    and `quarantine` (rows that failed the utils.quality checks, with their reason codes).
+    With config `drilldown` (off by default; src/drilldown.py turns it on), when the rows
+    were loaded into memory (CSV or shared dataset, no sampling), it also returns
+    `drilldown`: a utils.drilldown.DrillDown over them, indexed on first use.
+
+    The payload and the artifacts are utils.lazy.LazyDicts: a summary section, the
+    leaderboard and the groupbys behind them are computed when first read, so a section no
+    agent or report reads is never aggregated.
+
+    Validation (config `validation`, off when unset): every row is checked before it is
+    summarized. "quarantine" leaves flagged rows out of the summary and "flag" keeps them;
+    both add a `data_quality` section.
+
+    Sampling mode (inputs["sample"] or config `sampling`, CSV storage only) summarizes a
+    stratified sample of `sample_rows` rows instead (utils.sampling) and adds a `sampling`
+    section with standard errors and confidence intervals.
+
+    In a worker process, inputs["dataset"] or config `shared_dataset` (a utils.shared_dataset
+    handle) replaces the CSV read: the rows are attached from the shared export instead of
+    parsed again.
+    """
 
     def run(self, inputs):
         try:
-            csv_path = self.config["data_csv"]
-            df = load_csv(csv_path)
-            log_agent("data_agent", f"Loaded CSV at: {csv_path}")
+            filters = (inputs or {}).get("filters") or {}
+            compare_days = (inputs or {}).get("compare_days") or self.config.get("compare_days")
+            sample = (inputs or {}).get("sample")
+            parts = self._read_parts(inputs or {}, compare_days)
+            if sample is None:
+                sample = self.config.get("sampling", False)
+            partial_paths = self.config.get("summary_partials")
+            if partial_paths:
+                # map-reduce mode: merge partials produced by `src/shards.py summarize`
+                paths = expand_paths(partial_paths, manifests=False)
+                partial = merge_partials([read_partial(p) for p in paths])
+                log_agent("data_agent", f"Merged {len(paths)} summary partials")
+                summary, artifacts = self._finalize(partial, compare_days=compare_days)
+            elif self.config.get("storage", "csv") == "sqlite":
+                summary, artifacts = self._summarize_sqlite(filters, compare_days=compare_days, parts=parts)
+            elif sample:
+                summary, artifacts = self._summarize_sample(
+                    self.config["data_csv"], filters, (inputs or {}).get("columns"), compare_days=compare_days,
+                    parts=parts,
+                )
+            else:
+                # projection + row filters pushed into the read (planner-derived)
+                row_filters = {k: v for k, v in filters.items() if k != "campaign"}
+                usecols = self._usecols((inputs or {}).get("columns"), parts)
+                handle = (inputs or {}).get("dataset") or self.config.get("shared_dataset")
+                if handle:
+                    # worker mode: map the dataset the parent exported once (utils.shared_dataset)
+                    df = filter_frame(attach(handle, columns=usecols), row_filters)
+                    log_agent("data_agent", f"Attached shared dataset {handle} ({len(df)} rows, {len(df.columns)} columns)")
+                else:
+                    csv_path = self.config["data_csv"]
+                    df = load_csv(csv_path, usecols=usecols, filters=row_filters, workers=self.config.get("ingest_workers"))
+                    log_agent("data_agent", f"Loaded CSV at: {csv_path} ({len(df)} rows, {len(df.columns)} columns)")
+                fuzzy_map = None
+                if filters.get("campaign"):
+                    df, fuzzy_map = self._filter_campaigns(df, filters["campaign"])
+                # validated here rather than in build_partial so the drill-down sees the same rows
+                df, quality = self._validate(df)
+                partial = self.build_partial(df, validate=False)
+                partial.update(quality)
+                summary, artifacts = self._finalize(partial, fuzzy_map=fuzzy_map, compare_days=compare_days, rows=df)
 
-            summary = self._summarize(df)
             return {
                 "status": "ok",
                 "payload": summary,
-                "confidence": 0.95
+                "confidence": 0.95,
+                "artifacts": artifacts,
             }
 
         except Exception as e:
@@ -158,108 +377,321 @@ class DataAgent(AgentBase):
 
     # ------------------------------------------------
     def _summarize(self, df: pd.DataFrame):
-        # Required columns check
-        required = {
-            "spend", "revenue", "ctr", "roas",
-            "clicks", "impressions", "campaign_name",
-            "date", "creative_message"
-        }
-        missing = required - set(df.columns)
-        if missing:
-            raise ValueError(f"Dataset missing required columns: {missing}")
+        return self.finalize(self.build_partial(df))
+
+    def build_partial(self, df: pd.DataFrame, validate: bool = True, validator: RowValidator = None) -> Dict:
+        """
+        Validate + normalize rows and reduce them to mergeable accumulators
+        (see utils.summary_shards). Safe to run per shard on separate machines.
+        `validate=False` skips the row checks (for rows a chunked reader already checked);
+        pass a `validator` to keep checking for duplicate keys across calls.
+        """
+        _require_columns(df)
+        quality = {}
+        if validate:
+            df, quality = self._validate(df, validator)
 
         df = df.copy()
 
         # ---------- Normalize campaign names ----------
         df["campaign_name"] = df["campaign_name"].fillna("").astype(str)
-        df["campaign_norm"] = df["campaign_name"].apply(_normalize_campaign_name)
-
-        # ---------- Build frequency counts for normalized names ----------
-        norm_counts = Counter(df["campaign_norm"].tolist())
-
+        unique_names = df["campaign_name"].unique()
+        norm_lookup = {n: _normalize_campaign_name(n) for n in unique_names}
+        df["campaign_norm"] = df["campaign_name"].map(norm_lookup)
+
+        sketches = None
+        if self.config.get("use_sketches", False):
+            sketches = {
+                "kll_k": int(self.config.get("kll_k", 200)),
+                "hll_precision": int(self.config.get("hll_precision", 10)),
+            }
+        partial = partial_from_frame(df, sketches=sketches)
+        partial.update(quality)
+        return partial
+
+    def _validate(self, df: pd.DataFrame, validator: RowValidator = None) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Row checks per `validation`: the rows to summarize and the partial's `quality` /
+        `quarantine` entries (empty when validation is off). A passed `validator` reports
+        its counts over every call so far.
+        """
+        mode = self._validation_mode()
+        if mode == "off":
+            return df, {}
+        _require_columns(df)
+        validator = validator or RowValidator(self.config.get("quality_options"))
+        bits = validator.check(df)
+        quality = {"quality": validator.summary(), "quarantine": quarantine_frame(df, bits)}
+        return (df[bits == 0] if mode == "quarantine" else df), quality
+
+    def _validation_mode(self) -> str:
+        mode = self.config.get("validation") or "off"
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f"Unknown validation mode: {mode}")
+        return mode
+
+    def _read_parts(self, inputs: Dict, compare_days: int = None) -> List[str]:
+        """
+        Partial entries behind the summary sections this run reads: inputs["sections"]
+        (every section when unset) plus the creative leaderboard when inputs["needs_creatives"]
+        (left out of the default only when it is False). The dimension series only serve a
+        period comparison and the sketches only exist with `use_sketches`.
+        """
+        sections = inputs.get("sections")
+        if sections is None:
+            sections = [s for s in SECTION_PARTS if s != "creative_leaderboard" or inputs.get("needs_creatives") is not False]
+        elif inputs.get("needs_creatives"):
+            sections = list(sections) + ["creative_leaderboard"]
+        skip = set()
+        if not compare_days:
+            skip.add("by_dimension_date")
+        if not self.config.get("use_sketches", False):
+            skip.add("sketches")
+        return [p for p in section_parts(*sections) if p not in skip]
+
+    def _usecols(self, columns, parts: List[str] = None) -> List[str]:
+        """
+        Columns to parse: planner-requested ones (the filtered dimensions) plus the source
+        columns of the partial entries in `parts` (see _read_parts; all when None).
+        """
+        if not columns:
+            return None
+        wanted = list(dict.fromkeys(list(REQUIRED_COLUMNS) + list(columns)))
+        for part in PART_COLUMNS if parts is None else parts:
+            wanted += [c for c in PART_COLUMNS.get(part, []) if c not in wanted]
+        if self.config.get("drilldown", False):
+            wanted += [c for c in DRILLDOWN_COLUMNS if c not in wanted]
+        if self._validation_mode() != "off":
+            wanted += [c for c in VALIDATION_COLUMNS if c not in wanted]
+        return wanted
+
+    def _filter_campaigns(self, df: pd.DataFrame, names) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        Keep rows whose canonical campaign matches `names`. Canonicalization runs over all
+        loaded names first so fuzzy variants of the requested campaign are kept too.
+        """
+        norms = df["campaign_name"].fillna("").astype(str).map(_normalize_campaign_name)
+        counts = norms.value_counts(sort=False).to_dict()
+        fuzzy_map = self._canonical_map(counts)
+        targets = self._resolve_filters({"campaign": names}, fuzzy_map)["campaign"]
+        keep = norms.map(lambda n: fuzzy_map.get(n, n)).isin(targets)
+        return df[keep.to_numpy()], fuzzy_map
+
+    def finalize(self, partial: Dict, fuzzy_map: Dict[str, str] = None, compare_days: int = None) -> Dict:
+        """
+        Canonicalize campaign names over the (merged) accumulators and build the summary payload.
+        Pass `fuzzy_map` to reuse an existing mapping (e.g. the one stored at SQLite ingest).
+        `compare_days` adds a period-over-period comparison (last N days vs the N before).
+        Returns a LazyDict; call `to_dict()` for a JSON-ready copy of every section.
+        """
+        return self._finalize(partial, fuzzy_map=fuzzy_map, compare_days=compare_days)[0]
+
+    def _finalize(
+        self, partial: Dict, fuzzy_map: Dict[str, str] = None, compare_days: int = None, rows: pd.DataFrame = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        finalize() plus the run() artifacts: the creative leaderboard, the quarantined rows
+        and, given the summarized `rows` and config `drilldown`, a drill-down over them.
+        """
+        if fuzzy_map is None:
+            # ---------- Build frequency counts for normalized names ----------
+            by_campaign = partial["by_campaign"]
+            norm_counts = {n: int(c) for n, c in by_campaign["rows"].items()} if len(by_campaign) else {}
+            fuzzy_map = self._canonical_map(norm_counts)
+
+        # built only when the creative generator or the leaderboard section asks for it
+        artifacts = LazyDict(quarantine=partial.get("quarantine"))
+        artifacts.define(
+            "creative_leaderboard",
+            lambda: CreativeLeaderboard(partial["by_creative"], fuzzy_map) if partial.get("by_creative") is not None else None,
+        )
+        summary = finalize_partial(
+            partial,
+            fuzzy_map,
+            trend_options=self.config.get("trend_options"),
+            compare_days=compare_days,
+            delta_top_k=int(self.config.get("delta_top_k", 5)),
+            forecast_horizon=int(self.config.get("forecast_horizon", 7) or 0),
+            forecast_options=self.config.get("forecast_options"),
+            leaderboard_k=int(self.config.get("leaderboard_k", 5) or 0),
+            leaderboard_min_impressions=float(self.config.get("leaderboard_min_impressions", 0) or 0),
+            leaderboard=lambda: artifacts["creative_leaderboard"],
+            budget=bool(self.config.get("budget_optimizer", False)),
+            budget_total=self.config.get("budget_total"),
+            budget_options=self._budget_options(),
+            budget_limits=self._resolve_limits(self.config.get("budget_limits"), fuzzy_map),
+        )
+        if partial.get("quality") is not None:
+            summary["data_quality"] = quality_section(partial["quality"], self._validation_mode())
+        if rows is not None and self.config.get("drilldown", False):
+            artifacts["drilldown"] = DrillDown(
+                rows, _normalize_campaign_name, fuzzy_map, cache_size=int(self.config.get("drilldown_cache_size", 256))
+            )
+        return summary, artifacts
+
+    def _budget_options(self) -> Dict:
+        options = dict(self.config.get("budget_options") or {})
+        for key in ("min_share", "max_share"):
+            if self.config.get(f"budget_{key}") is not None:
+                options[key] = float(self.config[f"budget_{key}"])
+        return options
+
+    @staticmethod
+    def _resolve_limits(limits: Dict, fuzzy_map: Dict[str, str]) -> Dict:
+        """Per-campaign budget limits keyed by canonical name (raw names are accepted)."""
+        resolved = {}
+        for name, bounds in (limits or {}).items():
+            norm = _normalize_campaign_name(name)
+            resolved[fuzzy_map.get(norm, norm)] = bounds
+        return resolved
+
+    def _canonical_map(self, norm_counts: Dict[str, int]) -> Dict[str, str]:
         # ---------- Build fuzzy mapping name -> canonical_norm ----------
         unique_norms = list(norm_counts.keys())
         # When few unique entries, skip expensive grouping
         SIMILARITY_THRESHOLD = float(self.config.get("similarity_threshold", 0.78))
-        if len(unique_norms) <= 1:
+        alias_path = self.config.get("alias_store")
+        if alias_path:
+            # Persistent store: only names unseen in earlier runs get clustered
+            store = CampaignAliasStore(alias_path)
+            fuzzy_map = store.resolve(unique_norms, norm_counts, threshold=SIMILARITY_THRESHOLD)
+            store.save()
+        elif len(unique_norms) <= 1:
             fuzzy_map = {n: n for n in unique_norms}
         else:
             fuzzy_map = build_fuzzy_groups(unique_norms, norm_counts, threshold=SIMILARITY_THRESHOLD)
+        return fuzzy_map
 
-        # ---------- Apply fuzzy canonicalization ----------
-        df["campaign_canon"] = df["campaign_norm"].map(lambda x: fuzzy_map.get(x, x))
-
-        # ---------- Global Metrics ----------
-        global_summary = {
-            "total_spend": float(df["spend"].sum()),
-            "total_revenue": float(df["revenue"].sum()),
-            "avg_ctr": float(df["ctr"].mean()),
-            "avg_roas": float(df["roas"].mean()),
-            "total_clicks": int(df["clicks"].sum()),
-            "total_impressions": int(df["impressions"].sum()),
-            "date_range": {
-                "min": str(df["date"].min()),
-                "max": str(df["date"].max())
-            }
-        }
-
-        # ---------- Daily Trend ----------
-        daily_trend = (
-            df.groupby("date")
-              .agg({
-                  "roas": "mean",
-                  "ctr": "mean",
-                  "spend": "sum",
-                  "clicks": "sum",
-                  "impressions": "sum"
-              })
-              .reset_index()
-              .sort_values("date")
-              .to_dict(orient="records")
+    # ------------------------------------------------
+    def _summarize_sample(
+        self, csv_path: str, filters: Dict, columns=None, compare_days: int = None, parts: List[str] = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        Sampling mode: one chunked pass draws a (campaign, date)-stratified sample of
+        `sample_rows` rows and counts every stratum; the weighted sample is summarized like
+        the full data. Campaign and last_n_days filters act on whole strata, so they are
+        applied after the pass without changing the weights. Every row is validated before it
+        is sampled, so the data-quality counts cover the whole file.
+        """
+        budget = int(self.config.get("sample_rows", 200_000))
+        row_filters = {k: v for k, v in (filters or {}).items() if k not in ("campaign", "last_n_days")}
+        norm_cache: Dict[str, str] = {}
+        mode = self._validation_mode()
+        validator = RowValidator(self.config.get("quality_options")) if mode != "off" else None
+        quarantined = []
+
+        def chunks():
+            for chunk in iter_csv(csv_path, usecols=self._usecols(columns, parts), filters=row_filters):
+                if validator is not None:
+                    bits = validator.check(chunk)
+                    quarantined.append(quarantine_frame(chunk, bits))
+                    if mode == "quarantine":
+                        chunk = chunk[bits == 0]
+                names = chunk["campaign_name"].fillna("").astype(str)
+                for name in names.unique():
+                    if name not in norm_cache:
+                        norm_cache[name] = _normalize_campaign_name(name)
+                yield chunk.assign(campaign_name=names, campaign_norm=names.map(norm_cache), date=chunk["date"].astype(str))
+
+        sample, counts = stratified_sample(
+            chunks(),
+            budget,
+            min_per_stratum=int(self.config.get("sample_min_per_stratum", 2)),
+            seed=int(self.config.get("random_seed", 0) or 0),
         )
-
-        # ---------- Campaign Summary (grouped by canonical name) ----------
-        campaign_agg = (
-            df.groupby("campaign_canon")
-              .agg({
-                  "ctr": "mean",
-                  "roas": "mean",
-                  "spend": "sum",
-                  "revenue": "sum",
-                  "clicks": "sum",
-                  "impressions": "sum",
-                  "campaign_name": "first"  # representative original label
-              })
-              .reset_index()
+        if not len(sample):
+            raise ValueError(f"No rows to sample in {csv_path}")
+
+        strata_norms = counts.index.get_level_values("campaign_norm")
+        strata_dates = counts.index.get_level_values("date")
+        keep_rows = np.ones(len(sample), dtype=bool)
+        keep_strata = np.ones(len(counts), dtype=bool)
+        if filters.get("last_n_days"):
+            start = window_start(max(strata_dates), filters["last_n_days"])
+            keep_rows &= (sample["date"] >= start).to_numpy()
+            keep_strata &= np.asarray(strata_dates >= start)
+
+        norm_counts = pd.Series(counts.to_numpy()[keep_strata], index=strata_norms[keep_strata])
+        norm_counts = norm_counts.groupby(level=0, sort=False).sum()
+        fuzzy_map = self._canonical_map({n: int(c) for n, c in norm_counts.items()})
+        if filters.get("campaign"):
+            targets = self._resolve_filters({"campaign": filters["campaign"]}, fuzzy_map)["campaign"]
+            keep_rows &= sample["campaign_norm"].map(lambda n: fuzzy_map.get(n, n)).isin(targets).to_numpy()
+            keep_strata &= np.asarray(strata_norms.map(lambda n: fuzzy_map.get(n, n)).isin(targets))
+        sample, counts = restrict(sample, counts, keep_rows, keep_strata)
+
+        partial = self.build_partial(sample, validate=False)
+        if validator is not None:
+            partial["quality"] = validator.summary()
+            partial["quarantine"] = pd.concat(quarantined, ignore_index=True)
+        summary, artifacts = self._finalize(partial, fuzzy_map=fuzzy_map, compare_days=compare_days)
+        summary["sampling"] = sample_intervals(
+            sample, counts, summary, fuzzy_map, confidence=float(self.config.get("sample_confidence", 0.95))
         )
-
-        campaign_summaries = []
-        for _, row in campaign_agg.iterrows():
-            campaign_summaries.append({
-                "campaign_canon": row["campaign_canon"],
-                "campaign_display": row["campaign_name"],
-                "ctr": float(row["ctr"]),
-                "roas": float(row["roas"]),
-                "spend": float(row["spend"]),
-                "revenue": float(row["revenue"]),
-                "clicks": int(row["clicks"]),
-                "impressions": int(row["impressions"]),
-            })
-
-        # ---------- LOW CTR campaigns (canonical strings) ----------
-        if len(campaign_agg) == 0:
-            low_ctr = []
-        else:
-            ctr_threshold = campaign_agg["ctr"].quantile(0.25)
-            low_ctr = (
-                campaign_agg[campaign_agg["ctr"] <= ctr_threshold]["campaign_canon"]
-                .tolist()
+        log_agent(
+            "data_agent",
+            f"Sampled {len(sample)} of {int(counts.sum())} rows from {csv_path} ({len(counts)} strata)",
+        )
+        return summary, artifacts
+
+    def _summarize_sqlite(self, filters: Dict, compare_days: int = None, parts: List[str] = None) -> Tuple[Dict, Dict]:
+        """
+        Indexed-SQL path: ingest the CSV once into `sqlite_path` (re-ingest only when the
+        file changes), then aggregate only the rows matching `filters`. Each GROUP BY runs
+        when its section is first read, so the store stays open with the partial (its
+        connection closes when the summary is garbage-collected).
+        """
+        store = SQLiteStore(self.config.get("sqlite_path", "cache/ads.sqlite"))
+        try:
+            self._ingest_if_stale(store)
+            fuzzy_map = store.canonical_map()
+            partial = store.partial(self._resolve_filters(filters, fuzzy_map), parts=parts)
+        except Exception:
+            store.close()
+            raise
+        log_agent("data_agent", f"Counted {partial['rows']} rows in {store.path} (filters={filters})")
+        return self._finalize(partial, fuzzy_map=fuzzy_map, compare_days=compare_days)
+
+    def warm_sqlite(self) -> int:
+        """
+        Bring `sqlite_path` up to date with `data_csv` ahead of any run (e.g. once in the
+        job daemon, so pooled workers only read it). Returns the rows ingested, 0 if current.
+        """
+        store = SQLiteStore(self.config.get("sqlite_path", "cache/ads.sqlite"))
+        try:
+            return self._ingest_if_stale(store)
+        finally:
+            store.close()
+
+    def _ingest_if_stale(self, store: SQLiteStore) -> int:
+        csv_path = self.config["data_csv"]
+        mode = self._validation_mode()
+        # re-ingest when the validation settings change: they decide which rows are stored
+        settings = json.dumps({"validation": mode, "quality_options": self.config.get("quality_options")}, sort_keys=True)
+        with store.ingest_lock():
+            if store.is_current(csv_path, settings):
+                return 0
+            rows = store.ingest_csv(
+                csv_path,
+                _normalize_campaign_name,
+                self._canonical_map,
+                validator=RowValidator(self.config.get("quality_options")) if mode != "off" else None,
+                drop_flagged=mode == "quarantine",
+                settings=settings,
             )
-
-        # ---------- Result ----------
-        return {
-            "global": global_summary,
-            "trend": daily_trend,
-            "campaign_summaries": campaign_summaries,
-            "low_ctr_campaigns": low_ctr
-        }
+        log_agent("data_agent", f"Ingested {rows} rows from {csv_path} into {store.path}")
+        return rows
+
+    @staticmethod
+    def _resolve_filters(filters: Dict, fuzzy_map: Dict[str, str]) -> Dict:
+        """Map raw campaign names in filters onto canonical names."""
+        resolved = dict(filters or {})
+        if resolved.get("campaign"):
+            names = resolved["campaign"]
+            names = names if isinstance(names, (list, tuple, set)) else [names]
+            canon = []
+            for n in names:
+                norm = _normalize_campaign_name(n)
+                canon.append(fuzzy_map.get(norm, norm))
+            resolved["campaign"] = canon
+        return resolved
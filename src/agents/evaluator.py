@@ -1,17 +1,32 @@
 # src/agents/evaluator.py
 
+import math
+
 from agents.agent_base import AgentBase
+from agents.insight_rules import campaign_frame, evaluate_rules, rule_context
 from utils.logger import log_agent
 from utils.metrics import pct_change, safe_mean, z_test_proportions
+from utils.sampling import replicate_summaries
 
 
 class EvaluatorAgent(AgentBase):
     """
     Evaluator Agent:
-    - Validates hypotheses with numerical checks.
+    - Validates hypotheses with numerical checks. Per-campaign rule hypotheses are confirmed
+      by each rule's own `check` (a z test or a margin past the rule's threshold,
+      agents.insight_rules), not by re-running the rule that raised them.
     - Outputs: hypothesis_id, validated=True/False, p_value, metric deltas, confidence.
+    - On a sampled summary (summary["sampling"]), re-validates every hypothesis on
+      replicate summaries drawn from the error bounds and marks results whose verdict
+      flips in more than `fragile_flip_rate` of them as fragile.
     """
 
+    # summary sections run() reads; watch mode reruns the agent only when one of them changed
+    SUMMARY_SECTIONS = (
+        "global", "trend", "campaign_summaries", "low_ctr_campaigns", "low_ctr_cutoff", "campaign_trends",
+        "campaign_forecasts", "period_comparison", "sampling",
+    )
+
     def run(self, inputs):
         try:
             hypotheses = inputs.get("hypotheses") or inputs.get("payload", {}).get("hypotheses")
@@ -25,11 +40,17 @@ class EvaluatorAgent(AgentBase):
 
             log_agent("evaluator", f"Evaluating {len(hypotheses)} hypotheses")
 
+            # per-campaign rule hypotheses are re-checked in one vectorized pass
+            rule_hits = self._rule_hits(summary) if any(h.get("rule") for h in hypotheses) else {}
+
             results = []
             for h in hypotheses:
-                result = self._evaluate_single(h, summary, trend, campaigns, global_summary)
+                result = self._evaluate_single(h, summary, trend, campaigns, global_summary, rule_hits)
                 results.append(result)
 
+            if summary.get("sampling"):
+                self._flag_fragile(hypotheses, results, summary)
+
             final_conf = safe_mean([r["confidence"] for r in results])
 
             return {
@@ -47,7 +68,42 @@ class EvaluatorAgent(AgentBase):
             }
 
     # ---------------------------------------------------------
-    def _evaluate_single(self, hypothesis, summary, trend, campaigns, global_summary):
+    def _rule_hits(self, summary):
+        """(rule, campaign) -> (score, check passed, p-value) for every rule hit on `summary`."""
+        f = campaign_frame(summary)
+        if f.empty:
+            return {}
+        hits = evaluate_rules(f, rule_context(summary, f, self.config.get("rule_check_options")), checks=True)
+        return {
+            (r, c): (float(s), bool(v), None if math.isnan(p) else float(p))
+            for r, c, s, v, p in zip(hits["rule"], hits["campaign"], hits["score"], hits["validated"], hits["p_value"])
+        }
+
+    def _flag_fragile(self, hypotheses, results, summary):
+        """Share of replicate summaries on which each verdict flips; fragile above the threshold."""
+        replicates = replicate_summaries(
+            summary,
+            n=int(self.config.get("sample_replicates", 32)),
+            seed=int(self.config.get("random_seed", 0) or 0),
+        )
+        if not replicates:
+            return
+        threshold = float(self.config.get("fragile_flip_rate", 0.1))
+        flips = [0] * len(hypotheses)
+        for rep in replicates:
+            rule_hits = self._rule_hits(rep) if any(h.get("rule") for h in hypotheses) else {}
+            for i, h in enumerate(hypotheses):
+                verdict = self._evaluate_single(
+                    h, rep, rep.get("trend", []), rep.get("campaign_summaries", []), rep.get("global", {}), rule_hits
+                )["validated"]
+                flips[i] += verdict != results[i]["validated"]
+        for result, count in zip(results, flips):
+            rate = count / len(replicates)
+            result["sampling"] = {"flip_rate": round(rate, 3), "fragile": rate > threshold}
+        fragile = sum(r["sampling"]["fragile"] for r in results)
+        log_agent("evaluator", f"{fragile} of {len(results)} verdicts may change under the exact computation")
+
+    def _evaluate_single(self, hypothesis, summary, trend, campaigns, global_summary, rule_hits=None):
         """
         Evaluates one hypothesis depending on its ID.
         """
@@ -66,6 +122,19 @@ class EvaluatorAgent(AgentBase):
             "confidence": base_conf
         }
 
+        # ------------------ Per-campaign rule hypotheses ------------------
+        if hypothesis.get("rule"):
+            key = (hypothesis["rule"], hypothesis.get("campaign"))
+            score, checked, p_value = (rule_hits or {}).get(key, (None, False, None))
+            result["metrics"] = {"campaign": hypothesis.get("campaign"), "rule": hypothesis["rule"], "score": score}
+            result["p_value"] = p_value
+            if checked:
+                result["validated"] = True
+                result["confidence"] = min(1.0, base_conf + 0.1)
+            else:
+                result["confidence"] = base_conf * 0.5
+            return result
+
         # ------------------ H1: ROAS TREND ------------------
         if h_id == "h_roas_trend" and trend:
             # compare first 7 days vs last 7 days (if available)
@@ -115,6 +184,12 @@ class EvaluatorAgent(AgentBase):
                 "revenue": total_revenue,
                 "roas": roas_est
             }
+            # forward view: campaigns whose forecast ROAS is below break-even
+            forecasts = summary.get("campaign_forecasts") or []
+            if forecasts:
+                result["metrics"]["campaigns_forecast_below_1"] = [
+                    f["campaign_canon"] for f in forecasts if f.get("roas_below_1")
+                ]
 
             if roas_est < 1.0:  # losing money
                 result["validated"] = True
@@ -139,4 +214,22 @@ class EvaluatorAgent(AgentBase):
                 result["validated"] = True
                 result["confidence"] = min(1.0, base_conf + 0.1)
 
+        # ------------------ H5: PERIOD-OVER-PERIOD DRIVERS ------------------
+        if h_id == "h_period_drivers":
+            comparison = summary.get("period_comparison") or {}
+            roas = (comparison.get("totals") or {}).get("roas") or {}
+            delta = roas.get("delta") or 0.0
+            # share of the account ROAS change explained by the top campaigns (same sign)
+            top = (comparison.get("dimensions", {}).get("campaign", {}).get("roas", {}) or {}).get("top", [])
+            explained = sum(t["contribution"] for t in top if t["contribution"] * delta > 0) / delta if delta else 0.0
+            result["metrics"] = {
+                "baseline_roas": roas.get("baseline"),
+                "current_roas": roas.get("current"),
+                "pct_change": roas.get("pct_change"),
+                "top_campaigns_share_of_change": explained,
+            }
+            if roas.get("pct_change") is not None and abs(roas["pct_change"]) >= 0.05:
+                result["validated"] = True
+                result["confidence"] = min(1.0, base_conf + 0.15)
+
         return result
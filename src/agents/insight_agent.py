@@ -2,6 +2,7 @@
 
 from typing import Dict, Any, List
 from agents.agent_base import AgentBase
+from agents.insight_rules import rule_hypotheses
 from utils.logger import log_agent
 import math
 
@@ -15,6 +16,12 @@ class InsightAgent(AgentBase):
     - If confidence is low, suggests further queries/aggregation
     """
 
+    # summary sections run() reads; watch mode reruns the agent only when one of them changed
+    SUMMARY_SECTIONS = (
+        "global", "trend", "campaign_summaries", "low_ctr_campaigns", "campaign_trends", "campaign_forecasts",
+        "period_comparison",
+    )
+
     def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         try:
             summary = inputs.get("summary") or inputs.get("payload") or {}
@@ -86,12 +93,21 @@ class InsightAgent(AgentBase):
             stmt = "ROAS has decreased over the observed period." if roas_change < 0 else "ROAS is stable or increasing."
             confidence = 0.7 if abs(roas_change) >= 0.05 else 0.45  # simple heuristic
 
+            evidence = {"first_roas": first_roas if trend else None, "last_roas": last_roas if trend else None, "roas_change": roas_change}
+            evidence_needed = ["statistical_test_on_roas_last_vs_first_period", "per_campaign_roas_trend"]
+            campaign_trends = summary.get("campaign_trends")
+            if campaign_trends:
+                # per-campaign slopes are already computed (utils.timeseries)
+                evidence["campaigns_declining"] = sum(1 for t in campaign_trends if (t.get("roas_trend_pct") or 0) < -0.2)
+                evidence["campaigns_with_trend"] = sum(1 for t in campaign_trends if t.get("roas_trend_pct") is not None)
+                evidence_needed.remove("per_campaign_roas_trend")
+
             hypos.append({
                 "id": "h_roas_trend",
                 "statement": stmt,
                 "confidence": float(confidence),
-                "evidence": {"first_roas": first_roas if trend else None, "last_roas": last_roas if trend else None, "roas_change": roas_change},
-                "evidence_needed": ["statistical_test_on_roas_last_vs_first_period", "per_campaign_roas_trend"]
+                "evidence": evidence,
+                "evidence_needed": evidence_needed
             })
 
         # --- Hypothesis 2: CTR drop / creative underperformance
@@ -146,6 +162,46 @@ class InsightAgent(AgentBase):
         except Exception:
             pass
 
+        # --- Hypothesis 5: drivers of a period-over-period change (utils.deltas)
+        try:
+            comparison = summary.get("period_comparison") or {}
+            roas_totals = (comparison.get("totals") or {}).get("roas") or {}
+            if roas_totals.get("pct_change") is not None:
+                # the single segment (any dimension) contributing most to the ROAS change
+                drivers = []
+                for dim, metrics in comparison.get("dimensions", {}).items():
+                    for seg in metrics["roas"]["top"][:3]:
+                        drivers.append({"dimension": dim, **seg})
+                delta = roas_totals["delta"]
+                drivers.sort(key=lambda d: -(d["contribution"] * (1 if delta >= 0 else -1)))
+                direction = "dropped" if delta < 0 else "rose"
+                stmt = (
+                    f"ROAS {direction} {abs(roas_totals['pct_change']):.1%} "
+                    f"({roas_totals['baseline']:.2f} -> {roas_totals['current']:.2f}) between "
+                    f"{comparison['baseline']['from']}..{comparison['baseline']['to']} and "
+                    f"{comparison['current']['from']}..{comparison['current']['to']}"
+                )
+                if drivers:
+                    top = drivers[0]
+                    effect = "rate" if abs(top.get("rate_effect", 0)) >= abs(top.get("mix_effect", 0)) else "mix"
+                    stmt += f"; largest driver: {top['dimension']} = {top['segment']} ({effect} effect)."
+                hypos.append({
+                    "id": "h_period_drivers",
+                    "statement": stmt,
+                    "confidence": 0.65 if abs(roas_totals["pct_change"]) >= 0.05 else 0.4,
+                    "evidence": {"roas": roas_totals, "top_drivers": drivers[:5]},
+                    "evidence_needed": ["creative_changes_between_periods", "auction_price_changes"]
+                })
+        except Exception as e:
+            log_agent("insight_agent", f"Period comparison skipped: {e}")
+
+        # --- Per-campaign hypotheses: declarative rules evaluated over all campaigns at once
+        try:
+            top_n = int(self.config.get("max_campaign_hypotheses", 10))
+            hypos.extend(rule_hypotheses(summary, top_n=top_n))
+        except Exception as e:
+            log_agent("insight_agent", f"Campaign rule engine skipped: {e}")
+
         # If no hypotheses produced, be explicit
         if not hypos:
             hypos.append({
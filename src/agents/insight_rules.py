@@ -0,0 +1,245 @@
+# src/agents/insight_rules.py
+"""
+Declarative, vectorized per-campaign hypothesis rules.
+
+Each rule is a dict:
+    id               short rule id (hypothesis ids become "hc_<rule>::<campaign>")
+    when(f, ctx)     boolean Series over the campaign frame `f` (one row per campaign)
+    score(f, ctx)    severity Series in [0, 1] used for ranking and confidence
+    statement        str.format template over the campaign row + context
+    evidence         campaign columns copied into the hypothesis evidence
+    evidence_needed  follow-up data that would confirm the hypothesis
+    base_confidence  confidence at score 0 (grows to base + 0.3 at score 1)
+    check(f, ctx)    boolean Series: the EvaluatorAgent's confirmation of a hit. It must not
+                     just repeat `when`: CTR rules use a one-sided two-proportion z test
+                     against the rest of the account (at `alpha`), ROAS rules require the
+                     metric to clear the rule's threshold by a relative `margin`.
+    p_value(f, ctx)  optional Series reported with the check
+
+`evaluate_rules` applies every rule to every campaign with column operations only, so the
+cost is a handful of vectorized passes regardless of campaign count; Python-level work is
+limited to formatting the top-ranked hits.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import proportion_below_rest
+from utils.timeseries import TREND_DEFAULTS
+
+# per-campaign trend columns (utils.timeseries) joined onto the campaign frame; NaN when absent
+TREND_COLUMNS = ["days", "roas_trend_pct", "roas_z_latest", "change_point", "roas_before", "roas_after", "change_t", "anomaly_days"]
+# per-campaign forecast columns (utils.forecast); roas_forecast_hi is the upper interval bound
+FORECAST_COLUMNS = ["horizon_days", "roas_forecast", "roas_forecast_hi"]
+# significance level and relative threshold margin of the rule checks
+CHECK_DEFAULTS = {"alpha": 0.05, "margin": 0.1}
+
+
+def campaign_frame(summary: Dict[str, Any]) -> pd.DataFrame:
+    """Columnar campaign table (one row per canonical campaign) + derived ratios."""
+    f = pd.DataFrame(summary.get("campaign_summaries", []) or [])
+    if f.empty:
+        return f
+    f = f.set_index("campaign_canon", drop=False)
+    spend = f["spend"].astype(float)
+    f["roas_agg"] = np.where(spend > 0, f["revenue"] / spend.where(spend > 0, 1.0), 0.0)
+    f["spend_share"] = spend / max(float(spend.sum()), 1e-9)
+
+    trends = pd.DataFrame(summary.get("campaign_trends", []) or [], columns=["campaign_canon"] + TREND_COLUMNS)
+    trends = trends.set_index("campaign_canon").reindex(f.index)
+    for c in TREND_COLUMNS:
+        f[c] = trends[c].to_numpy()
+    forecasts = pd.DataFrame(summary.get("campaign_forecasts", []) or [], columns=["campaign_canon", "horizon_days", "roas_forecast", "roas_interval"])
+    # [lo, hi] pairs, or None without an interval; .str[1] indexes each list
+    forecasts["roas_forecast_hi"] = forecasts["roas_interval"].astype(object).str[1]
+    forecasts = forecasts.set_index("campaign_canon").reindex(f.index)
+    for c in FORECAST_COLUMNS:
+        f[c] = forecasts[c].to_numpy()
+
+    numeric = [c for c in TREND_COLUMNS + FORECAST_COLUMNS if c != "change_point"]
+    f[numeric] = f[numeric].apply(pd.to_numeric, errors="coerce")
+    return f
+
+
+def rule_context(summary: Dict[str, Any], f: pd.DataFrame, check_options: Dict = None) -> Dict[str, float]:
+    g = summary.get("global", {}) or {}
+    spend = float(g.get("total_spend", 0) or 0)
+    return {
+        **CHECK_DEFAULTS,
+        **(check_options or {}),
+        "avg_ctr": float(g.get("avg_ctr", 0) or 0),
+        "account_roas": float(g.get("total_revenue", 0) or 0) / spend if spend > 0 else 0.0,
+        "n_campaigns": len(f),
+        "impressions_p25": float(f["impressions"].quantile(0.25)) if len(f) else 0.0,
+        "impressions_p75": float(f["impressions"].quantile(0.75)) if len(f) else 0.0,
+        "median_spend_share": float(f["spend_share"].median()) if len(f) else 0.0,
+        "anomaly_z": float(TREND_DEFAULTS["anomaly_z"]),
+    }
+
+
+def _clip01(s: pd.Series) -> pd.Series:
+    return s.clip(lower=0.0, upper=1.0).fillna(0.0)
+
+
+def _ctr_p(f: pd.DataFrame) -> pd.Series:
+    """One-sided p-value that the campaign's clicks / impressions is below the rest of the account."""
+    return pd.Series(proportion_below_rest(f["clicks"], f["impressions"]), index=f.index)
+
+
+CAMPAIGN_RULES: List[Dict[str, Any]] = [
+    {
+        "id": "low_ctr",
+        "when": lambda f, c: f["ctr"] < 0.7 * c["avg_ctr"],
+        "score": lambda f, c: _clip01(1 - f["ctr"] / max(c["avg_ctr"], 1e-9)),
+        "statement": "{campaign_display} CTR ({ctr:.2%}) is well below the account average ({avg_ctr:.2%}); creative is likely underperforming.",
+        "evidence": ["ctr", "impressions", "clicks"],
+        "evidence_needed": ["per_campaign_creative_messages"],
+        "base_confidence": 0.55,
+        "check": lambda f, c: _ctr_p(f) < c["alpha"],
+        "p_value": lambda f, c: _ctr_p(f),
+    },
+    {
+        "id": "unprofitable",
+        "when": lambda f, c: (f["roas_agg"] < 1.0) & (f["spend"] > 0),
+        "score": lambda f, c: _clip01((1 - f["roas_agg"]) * 0.5 + f["spend_share"] * c["n_campaigns"] * 0.1),
+        "statement": "{campaign_display} returns {roas_agg:.2f} revenue per unit of spend (below break-even) on {spend:,.0f} spend.",
+        "evidence": ["spend", "revenue", "roas_agg"],
+        "evidence_needed": ["per_adset_conversion_rates"],
+        "base_confidence": 0.6,
+        "check": lambda f, c: f["roas_agg"] < 1.0 - c["margin"],
+    },
+    {
+        "id": "audience_fatigue",
+        "when": lambda f, c: (f["ctr"] < 0.8 * c["avg_ctr"]) & (f["impressions"] >= c["impressions_p75"]),
+        "score": lambda f, c: _clip01((1 - f["ctr"] / max(c["avg_ctr"], 1e-9)) * 2),
+        "statement": "{campaign_display} has high delivery ({impressions:,} impressions) but low CTR ({ctr:.2%}), suggesting audience fatigue.",
+        "evidence": ["impressions", "ctr"],
+        "evidence_needed": ["frequency_by_audience"],
+        "base_confidence": 0.5,
+        "check": lambda f, c: _ctr_p(f) < c["alpha"],
+        "p_value": lambda f, c: _ctr_p(f),
+    },
+    {
+        "id": "spend_concentration",
+        "when": lambda f, c: (f["spend_share"] > 2.0 / max(c["n_campaigns"], 1)) & (f["roas_agg"] < c["account_roas"]),
+        "score": lambda f, c: _clip01(f["spend_share"] * c["n_campaigns"] / 10 * (1 - f["roas_agg"] / max(c["account_roas"], 1e-9))),
+        "statement": "{campaign_display} takes {spend_share:.1%} of spend with below-account ROAS ({roas_agg:.2f} vs {account_roas:.2f}).",
+        "evidence": ["spend", "spend_share", "roas_agg"],
+        "evidence_needed": ["time_series_spend_vs_revenue"],
+        "base_confidence": 0.5,
+        "check": lambda f, c: f["roas_agg"] < c["account_roas"] * (1.0 - c["margin"]),
+    },
+    {
+        "id": "scale_opportunity",
+        # needs enough delivery to trust the ROAS (tiny one-off variants are noise)
+        "when": lambda f, c: (
+            (f["roas_agg"] > 1.5 * c["account_roas"])
+            & (f["spend_share"] < c["median_spend_share"])
+            & (f["impressions"] >= c["impressions_p25"])
+        ),
+        "score": lambda f, c: _clip01(f["roas_agg"] / max(c["account_roas"], 1e-9) / 4),
+        "statement": "{campaign_display} earns {roas_agg:.2f} ROAS (account {account_roas:.2f}) on a small budget share ({spend_share:.1%}); consider scaling.",
+        "evidence": ["spend", "spend_share", "roas_agg"],
+        "evidence_needed": ["marginal_roas_at_higher_spend"],
+        "base_confidence": 0.45,
+        "check": lambda f, c: f["roas_agg"] > 1.5 * c["account_roas"] * (1.0 + c["margin"]),
+    },
+    {
+        "id": "roas_declining",
+        # fitted decline over the window, backed by a significant downward mean shift
+        "when": lambda f, c: (f["roas_trend_pct"] < -0.2) & (f["change_t"] < -2.0),
+        "score": lambda f, c: _clip01(-f["roas_trend_pct"] * 0.5 + (-f["change_t"] - 2.0) / 10),
+        "statement": "{campaign_display} ROAS is trending down ({roas_trend_pct:.0%} over its {days:.0f} active days); it shifted from {roas_before:.2f} to {roas_after:.2f} around {change_point}.",
+        "evidence": ["roas_trend_pct", "change_point", "roas_before", "roas_after", "change_t"],
+        "evidence_needed": ["creative_rotation_history", "audience_frequency"],
+        "base_confidence": 0.55,
+        "check": lambda f, c: (f["roas_trend_pct"] < -0.2 * (1.0 + c["margin"])) & (f["change_t"] < -2.0 * (1.0 + c["margin"])),
+    },
+    {
+        "id": "roas_anomaly",
+        "when": lambda f, c: f["roas_z_latest"] <= -c["anomaly_z"],
+        "score": lambda f, c: _clip01((-f["roas_z_latest"] - c["anomaly_z"]) / 3 + 0.3),
+        "statement": "{campaign_display} latest-day ROAS is anomalously low (z = {roas_z_latest:.1f} vs its trailing week).",
+        "evidence": ["roas_z_latest", "anomaly_days"],
+        "evidence_needed": ["tracking_and_attribution_checks"],
+        "base_confidence": 0.5,
+        "check": lambda f, c: f["roas_z_latest"] <= -c["anomaly_z"] * (1.0 + c["margin"]),
+    },
+    {
+        "id": "forecast_below_break_even",
+        "when": lambda f, c: f["roas_forecast"] < 1.0,
+        # stronger when even the upper interval bound is below break-even
+        "score": lambda f, c: _clip01((1 - f["roas_forecast"]) + 0.3 * (f["roas_forecast_hi"] < 1.0)),
+        "statement": "{campaign_display} is forecast to return {roas_forecast:.2f} ROAS over the next {horizon_days:.0f} days (upper bound {roas_forecast_hi:.2f}), below break-even.",
+        "evidence": ["roas_forecast", "roas_forecast_hi", "horizon_days"],
+        "evidence_needed": ["planned_budget_changes"],
+        "base_confidence": 0.5,
+        # the whole forecast interval is below break-even
+        "check": lambda f, c: f["roas_forecast_hi"] < 1.0,
+    },
+]
+
+
+def evaluate_rules(
+    f: pd.DataFrame, context: Dict[str, float], rules: List[Dict[str, Any]] = None, checks: bool = False
+) -> pd.DataFrame:
+    """
+    Evaluate every rule over every campaign. Returns one row per (rule, campaign) hit with
+    columns: rule, campaign, score, confidence (and, with `checks`, validated and p_value);
+    sorted by score descending.
+    """
+    rules = CAMPAIGN_RULES if rules is None else rules
+    hits = []
+    for rule in rules:  # loop over rules (a handful), never over campaigns
+        mask = rule["when"](f, context).fillna(False).to_numpy(dtype=bool)
+        if not mask.any():
+            continue
+        score = rule["score"](f, context).to_numpy(dtype=float)[mask]
+        hit = pd.DataFrame({
+            "rule": rule["id"],
+            "campaign": f.index.to_numpy()[mask],
+            "score": score,
+            "confidence": np.clip(rule["base_confidence"] + 0.3 * score, 0.0, 1.0),
+        })
+        if checks:
+            hit["validated"] = rule["check"](f, context).fillna(False).to_numpy(dtype=bool)[mask]
+            hit["p_value"] = rule["p_value"](f, context).to_numpy(dtype=float)[mask] if "p_value" in rule else np.nan
+        hits.append(hit)
+    if not hits:
+        return pd.DataFrame(columns=["rule", "campaign", "score", "confidence"] + (["validated", "p_value"] if checks else []))
+    return pd.concat(hits, ignore_index=True).sort_values("score", ascending=False, kind="mergesort")
+
+
+def rule_hypotheses(
+    summary: Dict[str, Any], top_n: int = 10, rules: List[Dict[str, Any]] = None, per_rule: int = 3
+) -> List[Dict[str, Any]]:
+    """Ranked per-campaign hypotheses (top_n overall, at most per_rule per rule) with evidence."""
+    rules = CAMPAIGN_RULES if rules is None else rules
+    f = campaign_frame(summary)
+    if f.empty:
+        return []
+    context = rule_context(summary, f)
+    # cap each rule so one noisy rule cannot crowd out the others
+    hits = evaluate_rules(f, context, rules).groupby("rule", sort=False).head(per_rule).head(top_n)
+    by_id = {r["id"]: r for r in rules}
+
+    hypotheses = []
+    for rank, hit in enumerate(hits.itertuples(index=False), start=1):
+        rule = by_id[hit.rule]
+        row = f.loc[hit.campaign]
+        values = {**context, **row.to_dict()}
+        evidence = {k: (float(row[k]) if isinstance(row[k], (int, float, np.number)) else row[k]) for k in rule["evidence"]}
+        evidence["score"] = round(float(hit.score), 4)
+        hypotheses.append({
+            "id": f"hc_{hit.rule}::{hit.campaign}",
+            "rule": hit.rule,
+            "campaign": hit.campaign,
+            "rank": rank,
+            "statement": rule["statement"].format(**values),
+            "confidence": round(float(hit.confidence), 4),
+            "evidence": evidence,
+            "evidence_needed": list(rule["evidence_needed"]),
+        })
+    return hypotheses
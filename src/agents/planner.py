@@ -1,7 +1,95 @@
 # src/agents/planner.py
 
+import re
+from typing import Dict, List
+
 from agents.agent_base import AgentBase
 from utils.logger import log_agent
+from utils.summary_shards import DELTA_DIMENSIONS
+
+# Columns DataAgent always needs to build the summary
+SUMMARY_COLUMNS = ["campaign_name", "date", "spend", "revenue", "ctr", "roas", "clicks", "impressions"]
+# summary sections the insight agent, evaluator and report read (DataAgent reads only the
+# columns behind them); period_comparison is added for change questions
+READ_SECTIONS = [
+    "global", "trend", "campaign_summaries", "low_ctr_campaigns", "campaign_trends", "campaign_forecasts", "budget_plan",
+]
+
+# query vocabulary -> (filter column, value as stored in the dataset). Only explicit
+# phrasing counts ("in the US", "on Instagram", "broad audience", "video creatives"):
+# the bare words also occur in ordinary questions ("a broad overview", "our Facebook ads").
+_IN = r"(?i:\b(?:in|from|for|across)\s+(?:the\s+)?)"
+_CREATIVE = r"\s+(?:ads?|creatives?|formats?)\b"
+DIMENSION_TERMS = {
+    "country": {
+        _IN + r"USA?\b": "US", _IN + r"(?i:united states)\b": "US",
+        _IN + r"UK\b": "UK", _IN + r"(?i:united kingdom|britain)\b": "UK",
+        _IN + r"(?i:india)\b": "IN",
+    },
+    "platform": {
+        r"(?i)\bon\s+facebook\b|\bfacebook\s+(?:feed|placements?|platform)\b": "Facebook",
+        r"(?i)\bon\s+(?:instagram|IG)\b|\binstagram\s+(?:feed|stories|reels|placements?|platform)\b": "Instagram",
+    },
+    "audience_type": {
+        r"(?i)\bbroad\s+(?:audiences?|targeting)\b": "Broad",
+        r"(?i)\blookalike\s+audiences?\b|\blookalikes\b|\bLAL\b": "Lookalike",
+        r"(?i)\bretargeting\b": "Retargeting",
+    },
+    "creative_type": {
+        r"(?i)\bimage" + _CREATIVE: "Image", r"(?i)\bvideo" + _CREATIVE: "Video",
+        r"(?i)\bugc\b": "UGC", r"(?i)\bcarousel" + _CREATIVE: "Carousel",
+    },
+}
+
+METRIC_TERMS = {
+    "roas": r"(?i)\broas\b|return on ad spend",
+    "ctr": r"(?i)\bctr\b|click[- ]?through|\bclicks?\b",
+    "spend": r"(?i)\bspend\b|\bbudget\b|\bcost\b",
+    "revenue": r"(?i)\brevenue\b|\bsales\b|\bpurchases?\b",
+}
+
+# any of these means the user wants (or would benefit from) new creatives
+CREATIVE_TERMS = r"(?i)creative|\bctr\b|click|\bcopy\b|headline|messag|fatigue|improve|idea|suggest|recommend"
+# period-over-period wording: load the comparison window too, not just the latest period
+# (and compare the two windows along every dimension; default window when none is named)
+DEFAULT_COMPARE_DAYS = 7
+# explicit wording that an approximate (sampled) summary is acceptable; report.md says so
+APPROX_TERMS = r"(?i)\bapprox|\brough(ly)?\b|\bballpark\b|\bsampled?\b"
+CHANGE_TERMS = r"(?i)\bdrop|declin|decreas|increas|\bfell\b|\bfall|chang|compar|\bvs\b|versus|\bwhy\b"
+
+
+def _parse_filters(query: str) -> Dict:
+    filters: Dict = {}
+    for column, patterns in DIMENSION_TERMS.items():
+        values: List[str] = []
+        for pattern, value in patterns.items():
+            if re.search(pattern, query) and value not in values:
+                values.append(value)
+        if values:
+            filters[column] = values[0] if len(values) == 1 else values
+
+    m = re.search(r"""(?i)campaign\s+["'“]([^"'”]+)["'”]""", query)
+    if m:
+        filters["campaign"] = m.group(1).strip()
+
+    dates = re.findall(r"\d{4}-\d{2}-\d{2}", query)
+    if len(dates) >= 2:
+        filters["date_from"], filters["date_to"] = sorted(dates[:2])
+    elif len(dates) == 1:
+        key = "date_to" if re.search(r"(?i)\b(until|before|to)\s+" + dates[0], query) else "date_from"
+        filters[key] = dates[0]
+    else:
+        m = re.search(r"(?i)\blast\s+(\d+)\s+(day|week|month)s?\b", query)
+        if m:
+            n, unit = int(m.group(1)), m.group(2).lower()
+        else:
+            m = re.search(r"(?i)\b(?:last|past|this)\s+(week|month)\b", query)
+            n, unit = (1, m.group(1).lower()) if m else (0, "day")
+        days = n * {"day": 1, "week": 7, "month": 30}[unit]
+        if days:
+            # a "drop"/"change" question needs the previous window as the baseline
+            filters["last_n_days"] = days * 2 if re.search(CHANGE_TERMS, query) else days
+    return filters
 
 
 class PlannerAgent(AgentBase):
@@ -11,6 +99,8 @@ class PlannerAgent(AgentBase):
     - Breaks it into tasks
     - Assigns each task to the right agent
     - Sets execution order (priority)
+    - Derives metrics, dimension/date filters and columns so ingestion reads only what
+      the query needs, and skips agents the query does not need
     """
 
     def run(self, inputs):
@@ -20,6 +110,17 @@ class PlannerAgent(AgentBase):
         # If user wants to analyze ROAS specifically
         is_roas_query = "roas" in query.lower()
 
+        metrics = [m for m, pattern in METRIC_TERMS.items() if re.search(pattern, query)]
+        filters = _parse_filters(query)
+        dimension_cols = [c for c in filters if c in DIMENSION_TERMS]
+        compare_days = None
+        if re.search(CHANGE_TERMS, query):
+            # _parse_filters already doubled last_n_days to include the baseline window
+            compare_days = filters["last_n_days"] // 2 if filters.get("last_n_days") else DEFAULT_COMPARE_DAYS
+            dimension_cols += [c for c in DELTA_DIMENSIONS if c not in dimension_cols]
+        # creatives only when asked for, or when the query is not about a specific metric
+        wants_creatives = bool(re.search(CREATIVE_TERMS, query)) or not metrics
+
         # Static but logical task flow
         tasks = []
 
@@ -28,7 +129,17 @@ class PlannerAgent(AgentBase):
             "task_id": "load_data",
             "agent": "data_agent",
             "priority": 1,
-            "params": {}
+            "params": {
+                "filters": filters,
+                "columns": SUMMARY_COLUMNS + dimension_cols,
+                "metrics": metrics,
+                "compare_days": compare_days,
+                "sections": READ_SECTIONS + (["period_comparison"] if compare_days else []),
+                # None keeps DataAgent's configured default (exact unless `sampling` is set)
+                "sample": True if re.search(APPROX_TERMS, query) else None,
+                # the creative leaderboard (and its columns) only when the creative generator runs
+                "needs_creatives": wants_creatives,
+            }
         })
 
         # Always generate insights after loading data
@@ -48,14 +159,17 @@ class PlannerAgent(AgentBase):
         })
 
         # Creative suggestions if CTR or creative performance involved
-        tasks.append({
-            "task_id": "generate_creatives",
-            "agent": "creative_generator",
-            "priority": 4,
-            "params": {"filter": "low_ctr"}
-        })
+        if wants_creatives:
+            tasks.append({
+                "task_id": "generate_creatives",
+                "agent": "creative_generator",
+                "priority": 4,
+                "params": {"filter": "low_ctr", "filters": filters}
+            })
+        else:
+            log_agent("planner", "Skipping creative_generator: query does not involve creatives/CTR")
 
-        log_agent("planner", "Plan created successfully")
+        log_agent("planner", f"Plan created successfully (filters={filters})")
 
         return {
             "status": "ok",
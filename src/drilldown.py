@@ -0,0 +1,60 @@
+"""
+Interactive campaign -> adset -> creative drill-down.
+
+Loads the configured data once (CSV storage, exact mode), then prints the children of
+each requested node. Expanded nodes are cached (`drilldown_cache_size`), so going back up
+the tree is instant.
+
+Usage:
+    python src/drilldown.py                              # campaigns
+    python src/drilldown.py "<campaign>" ["<adset>"]     # adsets of a campaign / creatives of an adset
+    python src/drilldown.py -i                           # read one path per line: campaign > adset
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from agents.data_agent import DataAgent
+from utils.io import load_config
+
+SEPARATOR = ">"
+
+
+def show(drilldown, path, limit: int) -> None:
+    try:
+        table = drilldown.expand(*path)
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e.args[0]}")
+        return
+    title = " > ".join(path) or "account"
+    print(f"{title}: {len(table)} {table.index.name}s")
+    ratios = {c: "{:.4f}".format for c in ("ctr", "roas", "spend_share")}
+    with pd.option_context("display.width", 160, "display.max_colwidth", 60):
+        print(table.head(limit).to_string(formatters=ratios, float_format="{:,.0f}".format))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drill down from campaigns to adsets and creatives.")
+    parser.add_argument("path", nargs="*", help="Campaign, then optionally adset")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("-i", "--interactive", action="store_true", help=f"Read '{SEPARATOR}'-separated paths from stdin")
+    parser.add_argument("--limit", type=int, default=20, help="Children to print per node")
+    args = parser.parse_args()
+
+    # the drill-down needs the rows in memory: read the CSV exactly, whatever the storage setting
+    cfg = {**load_config(args.config), "storage": "csv", "sampling": False, "summary_partials": None, "drilldown": True}
+    out = DataAgent(cfg).run({})
+    if out["status"] != "ok":
+        print(f"Error: {out['error']}")
+        sys.exit(1)
+    drilldown = out["artifacts"]["drilldown"]
+
+    if not args.interactive:
+        show(drilldown, args.path, args.limit)
+        sys.exit(0)
+    print(f"Levels: {' > '.join(drilldown.levels)}. Enter a path (empty line = campaigns), Ctrl-D to quit.")
+    for line in sys.stdin:
+        path = [part.strip() for part in line.split(SEPARATOR) if part.strip()]
+        show(drilldown, path, args.limit)
@@ -0,0 +1,262 @@
+"""
+Durable job queue for analysis questions.
+
+Teams submit questions to a SQLite queue (`job_store` in the config); a worker daemon pulls
+them by priority and runs the pipeline on a bounded process pool. Every job gets its own
+report folder (`<output_dir>/jobs/<id>`), and its report paths, errors and timings are
+stored on the job row.
+
+Usage:
+    python src/job_queue.py submit "<analysis query>" [--priority N] [--data SOURCE] [--by TEAM]
+    python src/job_queue.py list [--status queued|running|done|failed|cancelled]
+    python src/job_queue.py show <job_id>
+    python src/job_queue.py cancel <job_id>
+    python src/job_queue.py work [--workers N] [--drain] [--name NAME]
+
+Warm data: with CSV storage the daemon parses each dataset once, exports it as a shared
+dataset (utils.shared_dataset) and hands the handle to every job on that dataset, so workers
+attach to it instead of re-reading the CSV. A dataset is exported again only when its files
+change. With SQLite storage the daemon ingests each dataset once, before dispatching its
+jobs, into the configured `sqlite_path` (or, for a job naming its own dataset, a database
+per dataset next to it), so workers only read the indexed database. Alias store writes
+from concurrent workers are merged under a file lock (CampaignAliasStore.save).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Optional
+
+from utils.io import load_config, load_csv, source_fingerprint
+from utils.job_store import STATUSES, JobStore
+from utils.logger import log_agent
+from utils.shared_dataset import export_frame, release
+
+
+def _run_job(job: Dict, config: Dict, output_dir: str) -> Dict:
+    """
+    Worker entry point. Never raises: failures are returned as status=failed.
+    """
+    # imported here so the daemon process does not need the agent stack loaded
+    from run import run_pipeline
+
+    started = time.perf_counter()
+    outcome = {"status": "done", "result": None, "error": None}
+    try:
+        reports = run_pipeline(job["query"], config=config, output_dir=output_dir)
+        outcome["result"] = reports
+        if reports.get("agent_errors"):
+            outcome["status"] = "failed"
+            outcome["error"] = "; ".join(f"{a}: {e}" for a, e in reports["agent_errors"].items())
+    except BaseException as e:  # one bad job must never take the worker down
+        outcome["status"] = "failed"
+        outcome["error"] = f"{type(e).__name__}: {e}"
+    outcome["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return outcome
+
+
+class WarmDatasets:
+    """
+    One shared export per dataset version. A handle is released once its files have changed
+    and no running job still uses it.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root
+        self._handles: Dict[str, str] = {}  # source -> handle of its current version
+        self._versions: Dict[str, str] = {}  # source -> fingerprint
+        self._in_use: Dict[str, int] = {}  # handle -> running jobs
+        self._stale = set()
+
+    def acquire(self, source: str) -> str:
+        fingerprint = source_fingerprint(source)
+        if self._versions.get(source) != fingerprint:
+            if source in self._handles:
+                self._stale.add(self._handles.pop(source))
+            self._handles[source] = export_frame(load_csv(source), root=self.root)
+            self._versions[source] = fingerprint
+            log_agent("job_queue", f"Exported {source} for reuse across jobs")
+        handle = self._handles[source]
+        self._in_use[handle] = self._in_use.get(handle, 0) + 1
+        return handle
+
+    def done(self, handle: str) -> None:
+        self._in_use[handle] -= 1
+        for stale in [h for h in self._stale if not self._in_use.get(h)]:
+            release(stale)
+            self._stale.discard(stale)
+
+    def close(self) -> None:
+        for handle in list(self._handles.values()) + list(self._stale):
+            release(handle)
+        self._handles.clear()
+        self._stale.clear()
+
+
+class WarmDatabases:
+    """SQLite storage: each database is brought up to date by the daemon once per dataset version."""
+
+    def __init__(self):
+        self._versions: Dict[str, str] = {}  # sqlite_path -> fingerprint of the data ingested
+
+    def prepare(self, cfg: Dict) -> None:
+        path = cfg.get("sqlite_path", "cache/ads.sqlite")
+        fingerprint = source_fingerprint(cfg["data_csv"])
+        if self._versions.get(path) == fingerprint:
+            return
+        # imported here so CSV-storage daemons do not load the agent stack
+        from agents.data_agent import DataAgent
+
+        rows = DataAgent(cfg).warm_sqlite()
+        self._versions[path] = fingerprint
+        if rows:
+            log_agent("job_queue", f"Ingested {cfg['data_csv']} into {path} for reuse across jobs")
+
+
+def _dataset_sqlite_path(path: str, source) -> str:
+    key = hashlib.sha1(json.dumps(source, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(os.path.dirname(path), key, os.path.basename(path))
+
+
+def job_config(
+    config: Dict, job: Dict, datasets: Optional[WarmDatasets], databases: Optional[WarmDatabases] = None
+) -> Dict:
+    """
+    Per-job copy of the config: the job's dataset and its warm export (CSV storage) or
+    up-to-date database (SQLite storage; one per dataset).
+    """
+    cfg = dict(config)
+    if job.get("dataset") and job["dataset"] != config.get("data_csv"):
+        cfg["data_csv"] = job["dataset"]
+        cfg["sqlite_path"] = _dataset_sqlite_path(config.get("sqlite_path", "cache/ads.sqlite"), job["dataset"])
+    if datasets is not None:
+        cfg["shared_dataset"] = datasets.acquire(cfg["data_csv"])
+    if databases is not None:
+        databases.prepare(cfg)
+    return cfg
+
+
+def work(config: Dict, workers: int = None, drain: bool = False, name: str = None, poll_s: float = 1.0) -> Dict[str, int]:
+    """
+    Pull jobs by priority and run up to `workers` at a time until interrupted, or, with
+    `drain`, until the queue is empty. Returns how many jobs finished per status.
+    """
+    if workers is None:
+        workers = int(config.get("max_workers") or os.cpu_count() or 1)
+    workers = max(1, workers)
+    name = name or socket.gethostname()
+    output_root = os.path.join(config.get("output_dir", "reports"), "jobs")
+    warm = config.get("storage", "csv") == "csv" and not config.get("summary_partials") and not config.get("sampling")
+
+    store = JobStore(config.get("job_store", "cache/jobs.sqlite"))
+    recovered = store.requeue_running(name)
+    if recovered:
+        log_agent("job_queue", f"Requeued {recovered} jobs left running by an earlier '{name}' daemon")
+    log_agent("job_queue", f"Worker '{name}' started with {workers} processes")
+
+    datasets = WarmDatasets(config.get("shared_dataset_dir")) if warm else None
+    databases = WarmDatabases() if config.get("storage", "csv") == "sqlite" else None
+    finished = {"done": 0, "failed": 0}
+    running = {}  # future -> (job, shared dataset handle)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                while len(running) < workers:
+                    job = store.claim(name)
+                    if job is None:
+                        break
+                    try:
+                        cfg = job_config(config, job, datasets, databases)
+                    except Exception as e:  # e.g. the job's dataset does not exist
+                        store.finish(job["id"], "failed", error=f"{type(e).__name__}: {e}", elapsed_s=0.0)
+                        finished["failed"] += 1
+                        continue
+                    out_dir = os.path.join(output_root, str(job["id"]))
+                    running[pool.submit(_run_job, job, cfg, out_dir)] = (job, cfg.get("shared_dataset"))
+                    log_agent("job_queue", f"Job {job['id']} started (priority {job['priority']}): {job['query']}")
+
+                if not running:
+                    if drain:
+                        break
+                    time.sleep(poll_s)
+                    continue
+
+                done, _ = wait(running, timeout=poll_s, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    job, handle = running.pop(fut)
+                    try:
+                        outcome = fut.result()
+                    except Exception as e:  # worker process died (e.g. OOM-killed)
+                        outcome = {"status": "failed", "result": None, "error": f"{type(e).__name__}: {e}"}
+                    store.finish(job["id"], outcome["status"], outcome["result"], outcome["error"], outcome.get("elapsed_s"))
+                    finished[outcome["status"]] += 1
+                    if handle and datasets is not None:
+                        datasets.done(handle)
+                    log_agent("job_queue", f"Job {job['id']}: {outcome['status']} ({outcome.get('elapsed_s', 'n/a')}s)")
+    finally:
+        if datasets is not None:
+            datasets.close()
+        store.close()
+    return finished
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue analysis questions and run them on a worker pool.")
+    parser.add_argument("--config", default="config/config.yaml", help="Config file (job_store, max_workers, ...)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_submit = sub.add_parser("submit", help="Queue a question")
+    p_submit.add_argument("query", nargs="+")
+    p_submit.add_argument("--priority", type=int, default=0, help="Higher runs first (default 0)")
+    p_submit.add_argument("--data", default=None, help="data_csv source for this job (default: the configured one)")
+    p_submit.add_argument("--by", default=None, help="Submitting team or user")
+
+    p_list = sub.add_parser("list", help="Show recent jobs")
+    p_list.add_argument("--status", choices=STATUSES, default=None)
+    p_list.add_argument("--limit", type=int, default=50)
+
+    p_show = sub.add_parser("show", help="Show one job with its results and timings")
+    p_show.add_argument("job_id", type=int)
+
+    p_cancel = sub.add_parser("cancel", help="Cancel a queued job")
+    p_cancel.add_argument("job_id", type=int)
+
+    p_work = sub.add_parser("work", help="Run the worker daemon")
+    p_work.add_argument("--workers", type=int, default=None, help="Concurrent jobs (default: max_workers)")
+    p_work.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    p_work.add_argument("--name", default=None, help="Daemon name (default: host name); one per daemon")
+
+    args = parser.parse_args()
+    cfg = load_config(args.config)
+
+    if args.command == "work":
+        counts = work(cfg, workers=args.workers, drain=args.drain, name=args.name)
+        print(f"Worker stopped: {counts['done']} done, {counts['failed']} failed.")
+        sys.exit(0)
+
+    store = JobStore(cfg.get("job_store", "cache/jobs.sqlite"))
+    if args.command == "submit":
+        job_id = store.submit(" ".join(args.query), dataset=args.data, priority=args.priority, submitted_by=args.by)
+        print(f"Queued job {job_id}.")
+    elif args.command == "list":
+        for job in store.list(status=args.status, limit=args.limit):
+            print(f"{job['id']:>6}  {job['status']:<9}  p={job['priority']:<3}  {job['elapsed_s'] or '':>8}  {job['query']}")
+        print(", ".join(f"{s}: {n}" for s, n in sorted(store.counts().items())))
+    elif args.command == "show":
+        job = store.get(args.job_id)
+        if job is None:
+            print(f"Error: no job {args.job_id}")
+            sys.exit(1)
+        print(json.dumps(job, indent=2))
+    else:
+        if store.cancel(args.job_id):
+            print(f"Cancelled job {args.job_id}.")
+        else:
+            job = store.get(args.job_id)
+            print(f"Error: job {args.job_id} is {job['status'] if job else 'unknown'} and cannot be cancelled")
+            sys.exit(1)
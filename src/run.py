@@ -1,7 +1,10 @@
+import argparse
 import sys
 import os
 
+from utils.events import EventStream
 from utils.io import load_config, write_json
+from utils.lazy import LazyDict
 from utils.logger import log_agent
 
 # Import agents
@@ -11,71 +14,169 @@ from agents.insight_agent import InsightAgent
 from agents.evaluator import EvaluatorAgent
 from agents.creative_generator import CreativeGenerator
 
+# campaigns listed in the report's budget table (all of them are in insights.json)
+BUDGET_TABLE_ROWS = 15
 
-def run_pipeline(user_query: str) -> None:
+
+def run_pipeline(user_query: str, config: dict = None, output_dir: str = None, events: str = None) -> dict:
     """
     Executes the full multi-agent analysis pipeline.
+
+    `config` defaults to config/config.yaml; reports go to `output_dir`
+    (default: config["output_dir"] or "reports"). Returns the written report paths.
+    `events` ("-" for stdout or a file path; default: config["event_stream"]) streams
+    the plan, summary, hypotheses, evaluations and per-campaign creatives as JSON Lines
+    while the pipeline runs (utils.events).
     """
-    config = load_config()
-    log_agent("run", f"Starting pipeline for query: '{user_query}'")
+    if config is None:
+        config = load_config()
+    if output_dir is None:
+        output_dir = config.get("output_dir", "reports")
+    if events is None:
+        events = config.get("event_stream")
+    with EventStream(events) as stream:
+        return _run_pipeline(user_query, config, output_dir, stream)
 
-    # Initialize agents
-    planner = PlannerAgent(config)
-    data_agent = DataAgent(config)
-    insight_agent = InsightAgent(config)
-    evaluator = EvaluatorAgent(config)
-    creative_gen = CreativeGenerator(config)
 
-    # -------------------------
-    # Step 1: Planner decides workflow
-    # -------------------------
-    plan_out = planner.run({"query": user_query})
+def build_agents(config: dict) -> dict:
+    """One instance of every pipeline agent, keyed by the planner's agent names."""
+    return {
+        "data_agent": DataAgent(config),
+        "insight_agent": InsightAgent(config),
+        "evaluator": EvaluatorAgent(config),
+        "creative_generator": CreativeGenerator(config),
+    }
+
+
+def run_task(agent_name: str, params: dict, agents: dict, context: dict, stream: EventStream):
+    """
+    Run one planned task, reading its inputs from and storing its outputs in `context`.
+    Returns the agent's output, or None for an unknown agent.
+    """
+    if agent_name == "data_agent":
+        out = agents["data_agent"].run(params)
+        context["filters"] = params.get("filters") or {}
+        context["summary"] = out.get("payload", {})
+        context["artifacts"] = out.get("artifacts") or {}
+
+    elif agent_name == "insight_agent":
+        out = agents["insight_agent"].run({"summary": context.get("summary", {})})
+        # streamed once the insight agent has read its sections: a lazy summary streams only those
+        stream.emit("summary", context.get("summary", {}))
+        context["hypotheses"] = out.get("payload", {}).get("hypotheses", [])
+        for hyp in context["hypotheses"]:
+            stream.emit("hypothesis", hyp)
+
+    elif agent_name == "evaluator":
+        out = agents["evaluator"].run(
+            {
+                "hypotheses": context.get("hypotheses", []),
+                "summary": context.get("summary", {}),
+            }
+        )
+        context["evaluations"] = out.get("payload", {}).get("evaluations", [])
+        for ev in context["evaluations"]:
+            stream.emit("evaluation", ev)
+
+    elif agent_name == "creative_generator":
+        out = agents["creative_generator"].run({
+            **params,
+            "summary": context.get("summary", {}),
+            "leaderboard": context.get("artifacts", {}).get("creative_leaderboard"),
+            "on_campaign": lambda item: stream.emit("creatives", item),
+        })
+        context["creatives"] = out.get("payload", {}).get("creatives", [])
+
+    else:
+        log_agent("run", f"Unknown agent: {agent_name}")
+        return None
+
+    if out.get("status") == "error":
+        stream.emit("error", {"agent": agent_name, "error": out.get("error")})
+    return out
+
+
+def plan_tasks(user_query: str, config: dict, stream: EventStream) -> list:
+    """Planner step: the tasks in execution order (raises RuntimeError when there are none)."""
+    plan_out = PlannerAgent(config).run({"query": user_query})
     tasks = plan_out.get("tasks", [])
 
     if plan_out.get("status") != "ok" or not tasks:
         log_agent("run", "Planner could not generate tasks.")
-        sys.exit(1)
+        stream.emit("error", {"agent": "planner", "error": plan_out.get("error") or "no tasks"})
+        raise RuntimeError("Planner could not generate tasks.")
+
+    stream.emit("plan", {"query": user_query, "tasks": tasks})
+    return sorted(tasks, key=lambda x: x["priority"])
+
+
+def _run_pipeline(user_query: str, config: dict, output_dir: str, stream: EventStream) -> dict:
+    log_agent("run", f"Starting pipeline for query: '{user_query}'")
+
+    # -------------------------
+    # Step 1: Planner decides workflow
+    # -------------------------
+    tasks = plan_tasks(user_query, config, stream)
+    agents = build_agents(config)
 
     # Data storage for agent outputs
     context = {}
+    agent_errors = {}
 
     # -------------------------
     # Step 2: Execute tasks in order
     # -------------------------
-    for task in sorted(tasks, key=lambda x: x["priority"]):
+    for task in tasks:
         agent_name = task["agent"]
-        params = task.get("params", {})
-
         log_agent("run", f"Executing task: {task['task_id']} with agent {agent_name}")
+        out = run_task(agent_name, task.get("params", {}), agents, context, stream)
+        if out is not None and out.get("status") == "error":
+            agent_errors[agent_name] = out.get("error")
 
-        if agent_name == "data_agent":
-            out = data_agent.run(params)
-            context["summary"] = out.get("payload", {})
+    reports = write_reports(user_query, context, config, output_dir)
+    reports["agent_errors"] = agent_errors
 
-        elif agent_name == "insight_agent":
-            out = insight_agent.run({"summary": context.get("summary", {})})
-            context["hypotheses"] = out.get("payload", {}).get("hypotheses", [])
+    log_agent("run", "Pipeline completed successfully.")
+    # keep stdout pure JSON Lines when the event stream goes there
+    print(f"Analysis complete. Reports generated in {output_dir}/.", file=sys.stderr if stream.to_stdout else sys.stdout)
+    stream.emit("done", reports)
+    return reports
 
-        elif agent_name == "evaluator":
-            out = evaluator.run(
-                {
-                    "hypotheses": context.get("hypotheses", []),
-                    "summary": context.get("summary", {}),
-                }
-            )
-            context["evaluations"] = out.get("payload", {}).get("evaluations", [])
 
-        elif agent_name == "creative_generator":
-            out = creative_gen.run({"summary": context.get("summary", {})})
-            context["creatives"] = out.get("payload", {}).get("creatives", [])
+def _report_summary(summary, config: dict) -> tuple:
+    """
+    The summary written to insights.json and the sections left out of it: per
+    `report_summary`, every section ("all", the default) or only those the agents read
+    ("read": the rest would be computed just for the file).
+    """
+    mode = config.get("report_summary", "all")
+    if mode not in ("read", "all"):
+        raise ValueError(f"Unknown report_summary: {mode}")
+    if not isinstance(summary, LazyDict):
+        return summary, []
+    if mode == "all":
+        return summary.to_dict(), []
+    computed = summary.computed()
+    return computed, [k for k in summary if k not in computed]
 
-        else:
-            log_agent("run", f"Unknown agent: {agent_name}")
 
+def write_reports(user_query: str, context: dict, config: dict, output_dir: str) -> dict:
+    """Write insights.json, creatives.json, report.md (and quarantine.csv) from `context`; returns their paths."""
     # -------------------------
     # Step 3: Save reports (Hardened merge)
     # -------------------------
-    os.makedirs("reports", exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+    insights_path = os.path.join(output_dir, "insights.json")
+    creatives_path = os.path.join(output_dir, "creatives.json")
+    report_path = os.path.join(output_dir, "report.md")
+    quarantine_path = None
+    quarantine = context.get("artifacts", {}).get("quarantine")
+    if quarantine is not None and len(quarantine):
+        quarantine_path = os.path.join(output_dir, "quarantine.csv")
+        quarantine.to_csv(quarantine_path, index=False)
+
+    # read before insights.json is written so the section is included there too
+    budget = context.get("summary", {}).get("budget_plan")
 
     validated_insights = []
 
@@ -130,19 +231,20 @@ def run_pipeline(user_query: str) -> None:
             )
 
     # Write cleaned insights (include raw for debugging)
-    write_json(
-        "reports/insights.json",
-        {
-            "query": user_query,
-            "summary": context.get("summary", {}),
-            "validated_insights": validated_insights,
-            "all_raw_hypotheses": hypotheses,
-            "all_raw_evaluations": evaluations,
-        },
-    )
+    report_summary, skipped = _report_summary(context.get("summary", {}), config)
+    insights = {
+        "query": user_query,
+        "summary": report_summary,
+        "validated_insights": validated_insights,
+        "all_raw_hypotheses": hypotheses,
+        "all_raw_evaluations": evaluations,
+    }
+    if skipped:
+        insights["summary_sections_skipped"] = skipped
+    write_json(insights_path, insights)
 
     write_json(
-        "reports/creatives.json",
+        creatives_path,
         {
             "query": user_query,
             "creatives": context.get("creatives", []),
@@ -150,9 +252,29 @@ def run_pipeline(user_query: str) -> None:
     )
 
     # Human-readable markdown report (validated only)
-    with open("reports/report.md", "w", encoding="utf-8") as f:
+    with open(report_path, "w", encoding="utf-8") as f:
         f.write("# Facebook Ads Analysis\n\n")
         f.write(f"### Query: {user_query}\n\n")
+        if "filters" in context:
+            applied = ", ".join(f"{k}={v}" for k, v in context["filters"].items()) or "none (all rows)"
+            f.write(f"*Filters applied:* {applied}\n\n")
+        if skipped:
+            f.write(f"*Summary sections not computed (report_summary: read):* {', '.join(skipped)}\n\n")
+        sampling = context.get("summary", {}).get("sampling")
+        if sampling:
+            f.write(
+                f"*Approximate:* computed on a stratified sample of {sampling['rows_sampled']:,} of "
+                f"{sampling['rows_total']:,} rows; {sampling['confidence']:.0%} intervals are in insights.json\n\n"
+            )
+        quality = context.get("summary", {}).get("data_quality")
+        if quality:
+            action = "excluded from the analysis" if quality["excluded_from_summary"] else "kept in the analysis"
+            reasons = ", ".join(f"{code} {n}" for code, n in quality["reasons"].items())
+            f.write(
+                f"*Data quality:* {quality['rows_flagged']} of {quality['rows_checked']} rows flagged, {action}"
+                + (f" ({reasons}); see quarantine.csv" if quality["rows_flagged"] else "")
+                + "\n\n"
+            )
         f.write("## Key Insights (Validated)\n\n")
         if not validated_insights:
             f.write("No high-confidence insights found.\n\n")
@@ -168,17 +290,61 @@ def run_pipeline(user_query: str) -> None:
             f.write(f"- **{statement}**\n")
             f.write(f"  - *Reasoning:* {reasoning}\n")
             f.write(
-                f"  - *Confidence:* {conf} (Validated by Evaluator)\n\n"
+                f"  - *Confidence:* {conf} (Validated by Evaluator)\n"
             )
+            if (ev.get("sampling") or {}).get("fragile"):
+                f.write(
+                    f"  - *Approximate:* computed on a sample; the verdict flips in "
+                    f"{ev['sampling']['flip_rate']:.0%} of replicates and may change under the exact computation\n"
+                )
+            f.write("\n")
+        if budget and budget.get("campaigns"):
+            _write_budget_table(f, budget)
 
-    log_agent("run", "Pipeline completed successfully.")
-    print("Analysis complete. Reports generated in /reports.")
+    reports = {
+        "insights": insights_path,
+        "creatives": creatives_path,
+        "report": report_path,
+    }
+    if quarantine_path:
+        reports["quarantine"] = quarantine_path
+    return reports
+
+
+def _write_budget_table(f, budget: dict) -> None:
+    expected = budget["expected_daily_revenue"]
+    f.write("## Recommended Daily Budget\n\n")
+    f.write(
+        f"Reallocating {budget['daily_budget']:,.2f}/day (current spend {budget['current_daily_spend']:,.2f}/day, "
+        f"last {budget['window_days']} days) over fitted response curves: expected revenue "
+        f"{expected['current']:,.2f} -> {expected['recommended']:,.2f}/day"
+        + (f" ({expected['change_pct']:+.1%})" if expected["change_pct"] is not None else "")
+        + ". Largest changes first.\n\n"
+    )
+    f.write("| Campaign | Current | Recommended | Change | Elasticity | Marginal ROAS |\n")
+    f.write("|---|---:|---:|---:|---:|---:|\n")
+    for row in budget["campaigns"][:BUDGET_TABLE_ROWS]:
+        change = f"{row['change_pct']:+.0%}" if row["change_pct"] is not None else "new"
+        elasticity = f"{row['elasticity']:.2f}" + ("" if row["fitted"] else "*")
+        marginal = f"{row['marginal_roas']:.2f}" if row["marginal_roas"] is not None else "-"
+        f.write(
+            f"| {row['campaign_canon']} | {row['current_spend']:,.2f} | {row['recommended_spend']:,.2f} "
+            f"| {change} | {elasticity} | {marginal} |\n"
+        )
+    if len(budget["campaigns"]) > BUDGET_TABLE_ROWS:
+        f.write(f"\n{len(budget['campaigns']) - BUDGET_TABLE_ROWS} more campaigns in insights.json (`summary.budget_plan`).\n")
+    if not all(row["fitted"] for row in budget["campaigns"][:BUDGET_TABLE_ROWS]):
+        f.write("\n\\* too few days to fit a curve; default elasticity.\n")
+    f.write("\n")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python src/run.py \"<analysis query>\"")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline for one query.")
+    parser.add_argument("query", nargs="+", help="Analysis query")
+    parser.add_argument("--events", default=None, help='Stream JSON Lines events to a file, or "-" for stdout')
+    args = parser.parse_args()
 
-    query = " ".join(sys.argv[1:])
-    run_pipeline(query)
+    try:
+        run_pipeline(" ".join(args.query), events=args.events)
+    except RuntimeError:
+        sys.exit(1)
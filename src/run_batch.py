@@ -0,0 +1,198 @@
+"""
+Multi-account fan-out runner.
+
+Runs the analysis pipeline once per ad account in a process pool with bounded
+concurrency. Each account gets its own report folder; a roll-up `index.json`
+records status and timings. A failing account is recorded and never stops the batch.
+
+Usage:
+    python src/run_batch.py <accounts_dir | manifest.(yaml|json)> "<analysis query>" [--workers N] [--out DIR]
+
+--workers defaults to `max_workers` from the config, falling back to the CPU count.
+
+Accounts directory: every `*.csv`, `*.csv.gz` or `*.csv.zst` file is one account, and every
+sub-folder is one account whose shards (e.g. daily `.csv.gz` exports) are all read together.
+
+Manifest formats:
+    - mapping  {account_id: path/to/account.csv, ...}   (a value may also be a glob of shards)
+    - list     [path/to/a.csv, path/to/b.csv]   (account id = file name without extension)
+Relative paths in a manifest are resolved against the manifest's folder.
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import yaml
+
+from utils.io import expand_paths, load_config, write_json
+from utils.logger import log_agent
+
+
+ACCOUNT_SUFFIXES = (".csv.gz", ".csv.zst", ".csv")
+# config keys of files a run writes to (with their defaults), kept per account
+STATEFUL_PATHS = {"alias_store": None, "sqlite_path": "cache/ads.sqlite"}
+
+
+def _account_id(path: str) -> str:
+    name = os.path.basename(path)
+    for ext in ACCOUNT_SUFFIXES:
+        if name.endswith(ext):
+            return name[: -len(ext)]
+    return os.path.splitext(name)[0]
+
+
+def discover_accounts(source: str) -> List[Tuple[str, str]]:
+    """
+    Resolve a directory of account CSVs or a manifest file into [(account_id, csv_path)].
+    """
+    if os.path.isdir(source):
+        accounts = []
+        for entry in sorted(os.listdir(source)):
+            path = os.path.join(source, entry)
+            if os.path.isdir(path):
+                accounts.append((entry, os.path.join(path, "*.csv*")))
+            elif entry.endswith(ACCOUNT_SUFFIXES):
+                accounts.append((_account_id(path), path))
+        return accounts
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Accounts source not found: {source}")
+
+    with open(source, "r", encoding="utf-8") as f:
+        if source.endswith(".json"):
+            manifest = json.load(f)
+        else:
+            manifest = yaml.safe_load(f)
+
+    base = os.path.dirname(os.path.abspath(source))
+
+    def _resolve(p: str) -> str:
+        return p if os.path.isabs(p) else os.path.join(base, p)
+
+    if isinstance(manifest, dict):
+        return [(str(acc), _resolve(str(p))) for acc, p in manifest.items()]
+    if isinstance(manifest, list):
+        return [(_account_id(str(p)), _resolve(str(p))) for p in manifest]
+    raise ValueError(f"Unsupported manifest format in {source}")
+
+
+def account_config(config: Dict, account: str, csv_path: str) -> Dict:
+    """
+    Per-account copy of the config: points data_csv at the account file and keeps
+    stateful files (alias store, SQLite cache) in per-account locations so workers never
+    share them.
+    """
+    cfg = copy.deepcopy(config)
+    cfg["data_csv"] = csv_path
+    for key, default in STATEFUL_PATHS.items():
+        path = cfg.get(key, default)
+        if path:
+            cfg[key] = os.path.join(os.path.dirname(path), account, os.path.basename(path))
+    return cfg
+
+
+def _run_account(account: str, csv_path: str, query: str, config: Dict, output_dir: str) -> Dict:
+    """
+    Worker entry point. Never raises: failures are returned as status=error.
+    """
+    # imported here so the parent process does not need the agent stack loaded
+    from run import run_pipeline
+
+    started = time.perf_counter()
+    result = {
+        "account": account,
+        "data_csv": csv_path,
+        "output_dir": output_dir,
+        "status": "ok",
+        "error": None,
+    }
+    try:
+        expand_paths(csv_path)  # FileNotFoundError for a missing file or an empty shard folder
+        reports = run_pipeline(query, config=config, output_dir=output_dir)
+        result["reports"] = reports
+        if reports.get("agent_errors"):
+            result["status"] = "error"
+            result["error"] = "; ".join(f"{a}: {e}" for a, e in reports["agent_errors"].items())
+    except Exception as e:  # one bad account must never take the worker down (Ctrl-C still stops the batch)
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(source: str, query: str, config: Dict = None, workers: int = None, output_dir: str = None) -> Dict:
+    """
+    Fan the pipeline out over every account in `source` and write `<output_dir>/index.json`.
+    `workers` defaults to the config's `max_workers`, or the CPU count when that is unset.
+    """
+    if config is None:
+        config = load_config()
+    if output_dir is None:
+        output_dir = os.path.join(config.get("output_dir", "reports"), "accounts")
+    if workers is None:
+        workers = int(config.get("max_workers") or os.cpu_count() or 1)
+    workers = max(1, workers)
+
+    accounts = discover_accounts(source)
+    log_agent("run_batch", f"Running {len(accounts)} accounts with {workers} workers")
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    t0 = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _run_account,
+                account,
+                csv_path,
+                query,
+                account_config(config, account, csv_path),
+                os.path.join(output_dir, account),
+            ): account
+            for account, csv_path in accounts
+        }
+        for fut in as_completed(futures):
+            account = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as e:  # worker process died (e.g. OOM-killed)
+                res = {"account": account, "status": "error", "error": f"{type(e).__name__}: {e}"}
+            log_agent("run_batch", f"{account}: {res['status']} ({res.get('elapsed_s', 'n/a')}s)")
+            results.append(res)
+
+    results.sort(key=lambda r: r["account"])
+    index = {
+        "query": query,
+        "started_at": started_at,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "workers": workers,
+        "output_dir": output_dir,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "accounts": results,
+    }
+    write_json(os.path.join(output_dir, "index.json"), index)
+    log_agent("run_batch", f"Batch finished: {index['succeeded']} ok, {index['failed']} failed")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline for many ad accounts in parallel.")
+    parser.add_argument("source", help="Directory of account CSVs or a YAML/JSON manifest")
+    parser.add_argument("query", nargs="+", help="Analysis query")
+    parser.add_argument("--workers", type=int, default=None, help="Max concurrent accounts (default: config max_workers, else CPU count)")
+    parser.add_argument("--out", default=None, help="Output folder (default: <output_dir>/accounts)")
+    args = parser.parse_args()
+
+    index = run_batch(args.source, " ".join(args.query), workers=args.workers, output_dir=args.out)
+    print(f"Batch complete: {index['succeeded']}/{index['total']} accounts ok. Index at {index['output_dir']}/index.json")
+    sys.exit(0 if index["failed"] == 0 else 1)
@@ -0,0 +1,108 @@
+"""
+Map-reduce CLI for DataAgent summaries.
+
+    # map: on each machine, reduce a shard (date range, account, file chunk) to a small partial
+    python src/shards.py summarize data/2025-01.csv -o parts/2025-01.json
+
+    # same, split over 4 local processes that attach to one shared export of the CSV
+    python src/shards.py summarize data/2025-01.csv -o parts/2025-01.json --workers 4
+
+    # reduce: combine partials into the summary payload InsightAgent / EvaluatorAgent consume
+    python src/shards.py merge parts/*.json -o reports/summary.json
+
+    # tree reduce: merge partials into another partial
+    python src/shards.py merge parts/a*.json --partial -o parts/a.json
+
+To run the full pipeline on merged shards, set `summary_partials` in config/config.yaml
+(a path, glob or list) instead of `data_csv`.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from agents.data_agent import DataAgent
+from utils.io import expand_paths, load_config, load_csv, write_json
+from utils.logger import log_agent
+from utils.shared_dataset import attach, dataset_rows, export_frame, release
+from utils.summary_shards import merge_partials, read_partial, write_partial
+
+
+def summarize(csv_path: str, out_path: str, config: dict, workers: int = 1) -> None:
+    if workers > 1:
+        partial = summarize_parallel(csv_path, config, workers)
+    else:
+        partial = DataAgent(config).build_partial(load_csv(csv_path))
+    write_partial(out_path, partial)
+    log_agent("shards", f"Summarized {partial['rows']} rows from {csv_path} -> {out_path}")
+
+
+def _partition_partial(handle: str, start: int, stop: int, config: dict) -> dict:
+    """Worker: partial of rows start:stop, attached from the shared export (no CSV parse, no pickled frame)."""
+    return DataAgent(config).build_partial(attach(handle, start=start, stop=stop))
+
+
+def summarize_parallel(csv_path: str, config: dict, workers: int) -> dict:
+    """
+    Parse the CSV once, export it to a shared dataset (utils.shared_dataset) and reduce
+    `workers` contiguous row partitions in a process pool. Partials are additive, so the
+    merge equals the single-process partial (except for duplicate keys split across two
+    partitions, which utils.quality cannot see).
+    """
+    handle = export_frame(load_csv(csv_path), root=config.get("shared_dataset_dir"))
+    try:
+        bounds = np.linspace(0, dataset_rows(handle), workers + 1).astype(int)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(
+                _partition_partial,
+                [handle] * workers, bounds[:-1].tolist(), bounds[1:].tolist(), [config] * workers,
+            ))
+    finally:
+        release(handle)
+    return merge_partials(parts)
+
+
+def merge(paths, out_path: str, config: dict, as_partial: bool = False) -> None:
+    paths = expand_paths(paths, manifests=False)
+    merged = merge_partials([read_partial(p) for p in paths])
+    if as_partial:
+        write_partial(out_path, merged)
+    else:
+        write_json(out_path, DataAgent(config).finalize(merged).to_dict())
+        quarantine = merged.get("quarantine")
+        if quarantine is not None and len(quarantine):
+            quarantine_path = os.path.splitext(out_path)[0] + ".quarantine.csv"
+            quarantine.to_csv(quarantine_path, index=False)
+            log_agent("shards", f"Wrote {len(quarantine)} quarantined rows -> {quarantine_path}")
+    log_agent("shards", f"Merged {len(paths)} partials ({merged['rows']} rows) -> {out_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize data shards and merge the partials.")
+    parser.add_argument("--config", default="config/config.yaml", help="Config file (similarity_threshold, alias_store)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sum = sub.add_parser("summarize", help="Reduce one CSV shard to a partial file")
+    p_sum.add_argument("csv")
+    p_sum.add_argument("-o", "--out", required=True)
+    p_sum.add_argument("--workers", type=int, default=1, help="Local processes sharing one export of the CSV")
+
+    p_merge = sub.add_parser("merge", help="Merge partial files into the final summary payload")
+    p_merge.add_argument("partials", nargs="+")
+    p_merge.add_argument("-o", "--out", required=True)
+    p_merge.add_argument("--partial", action="store_true", help="Write a merged partial instead of the payload")
+
+    args = parser.parse_args()
+    cfg = load_config(args.config)
+
+    try:
+        if args.command == "summarize":
+            summarize(args.csv, args.out, cfg, workers=args.workers)
+        else:
+            merge(args.partials, args.out, cfg, as_partial=args.partial)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,161 @@
+# src/utils/deltas.py
+"""
+Period-over-period delta engine.
+
+Works on (segment, date) accumulators kept in every summary partial (one frame per
+dimension, see utils.summary_shards), so comparing two windows never rescans rows: both
+windows are aggregated in a single groupby over the cached frame, and only the top-k
+segments by |contribution| are selected (np.argpartition, O(n)) and sorted.
+
+Additive metrics (spend, revenue): a segment's contribution is its own delta.
+Ratio metrics (roas = revenue / spend, ctr = clicks / impressions) use a midpoint
+shift-share decomposition of the account ratio R = sum_i w_i r_i, with weight
+w_i = denominator share and rate r_i = segment ratio:
+
+    mix_i  = (w1_i - w0_i) * ((r0_i + r1_i) / 2 - (R0 + R1) / 2)   traffic moved between segments
+    rate_i = (w0_i + w1_i) / 2 * (r1_i - r0_i)                     the segment got better / worse
+
+Because the weights sum to 1 in both windows, centring the mix term on the account rate
+leaves the total unchanged (sum of contributions = R1 - R0 exactly) but makes moving
+spend between segments of the same rate a zero effect. A segment absent from one
+window takes its other-window rate (pure mix effect).
+Ratios here are ratios of sums, so they can differ slightly from the row-mean CTR/ROAS
+reported elsewhere in the summary.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.io import window_start
+
+# ratio metric -> (numerator, denominator)
+RATIO_METRICS = {"roas": ("revenue", "spend"), "ctr": ("clicks", "impressions")}
+DELTA_COLUMNS = ["spend", "revenue", "clicks", "impressions"]
+
+
+def default_windows(max_date: str, days: int) -> Tuple[Tuple[str, str], Tuple[str, str]]:
+    """(baseline, current): the last `days` days up to max_date and the `days` before them."""
+    current_from = window_start(max_date, days)
+    baseline_to = window_start(current_from, 2)
+    baseline_from = window_start(baseline_to, days)
+    return (baseline_from, baseline_to), (current_from, max_date)
+
+
+def _two_windows(acc: pd.DataFrame, baseline: Tuple[str, str], current: Tuple[str, str]) -> pd.DataFrame:
+    """One groupby: (segment, period) sums for both windows, as (segments x [col_0, col_1])."""
+    dates = acc.index.get_level_values(1).astype(str)
+    period = np.full(len(acc), -1)
+    period[(dates >= baseline[0]) & (dates <= baseline[1])] = 0
+    period[(dates >= current[0]) & (dates <= current[1])] = 1
+    keep = period >= 0
+    if not keep.any():
+        return pd.DataFrame()
+    sub = acc.loc[keep, DELTA_COLUMNS].astype(float)
+    grouped = sub.groupby([sub.index.get_level_values(0), period[keep]]).sum()
+    wide = grouped.unstack(fill_value=0.0)
+    for col in DELTA_COLUMNS:
+        for p in (0, 1):
+            if (col, p) not in wide.columns:
+                wide[(col, p)] = 0.0
+    return wide
+
+
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest |values|, ordered by |value| desc; O(n + k log k)."""
+    mag = np.abs(np.nan_to_num(values))
+    if len(mag) > k:
+        idx = np.argpartition(-mag, k - 1)[:k]
+    else:
+        idx = np.arange(len(mag))
+    return idx[np.argsort(-mag[idx], kind="mergesort")]
+
+
+def _ratio(num, den):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0), np.nan)
+
+
+def segment_deltas(wide: pd.DataFrame, metric: str, k: int = 5) -> Dict:
+    """Account-level change of `metric` plus the top-k contributing segments."""
+    segments = wide.index.to_numpy()
+    if metric in RATIO_METRICS:
+        num, den = RATIO_METRICS[metric]
+        n0, n1 = wide[(num, 0)].to_numpy(float), wide[(num, 1)].to_numpy(float)
+        d0, d1 = wide[(den, 0)].to_numpy(float), wide[(den, 1)].to_numpy(float)
+        total0 = float(_ratio(n0.sum(), d0.sum()))
+        total1 = float(_ratio(n1.sum(), d1.sum()))
+        w0 = d0 / d0.sum() if d0.sum() > 0 else np.zeros_like(d0)
+        w1 = d1 / d1.sum() if d1.sum() > 0 else np.zeros_like(d1)
+        r0, r1 = _ratio(n0, d0), _ratio(n1, d1)
+        r0, r1 = np.where(np.isnan(r0), r1, r0), np.where(np.isnan(r1), r0, r1)
+        r0, r1 = np.nan_to_num(r0), np.nan_to_num(r1)
+        mix = (w1 - w0) * ((r0 + r1) / 2 - (total0 + total1) / 2)
+        rate = (w0 + w1) / 2 * (r1 - r0)
+        contribution = mix + rate
+        base, cur = r0, r1
+    else:
+        base, cur = wide[(metric, 0)].to_numpy(float), wide[(metric, 1)].to_numpy(float)
+        total0, total1 = float(base.sum()), float(cur.sum())
+        contribution = cur - base
+        mix = rate = None
+
+    delta = total1 - total0
+    idx = _top_k(contribution, k)
+    top = []
+    for i in idx:
+        entry = {
+            "segment": segments[i],
+            "baseline": float(base[i]),
+            "current": float(cur[i]),
+            "contribution": float(contribution[i]),
+            "share_of_delta": float(contribution[i] / delta) if delta else None,
+        }
+        if mix is not None:
+            entry["mix_effect"] = float(mix[i])
+            entry["rate_effect"] = float(rate[i])
+        top.append(entry)
+    return {
+        "baseline": total0,
+        "current": total1,
+        "delta": delta,
+        "pct_change": delta / total0 if total0 else None,
+        "top": top,
+    }
+
+
+def compare_windows(
+    by_dimension_date: Dict[str, pd.DataFrame],
+    baseline: Tuple[str, str],
+    current: Tuple[str, str],
+    fuzzy_map: Optional[Dict[str, str]] = None,
+    metrics=("spend", "revenue", "ctr", "roas"),
+    k: int = 5,
+) -> Dict:
+    """
+    Contribution-ranked deltas of every metric along every dimension.
+    `by_dimension_date` maps dimension -> (segment, date)-indexed accumulators; the
+    "campaign" dimension is keyed by normalized name and rolled up with `fuzzy_map`.
+    """
+    result = {
+        "baseline": {"from": baseline[0], "to": baseline[1]},
+        "current": {"from": current[0], "to": current[1]},
+        "dimensions": {},
+    }
+    for dim, acc in by_dimension_date.items():
+        if acc is None or not len(acc):
+            continue
+        if dim == "campaign" and fuzzy_map:
+            keys = acc.index.get_level_values(0).map(lambda x: fuzzy_map.get(x, x))
+            acc = acc.set_axis(pd.MultiIndex.from_arrays([keys, acc.index.get_level_values(1)]), axis=0)
+        wide = _two_windows(acc, baseline, current)
+        if wide.empty:
+            continue
+        result["dimensions"][dim] = {m: segment_deltas(wide, m, k) for m in metrics}
+    # account totals are the same along any dimension; report them once
+    first = next(iter(result["dimensions"].values()), None)
+    result["totals"] = {
+        m: {key: first[m][key] for key in ("baseline", "current", "delta", "pct_change")} for m in metrics
+    } if first else {}
+    return result
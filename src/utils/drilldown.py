@@ -0,0 +1,141 @@
+# src/utils/drilldown.py
+"""
+Lazy campaign -> adset -> creative drill-down over loaded rows.
+
+Nothing is aggregated up front. On first use the rows are factorized per level and sorted
+once by (canonical campaign, adset, creative message), so every node of the hierarchy is a
+contiguous slice of the sorted rows. Locating a node is a binary search per level, and
+expanding it reduces only its own slice (`np.add.reduceat` at the child boundaries), never
+the whole frame. Expanded nodes are kept in a bounded LRU cache.
+
+Paths name one node per level, e.g. ("Women Seamless Everyday", "Adset-2 Broad"). The
+campaign may be given raw: it is normalized and mapped through the canonical campaign map
+like everywhere else.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+LEVELS = ("campaign", "adset", "creative")
+LEVEL_COLUMNS = {"campaign": "campaign_name", "adset": "adset_name", "creative": "creative_message"}
+METRICS = ["spend", "revenue", "clicks", "impressions", "purchases"]
+MISSING_LABEL = "(none)"
+
+
+class DrillDown:
+    """Child aggregates of any node on demand; see the module docstring."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        normalize: Callable[[str], str],
+        fuzzy_map: Dict[str, str] = None,
+        cache_size: int = 256,
+    ):
+        self._df = df
+        self._normalize = normalize
+        self._fuzzy_map = fuzzy_map or {}
+        self.cache_size = max(1, int(cache_size))
+        self._cache: "OrderedDict[Tuple[int, ...], pd.DataFrame]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._keys = None  # sorted level codes, one column per available level
+
+    # ------------------ index ------------------
+    def _build(self) -> None:
+        df = self._df
+        names = df["campaign_name"].fillna("").astype(str)
+        name_codes, unique_names = pd.factorize(names)
+        canon = np.array([self._fuzzy_map.get(n, n) for n in map(self._normalize, unique_names)], dtype=object)
+        canon_codes, canon_labels = pd.factorize(canon[name_codes])
+
+        codes, self._labels = [canon_codes], [np.asarray(canon_labels, dtype=object)]
+        for level in LEVELS[1:]:
+            column = LEVEL_COLUMNS[level]
+            if column not in df.columns:
+                break
+            level_codes, labels = pd.factorize(df[column], use_na_sentinel=True)
+            # missing values sort last as their own child
+            codes.append(np.where(level_codes < 0, len(labels), level_codes))
+            self._labels.append(np.append(np.asarray(labels, dtype=object).astype(str), MISSING_LABEL))
+
+        self._order = np.lexsort(codes[::-1])
+        self._keys = np.column_stack(codes)[self._order]
+        self._lookup = [{label: i for i, label in enumerate(labels)} for labels in self._labels]
+        self._metrics = {
+            m: np.nan_to_num(df[m].to_numpy(dtype=float, na_value=np.nan)[self._order])
+            for m in METRICS if m in df.columns
+        }
+        self._df = None  # the sorted arrays are all that is needed from here on
+
+    @property
+    def levels(self) -> Tuple[str, ...]:
+        """Levels available for the loaded columns."""
+        if self._keys is None:
+            self._build()
+        return LEVELS[: self._keys.shape[1]]
+
+    def _locate(self, path: Tuple[str, ...]) -> Tuple[Tuple[int, ...], int, int]:
+        """(codes, start, stop) of the node at `path` in the sorted rows."""
+        start, stop, codes = 0, len(self._keys), []
+        for depth, label in enumerate(path):
+            lookup = self._lookup[depth]
+            code = lookup.get(label)
+            if code is None and depth == 0:
+                norm = self._normalize(label)
+                code = lookup.get(self._fuzzy_map.get(norm, norm))
+            column = self._keys[start:stop, depth]
+            lo, hi = np.searchsorted(column, [code, code + 1]) if code is not None else (0, 0)
+            if lo == hi:
+                raise KeyError(f"No {LEVELS[depth]} named {label!r} under {list(path[:depth]) or 'the account'}")
+            start, stop = start + int(lo), start + int(hi)
+            codes.append(code)
+        return tuple(codes), start, stop
+
+    # ------------------ queries ------------------
+    def expand(self, *path: str) -> pd.DataFrame:
+        """
+        Aggregates of the children of the node at `path` (no path = the campaigns), one row
+        per child with rows, metric sums, ctr, roas and share of the parent's spend,
+        largest spend first.
+        """
+        if len(path) >= len(self.levels):
+            raise ValueError(f"Cannot expand below {self.levels[-1]} (path {list(path)})")
+        codes, start, stop = self._locate(tuple(path))
+        cached = self._cache.get(codes)
+        if cached is not None:
+            self._cache.move_to_end(codes)
+            self.hits += 1
+            return cached.copy()
+        self.misses += 1
+
+        depth = len(path)
+        child = self._keys[start:stop, depth]
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(child)) + 1]) if len(child) else np.empty(0, dtype=int)
+        table = pd.DataFrame(
+            {"rows": np.diff(np.append(bounds, len(child)))},
+            index=pd.Index(self._labels[depth][child[bounds]], name=LEVELS[depth]),
+        )
+        for m, values in self._metrics.items():
+            table[m] = np.add.reduceat(values[start:stop], bounds) if len(bounds) else []
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if "clicks" in table and "impressions" in table:
+                table["ctr"] = table["clicks"] / table["impressions"].where(table["impressions"] > 0)
+            if "revenue" in table and "spend" in table:
+                table["roas"] = table["revenue"] / table["spend"].where(table["spend"] > 0)
+            if "spend" in table:
+                total = table["spend"].sum()
+                table["spend_share"] = table["spend"] / total if total else np.nan
+        if "spend" in table:
+            table = table.sort_values("spend", ascending=False, kind="mergesort")
+
+        self._cache[codes] = table
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return table.copy()
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.cache_size}
@@ -0,0 +1,81 @@
+# src/utils/events.py
+"""
+JSON Lines event stream for progressive pipeline output.
+
+Every event is one line, flushed as soon as it is written:
+
+    {"seq": 3, "event": "hypothesis", "elapsed_s": 0.412, "data": {...}}
+
+`seq` increases by one per event and `elapsed_s` counts from when the stream was opened,
+so a consumer can show results while later agents are still running. The target is "-"
+(stdout), a file path (truncated on open), or None for a disabled stream that drops every event.
+"""
+
+import json
+import os
+import sys
+import time
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from utils.lazy import LazyDict
+
+
+class EventStream:
+    """Append-only JSONL writer; a no-op when `target` is None."""
+
+    def __init__(self, target: Optional[str] = None):
+        self.target = target
+        self._seq = 0
+        self._t0 = time.perf_counter()
+        if target is None:
+            self._fh = None
+        elif target == "-":
+            self._fh = sys.stdout
+        else:
+            folder = os.path.dirname(target)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._fh = open(target, "w", encoding="utf-8")
+
+    @property
+    def enabled(self) -> bool:
+        return self._fh is not None
+
+    @property
+    def to_stdout(self) -> bool:
+        return self.target == "-"
+
+    def emit(self, event: str, data: Any = None) -> None:
+        if self._fh is None:
+            return
+        record = {
+            "seq": self._seq,
+            "event": event,
+            "elapsed_s": round(time.perf_counter() - self._t0, 3),
+            "data": data,
+        }
+        self._fh.write(json.dumps(record, default=_encode) + "\n")
+        self._fh.flush()
+        self._seq += 1
+
+    def close(self) -> None:
+        if self._fh is not None and self._fh is not sys.stdout:
+            self._fh.close()
+        self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _encode(value: Any) -> Any:
+    # lazy mappings (utils.lazy.LazyDict summaries): only what has been computed so far,
+    # so streaming an event never computes a section
+    if isinstance(value, LazyDict):
+        return value.computed()
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
@@ -0,0 +1,180 @@
+# src/utils/forecast.py
+"""
+Batched Holt (additive trend) forecasting for every campaign at once.
+
+The model runs over a (campaigns x days) matrix: the loop is over days only, every step
+updates all campaigns with numpy, and the smoothing parameters are picked per campaign
+from a small (alpha, beta) grid by one-step-ahead squared error, all grid points being
+evaluated in the same batched pass (grid points are stacked as extra rows).
+
+Prediction intervals use the ETS(A,A,N) error structure: with c_j = alpha (1 + j beta)
+and sigma^2 the one-step residual variance, the h-step variance is
+
+    var_h = sigma^2 * (1 + sum_{j=1..h-1} c_j^2)
+
+and the variance of the horizon total (sum of the next H days) is
+
+    var_sum = sigma^2 * sum_{m=0..H-1} (1 + C_m)^2,   C_m = c_1 + ... + c_m
+
+which accounts for the correlation between the step errors. Totals (spend, revenue)
+use var_sum and the ROAS horizon mean uses var_sum / H^2. The ROAS interval is an
+approximation: see campaign_forecasts.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import two_sided_z
+from utils.timeseries import campaign_day_frames
+
+FORECAST_DEFAULTS = {
+    "alphas": (0.2, 0.4, 0.6, 0.8),
+    "betas": (0.05, 0.2),
+    "min_days": 14,
+    "interval": 0.8,
+}
+
+
+def holt_batch(y: np.ndarray, alpha: np.ndarray, beta: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """
+    Run Holt's linear method on each row of y (NaN = missing: the state advances along
+    the trend without an update; leading NaNs are skipped). alpha / beta are per-row.
+
+    Returns: forecast (rows x horizon), sse and n (one-step errors used), level, trend.
+    """
+    y = np.asarray(y, dtype=float)
+    rows, days = y.shape
+    level = np.full(rows, np.nan)
+    trend = np.zeros(rows)
+    sse = np.zeros(rows)
+    n = np.zeros(rows, dtype=int)
+    for t in range(days):
+        obs = y[:, t]
+        seen = ~np.isnan(obs)
+        started = ~np.isnan(level)
+        # first observation initialises the level (trend starts flat)
+        init = seen & ~started
+        level[init] = obs[init]
+
+        upd = seen & started
+        pred = level + trend
+        err = np.where(upd, obs - pred, 0.0)
+        sse += err * err
+        n += upd
+        new_level = np.where(upd, pred + alpha * err, pred)
+        new_trend = np.where(upd, trend + alpha * beta * err, trend)
+        level = np.where(started, new_level, level)
+        trend = np.where(started, new_trend, trend)
+
+    steps = np.arange(1, horizon + 1)
+    forecast = level[:, None] + trend[:, None] * steps[None, :]
+    return {"forecast": forecast, "sse": sse, "n": n, "level": level, "trend": trend}
+
+
+def fit_holt(y: np.ndarray, horizon: int, alphas=None, betas=None) -> Dict[str, np.ndarray]:
+    """
+    Holt forecasts with per-row (alpha, beta) chosen from the grid by one-step SSE, plus
+    per-step standard errors (rows x horizon) and the standard error of the horizon total.
+    """
+    alphas = np.asarray(FORECAST_DEFAULTS["alphas"] if alphas is None else alphas, dtype=float)
+    betas = np.asarray(FORECAST_DEFAULTS["betas"] if betas is None else betas, dtype=float)
+    y = np.asarray(y, dtype=float)
+    rows = len(y)
+    grid_a, grid_b = [g.ravel() for g in np.meshgrid(alphas, betas, indexing="ij")]
+    g = len(grid_a)
+
+    # every grid point for every row in one batched run: (g * rows) series
+    stacked = np.tile(y, (g, 1))
+    out = holt_batch(stacked, np.repeat(grid_a, rows), np.repeat(grid_b, rows), horizon)
+    mse = (out["sse"] / np.maximum(out["n"], 1)).reshape(g, rows)
+    best = np.argmin(mse, axis=0)
+    pick = best * rows + np.arange(rows)
+
+    a, b = grid_a[best], grid_b[best]
+    sigma2 = mse[best, np.arange(rows)]
+    j = np.arange(horizon)
+    # c_j = alpha (1 + j beta) for j >= 1; cumulative sums give every step h at once
+    c = np.where(j[None, :] >= 1, a[:, None] * (1 + j[None, :] * b[:, None]), 0.0)
+    se = np.sqrt(sigma2[:, None] * (1 + np.cumsum(c ** 2, axis=1)))
+    sum_se = np.sqrt(sigma2 * ((1 + np.cumsum(c, axis=1)) ** 2).sum(axis=1))
+    return {
+        "forecast": out["forecast"][pick],
+        "se": se,
+        "sum_se": sum_se,
+        "alpha": a,
+        "beta": b,
+        "n": out["n"][pick],
+    }
+
+
+def campaign_forecasts(
+    by_campaign_date: pd.DataFrame, fuzzy_map: Dict[str, str], horizon: int = 7, options: Dict = None
+) -> List[Dict]:
+    """
+    Next-`horizon`-day spend, revenue and ROAS per canonical campaign with prediction
+    intervals, and a break-even flag (`roas_below_1`: "likely" if even the upper ROAS bound
+    is below 1, "possible" if only the point forecast is).
+    """
+    opts = {**FORECAST_DEFAULTS, **(options or {})}
+    if by_campaign_date is None or not len(by_campaign_date) or horizon <= 0:
+        return []
+    frames = campaign_day_frames(by_campaign_date, fuzzy_map)
+    spend = frames["spend"].to_numpy(dtype=float)
+    revenue = frames["revenue"].to_numpy(dtype=float)
+
+    # between a campaign's first and last active day a missing day means no delivery
+    active = ~np.isnan(spend)
+    started = np.maximum.accumulate(active, axis=1)
+    spend = np.where(started & ~active, 0.0, spend)
+    revenue = np.where(started & np.isnan(revenue), 0.0, revenue)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        roas = np.where(spend > 0, revenue / np.where(spend > 0, spend, 1.0), np.nan)
+
+    observed = active.sum(axis=1)
+    keep = observed >= opts["min_days"]
+    if not keep.any():
+        return []
+    z = two_sided_z(opts["interval"])
+
+    fits = {name: fit_holt(m[keep], horizon, opts["alphas"], opts["betas"])
+            for name, m in (("spend", spend), ("revenue", revenue), ("roas", roas))}
+
+    spend_fc = np.maximum(fits["spend"]["forecast"], 0).sum(axis=1)
+    revenue_fc = np.maximum(fits["revenue"]["forecast"], 0).sum(axis=1)
+    spend_se = fits["spend"]["sum_se"]
+    revenue_se = fits["revenue"]["sum_se"]
+    roas_mean = fits["roas"]["forecast"].mean(axis=1)
+    roas_se = fits["roas"]["sum_se"] / horizon
+    with np.errstate(invalid="ignore", divide="ignore"):
+        roas_fc = np.where(spend_fc > 0, revenue_fc / np.where(spend_fc > 0, spend_fc, 1.0), roas_mean)
+    # Approximation: the ROAS point forecast is the ratio of the revenue and spend totals,
+    # but the interval width is the SE of a separate fit on daily ROAS (its horizon mean),
+    # not an error propagated through the ratio. The two models can disagree (e.g. when
+    # spend moves a lot day to day), so the interval is not guaranteed to hold roas_fc's
+    # own uncertainty at the stated level.
+    roas_lo, roas_hi = np.maximum(roas_fc - z * roas_se, 0), roas_fc + z * roas_se
+
+    flag = np.where(roas_hi < 1.0, "likely", np.where(roas_fc < 1.0, "possible", None))
+    table = pd.DataFrame({
+        "campaign_canon": frames["spend"].index.to_numpy()[keep],
+        "horizon_days": horizon,
+        "spend_forecast": spend_fc,
+        "spend_interval": list(zip(np.maximum(spend_fc - z * spend_se, 0), spend_fc + z * spend_se)),
+        "revenue_forecast": revenue_fc,
+        "revenue_interval": list(zip(np.maximum(revenue_fc - z * revenue_se, 0), revenue_fc + z * revenue_se)),
+        "roas_forecast": roas_fc,
+        "roas_interval": list(zip(roas_lo, roas_hi)),
+        "roas_below_1": flag,
+        "alpha": fits["roas"]["alpha"],
+        "beta": fits["roas"]["beta"],
+    })
+    records = table.to_dict(orient="records")
+    for r in records:
+        for key in ("spend_interval", "revenue_interval", "roas_interval"):
+            r[key] = [float(v) for v in r[key]]
+        r["interval_level"] = float(opts["interval"])
+        if not isinstance(r["roas_below_1"], str):
+            r["roas_below_1"] = None
+    return records
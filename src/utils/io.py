@@ -2,8 +2,23 @@
 
 import yaml
 import pandas as pd
+import glob
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+# equality / IN filters on these columns can be pushed into ingestion
+FILTER_DIMENSIONS = ["adset_name", "platform", "country", "audience_type", "creative_type"]
+DATE_FILTERS = ["date_from", "date_to", "last_n_days"]
+# files listing the CSVs to read (see expand_paths)
+MANIFEST_SUFFIXES = (".json", ".yaml", ".yml")
 
 
 def load_config(path: str = "config/config.yaml"):
@@ -17,14 +32,197 @@ def load_config(path: str = "config/config.yaml"):
         return yaml.safe_load(f)
 
 
-def load_csv(path: str):
+def expand_paths(source, manifests: bool = True) -> List[str]:
+    """
+    Resolve a CSV source into the list of files to read, in order and without duplicates.
+
+    `source` is a path, a glob (`data/acct_1/2025-01-*.csv.gz`), a manifest (.json / .yaml /
+    .yml holding a list of paths or globs, relative to the manifest's folder) or a list of any
+    of these. Plain, gzip (.gz) and zstd (.zst, needs the optional `zstandard` package) files
+    are all accepted: pandas infers the compression from the extension.
+    `manifests=False` treats every .json / .yaml file as data (e.g. summary partials).
+    """
+    if isinstance(source, (list, tuple)):
+        items = list(source)
+    else:
+        items = [source]
+    paths: List[str] = []
+    for item in items:
+        item = str(item)
+        if manifests and item.endswith(MANIFEST_SUFFIXES) and os.path.isfile(item):
+            with open(item, "r", encoding="utf-8") as f:
+                listed = json.load(f) if item.endswith(".json") else yaml.safe_load(f)
+            if not isinstance(listed, list):
+                raise ValueError(f"Manifest must hold a list of paths: {item}")
+            base = os.path.dirname(os.path.abspath(item))
+            matches = expand_paths([p if os.path.isabs(str(p)) else os.path.join(base, str(p)) for p in listed])
+        elif glob.has_magic(item) and not os.path.exists(item):
+            matches = sorted(glob.glob(item))
+            if not matches:
+                raise FileNotFoundError(f"No files match: {item}")
+        else:
+            if not os.path.exists(item):
+                raise FileNotFoundError(f"File not found: {item}")
+            matches = [item]
+        for m in matches:
+            if m not in paths:
+                paths.append(m)
+    if not paths:
+        raise FileNotFoundError(f"No files in: {source}")
+    return paths
+
+
+def source_fingerprint(source) -> str:
+    """Path, size and mtime of every input file (a glob or manifest covers several)."""
+    parts = []
+    for p in expand_paths(source):
+        st = os.stat(p)
+        parts.append(f"{os.path.abspath(p)}|{st.st_size}|{st.st_mtime_ns}")
+    return ";".join(parts)
+
+
+def load_csv(path, usecols=None, filters=None, chunksize: int = 200_000, workers: int = None):
     """
     Loads a CSV and returns a pandas DataFrame.
+
+    path: one file, or several via a glob / manifest / list (see expand_paths). Several files
+          are decompressed and parsed in parallel on a thread pool of `workers` threads
+          (default: CPU count) after their headers are checked against each other
+          (check_schemas), then concatenated in file order.
+    usecols: only parse these columns (columns missing from the file are ignored).
+    filters: row filters applied while reading, chunk by chunk (see filter_mask);
+             `last_n_days` is resolved against the latest date across all files.
     """
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"CSV file not found: {path}")
+    paths = expand_paths(path)
+    if len(paths) == 1:
+        df, max_date = _read_file(paths[0], usecols, filters, chunksize)
+    else:
+        check_schemas(paths, usecols)
+        workers = max(1, min(len(paths), workers or os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda p: _read_file(p, usecols, filters, chunksize), paths))
+        _check_dtypes(paths, [part for part, _ in parts])
+        df = pd.concat([part for part, _ in parts], ignore_index=True)
+        dates = [d for _, d in parts if d is not None]
+        max_date = max(dates) if dates else None
+
+    if filters and filters.get("last_n_days") and max_date is not None:
+        df = df[df["date"].astype(str) >= window_start(max_date, filters["last_n_days"])].reset_index(drop=True)
+    return df
+
+
+def _read_file(path: str, usecols, filters, chunksize: int) -> Tuple[pd.DataFrame, Optional[str]]:
+    """One file, filtered while reading; also returns its latest date when `last_n_days` needs it."""
+    if not filters:
+        return pd.read_csv(path, usecols=_column_selector(usecols, filters)), None
+
+    kept = []
+    max_date = None
+    for chunk in pd.read_csv(path, usecols=_column_selector(usecols, filters), chunksize=chunksize):
+        if "last_n_days" in filters and "date" in chunk.columns and chunk["date"].notna().any():
+            chunk_max = str(chunk["date"].max())
+            max_date = chunk_max if max_date is None else max(max_date, chunk_max)
+        kept.append(chunk[filter_mask(chunk, filters)])
+    return pd.concat(kept, ignore_index=True), max_date
+
+
+def iter_csv(path, usecols=None, filters=None, chunksize: int = 200_000):
+    """
+    Yield the CSV in filtered chunks (same sources / usecols / filters as load_csv, except
+    that `last_n_days` is left to the caller: it needs the latest date of the whole input).
+    Several files are read one after the other.
+    """
+    paths = expand_paths(path)
+    if len(paths) > 1:
+        check_schemas(paths, usecols)
+    for p in paths:
+        for chunk in pd.read_csv(p, usecols=_column_selector(usecols, filters), chunksize=chunksize):
+            yield chunk[filter_mask(chunk, filters)] if filters else chunk
+
 
-    return pd.read_csv(path)
+def check_schemas(paths: List[str], usecols=None) -> List[str]:
+    """
+    Compare the header of every file with the first one (only the `usecols` columns when
+    given) and raise ValueError naming the first file that differs. Returns the columns.
+    """
+    selector = _column_selector(usecols, None)
+    expected = None
+    for p in paths:
+        columns = list(pd.read_csv(p, nrows=0, usecols=selector).columns)
+        if expected is None:
+            expected = columns
+        elif set(columns) != set(expected):
+            missing = sorted(set(expected) - set(columns))
+            extra = sorted(set(columns) - set(expected))
+            raise ValueError(
+                f"Schema mismatch in {p} (vs {paths[0]}): missing {missing}, unexpected {extra}"
+            )
+    return expected or []
+
+
+def _check_dtypes(paths: List[str], frames: List[pd.DataFrame]) -> None:
+    """
+    A column must parse as numeric in every file or in none (files where it is entirely
+    empty are ignored). Mixed int/float is fine: concat widens it to float.
+    """
+    kinds: Dict[str, Dict[bool, str]] = {}
+    for p, frame in zip(paths, frames):
+        for col in frame.columns:
+            if frame[col].notna().any():
+                kinds.setdefault(col, {}).setdefault(pd.api.types.is_numeric_dtype(frame[col]), p)
+    for col, seen in kinds.items():
+        if len(seen) > 1:
+            raise ValueError(
+                f"Column '{col}' is numeric in {seen[True]} but text in {seen[False]}"
+            )
+
+
+def _column_selector(usecols, filters):
+    """usecols for pd.read_csv: the wanted columns plus the ones the filters need (missing ones ignored)."""
+    if usecols is None:
+        return None
+    wanted = set(usecols) | set(k for k in (filters or {}) if k in FILTER_DIMENSIONS)
+    if filters and any(k in filters for k in DATE_FILTERS):
+        wanted.add("date")
+    return lambda c, _wanted=frozenset(wanted): c in _wanted
+
+
+# ------------------ row filters ------------------
+def window_start(max_date: str, last_n_days: int) -> str:
+    """First ISO date of an inclusive `last_n_days` window ending at `max_date`."""
+    start = pd.Timestamp(max_date) - pd.Timedelta(days=int(last_n_days) - 1)
+    return start.strftime("%Y-%m-%d")
+
+
+def filter_mask(df: pd.DataFrame, filters) -> pd.Series:
+    """
+    Vectorized boolean mask for dimension (value or list of values) and absolute date
+    (date_from / date_to, inclusive ISO strings) filters. Keys it does not handle
+    (`campaign`, `last_n_days`) are left to the caller.
+    """
+    mask = pd.Series(True, index=df.index)
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if key == "date_from":
+            mask &= df["date"].astype(str) >= str(value)
+        elif key == "date_to":
+            mask &= df["date"].astype(str) <= str(value)
+        elif key in FILTER_DIMENSIONS:
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= df[key].isin(list(values))
+    return mask
+
+
+def filter_frame(df: pd.DataFrame, filters) -> pd.DataFrame:
+    """load_csv's row filters (including `last_n_days`) applied to a frame already in memory."""
+    if not filters:
+        return df
+    max_date = str(df["date"].max()) if filters.get("last_n_days") and df["date"].notna().any() else None
+    df = df[filter_mask(df, filters).to_numpy()]
+    if max_date is not None:
+        df = df[(df["date"].astype(str) >= window_start(max_date, filters["last_n_days"])).to_numpy()]
+    return df.reset_index(drop=True)
 
 
 def write_json(path: str, data):
@@ -35,3 +233,21 @@ def write_json(path: str, data):
 
     with open(path, "w") as f:
         json.dump(data, f, indent=2)
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Holds an exclusive advisory lock on `path` (created if missing) across processes.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
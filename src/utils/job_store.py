@@ -0,0 +1,146 @@
+# src/utils/job_store.py
+"""
+Durable SQLite queue of analysis jobs.
+
+One row per submitted question: query, dataset (a data_csv source, or None for the
+configured one), priority, who submitted it, status and, once run, the report paths, the
+error and the timings (`queued_s` waiting, `elapsed_s` running). Status moves
+queued -> running -> done | failed, or queued -> cancelled.
+
+claim() picks the highest-priority queued job (oldest first within a priority) inside a
+`BEGIN IMMEDIATE` transaction, so several daemons can share one queue file without two
+of them taking the same job.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    dataset TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    submitted_by TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    submitted_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    queued_s REAL,
+    elapsed_s REAL,
+    result TEXT,
+    error TEXT
+)
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _seconds_between(start: str, end: str) -> float:
+    return round((datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds(), 3)
+
+
+class JobStore:
+    """Thin wrapper over the queue file; every method is one short transaction."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # autocommit mode: transactions are opened explicitly where they matter
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, id)")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ------------------ clients ------------------
+    def submit(self, query: str, dataset: str = None, priority: int = 0, submitted_by: str = None) -> int:
+        cur = self.conn.execute(
+            "INSERT INTO jobs (query, dataset, priority, submitted_by, submitted_at) VALUES (?, ?, ?, ?, ?)",
+            (query, dataset, int(priority), submitted_by, _now()),
+        )
+        return int(cur.lastrowid)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job. Running jobs are not interrupted (returns False)."""
+        cur = self.conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (_now(), int(job_id)),
+        )
+        return cur.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (int(job_id),)).fetchone()
+        return _record(row) if row else None
+
+    def list(self, status: str = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first, optionally of one status."""
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"Unknown job status: {status}")
+        where, params = ("WHERE status = ?", [status]) if status else ("", [])
+        rows = self.conn.execute(f"SELECT * FROM jobs {where} ORDER BY id DESC LIMIT ?", params + [int(limit)])
+        return [_record(r) for r in rows.fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    # ------------------ workers ------------------
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Atomically move the next queued job to running and return it (None when the queue is empty)."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            started = _now()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, queued_s = ? WHERE id = ?",
+                (worker, started, _seconds_between(row["submitted_at"], started), row["id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def finish(self, job_id: int, status: str, result: Dict = None, error: str = None, elapsed_s: float = None) -> None:
+        if status not in ("done", "failed"):
+            raise ValueError(f"A job can only finish as done or failed, not {status}")
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, elapsed_s = ?, result = ?, error = ? WHERE id = ?",
+            (status, _now(), elapsed_s, json.dumps(result) if result is not None else None, error, int(job_id)),
+        )
+
+    def requeue_running(self, worker: str) -> int:
+        """Put back jobs a crashed daemon named `worker` left running; returns how many."""
+        cur = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, started_at = NULL, queued_s = NULL "
+            "WHERE status = 'running' AND worker = ?",
+            (worker,),
+        )
+        return cur.rowcount
+
+
+def _record(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    if job.get("result"):
+        job["result"] = json.loads(job["result"])
+    return job
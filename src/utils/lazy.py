@@ -0,0 +1,89 @@
+# src/utils/lazy.py
+"""
+Mappings whose values are computed on first access.
+
+A LazyDict holds plain values and zero-argument factories side by side. Reading a key
+whose value is still a factory calls it once and memoizes the result; `in`, len() and
+iteration only look at the keys, so listing what a mapping offers never computes anything.
+Setting a key replaces its factory.
+
+Summary partials, summary payloads and the DataAgent artifacts are LazyDicts, so a
+section (and the groupbys behind it) is computed only by whoever first reads it. json
+cannot encode a LazyDict directly: serialize `to_dict()` (everything) or `computed()`
+(what has been read so far). Pickling materializes the mapping into a plain dict, so
+lazy partials still cross process boundaries; copy.copy keeps it lazy.
+"""
+
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator
+
+_PENDING = object()
+
+
+class LazyDict(MutableMapping):
+    """Insertion-ordered mapping of values and memoized factories; see the module docstring."""
+
+    def __init__(self, factories: Dict[str, Callable[[], Any]] = None, **values):
+        self._values: Dict[str, Any] = {}
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        for key, factory in (factories or {}).items():
+            self.define(key, factory)
+        self.update(values)
+
+    def define(self, key: str, factory: Callable[[], Any]) -> None:
+        """Compute `key` with `factory()` on first access (replaces any current value)."""
+        self._values[key] = _PENDING
+        self._factories[key] = factory
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._values[key]
+        if value is _PENDING:
+            value = self._factories.pop(key)()
+            self._values[key] = value
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._factories.pop(key, None)
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        self._factories.pop(key, None)
+        del self._values[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._values))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def is_computed(self, key: str) -> bool:
+        return key in self._values and self._values[key] is not _PENDING
+
+    def computed(self) -> Dict[str, Any]:
+        """The values read (or set) so far, without computing anything else."""
+        return {k: v for k, v in self._values.items() if v is not _PENDING}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Every value, computing the pending ones."""
+        return {k: self[k] for k in self}
+
+    def __reduce__(self):
+        return dict, (self.to_dict(),)
+
+    def __copy__(self) -> "LazyDict":
+        # pending entries of the copy read through to this mapping, so each is computed once
+        clone = LazyDict()
+        for key, value in self._values.items():
+            if value is _PENDING:
+                clone.define(key, lambda key=key: self[key])
+            else:
+                clone[key] = value
+        return clone
+
+    def __repr__(self) -> str:
+        shown = ", ".join(f"{k!r}: {'<pending>' if v is _PENDING else type(v).__name__}" for k, v in self._values.items())
+        return f"LazyDict({{{shown}}})"
+
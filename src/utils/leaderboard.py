@@ -0,0 +1,126 @@
+# src/utils/leaderboard.py
+"""
+Creative performance leaderboard.
+
+Built from the `by_creative` accumulators of a summary partial (utils.summary_shards):
+one row per (normalized creative message, normalized campaign, creative type) carrying
+summed clicks / impressions / spend / revenue, the row count, the first raw message text
+and the first raw campaign name. Because the accumulators are additive, the leaderboard
+comes out of the same ingestion pass (and the same shard merge) as the rest of the summary.
+
+Lookups go through hash indexes (normalized message -> row positions, and campaign, canonical
+or normalized, -> row positions), and top-k queries aggregate the matching rows per message,
+drop messages under `min_impressions` and keep the k best with np.argpartition, so picking
+creatives never rescans the text column or the whole table.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.minhash import normalize_text
+
+SUM_COLS = ["spend", "revenue", "clicks", "impressions"]
+METRICS = ("ctr", "roas")
+
+
+class CreativeLeaderboard:
+    """Hash-indexed per-message performance with top-k by CTR or ROAS."""
+
+    def __init__(self, by_creative: pd.DataFrame, fuzzy_map: Dict[str, str] = None):
+        frame = by_creative.reset_index() if by_creative is not None else pd.DataFrame()
+        if len(frame):
+            fuzzy_map = fuzzy_map or {}
+            frame["campaign_canon"] = frame["campaign_norm"].map(lambda n: fuzzy_map.get(n, n))
+        self.frame = frame
+        self._positions: Dict[str, np.ndarray] = (
+            {k: np.asarray(v) for k, v in frame.groupby("creative_norm", sort=False).indices.items()}
+            if len(frame) else {}
+        )
+        by_campaign: Dict[str, List[np.ndarray]] = {}
+        for column in ("campaign_canon", "campaign_norm") if len(frame) else ():
+            for k, v in frame.groupby(column, sort=False).indices.items():
+                by_campaign.setdefault(k, []).append(v)
+        self._campaign_positions: Dict[str, np.ndarray] = {k: np.unique(np.concatenate(v)) for k, v in by_campaign.items()}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, message: str) -> bool:
+        return normalize_text(message) in self._positions
+
+    def lookup(self, message: str) -> Optional[Dict]:
+        """Aggregated performance of one message (any spelling that normalizes the same), or None."""
+        pos = self._positions.get(normalize_text(message))
+        if pos is None:
+            return None
+        return _records(_per_message(self.frame.iloc[pos]))[0]
+
+    def rows(self, campaign: str = None, creative_type: str = None) -> pd.DataFrame:
+        """Accumulator rows, optionally for one campaign (canonical or normalized name) and/or creative type."""
+        frame = self.frame
+        if not len(frame):
+            return frame
+        if campaign is not None:
+            frame = frame.iloc[self._campaign_positions.get(campaign, np.zeros(0, dtype=np.int64))]
+        if creative_type is not None:
+            frame = frame[(frame["creative_type"] == creative_type).to_numpy()]
+        return frame
+
+    def top_k(
+        self,
+        metric: str = "ctr",
+        k: int = 10,
+        min_impressions: float = 0,
+        campaign: str = None,
+        creative_type: str = None,
+    ) -> List[Dict]:
+        """
+        The k messages with the highest `metric` ("ctr" or "roas"), aggregated over the
+        selected rows. Messages below `min_impressions` (or without spend, for ROAS) are skipped.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown leaderboard metric: {metric}")
+        table = _per_message(self.rows(campaign, creative_type))
+        if not len(table):
+            return []
+        table = table[(table["impressions"] >= min_impressions) & table[metric].notna()]
+        if not len(table) or k <= 0:
+            return []
+        values = table[metric].to_numpy()
+        k = min(k, len(values))
+        top = np.argpartition(-values, k - 1)[:k]
+        top = top[np.argsort(-values[top], kind="mergesort")]
+        return _records(table.iloc[top])
+
+
+def _per_message(rows: pd.DataFrame) -> pd.DataFrame:
+    """Collapse accumulator rows to one row per normalized message with CTR / ROAS."""
+    if not len(rows):
+        return pd.DataFrame()
+    agg = {c: (c, "sum") for c in SUM_COLS}
+    agg["rows"] = ("rows", "sum")
+    agg["message"] = ("message", "first")
+    table = rows.groupby("creative_norm", sort=False).agg(**agg)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table["ctr"] = np.where(table["impressions"] > 0, table["clicks"] / table["impressions"], np.nan)
+        table["roas"] = np.where(table["spend"] > 0, table["revenue"] / table["spend"], np.nan)
+    return table
+
+
+def _records(table: pd.DataFrame) -> List[Dict]:
+    out = []
+    for key, r in table.iterrows():
+        out.append({
+            "message": r["message"],
+            "creative_norm": key,
+            "ctr": None if pd.isna(r["ctr"]) else float(r["ctr"]),
+            "roas": None if pd.isna(r["roas"]) else float(r["roas"]),
+            "impressions": float(r["impressions"]),
+            "clicks": float(r["clicks"]),
+            "spend": float(r["spend"]),
+            "revenue": float(r["revenue"]),
+            "rows": int(r["rows"]),
+        })
+    return out
@@ -23,6 +23,18 @@ def safe_mean(values):
     return float(np.mean(values))
 
 
+def two_sided_z(level: float) -> float:
+    """
+    Normal quantile of a two-sided interval at `level` (0.95 -> 1.96).
+    """
+    from scipy.stats import norm
+
+    level = float(level)
+    if not 0 < level < 1:
+        raise ValueError(f"Interval level must be between 0 and 1, got {level}")
+    return float(norm.ppf(0.5 + level / 2))
+
+
 def z_test_proportions(p1, n1, p2, n2):
     """
     Two-proportion Z test for CTR comparison.
@@ -48,3 +60,115 @@ def z_test_proportions(p1, n1, p2, n2):
     p_value = 2 * (1 - norm.cdf(abs(z)))
 
     return float(z), float(p_value)
+
+
+def proportion_below_rest(successes, trials):
+    """
+    One-sided p-value, per row, that the row's proportion (e.g. clicks / impressions) is
+    below that of all other rows pooled (two-proportion z test). Rows that cannot be
+    tested (no trials on either side) get 1.0.
+    """
+    from scipy.stats import norm
+
+    successes = np.asarray(successes, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    rest_s, rest_n = successes.sum() - successes, trials.sum() - trials
+    pooled = successes.sum() / trials.sum() if trials.sum() > 0 else 0.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        se = np.sqrt(pooled * (1 - pooled) * (1 / trials + 1 / rest_n))
+        z = (successes / trials - rest_s / rest_n) / se
+    testable = (trials > 0) & (rest_n > 0) & (se > 0)
+    return np.where(testable, norm.cdf(np.where(testable, z, 0.0)), 1.0)
+
+
+# ------------------ A/B test planning (vectorized) ------------------
+# All functions below take scalars or arrays (broadcast together) and return arrays, so
+# one call plans a test for every campaign. Tests are two-sided two-proportion z tests
+# on CTR, control vs one candidate, with equal impressions per arm. Undefined inputs
+# (CTR outside (0, 1), no lift, no traffic) give NaN.
+
+def _z_quantiles(alpha, power):
+    from scipy.stats import norm
+
+    return norm.ppf(1 - np.asarray(alpha, dtype=float) / 2), norm.ppf(np.asarray(power, dtype=float))
+
+
+def _lift_terms(p1, lift):
+    p1 = np.asarray(p1, dtype=float)
+    p2 = p1 * (1 + np.asarray(lift, dtype=float))
+    pbar = (p1 + p2) / 2
+    valid = (p1 > 0) & (p1 < 1) & (p2 > 0) & (p2 < 1) & (p2 != p1)
+    # null (pooled) and alternative standard deviations of the difference, per unit sqrt(n)
+    sd_null = np.sqrt(np.clip(2 * pbar * (1 - pbar), 0, None))
+    sd_alt = np.sqrt(np.clip(p1 * (1 - p1) + p2 * (1 - p2), 0, None))
+    return np.abs(p2 - p1), sd_null, sd_alt, valid
+
+
+def sample_size_proportions(p1, lift, alpha=0.05, power=0.8):
+    """
+    Impressions per arm needed to detect a relative CTR `lift` (0.1 = +10%) over a
+    baseline CTR `p1` at significance `alpha` with the given `power`.
+    """
+    z_a, z_b = _z_quantiles(alpha, power)
+    delta, sd_null, sd_alt, valid = _lift_terms(p1, lift)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = ((z_a * sd_null + z_b * sd_alt) / delta) ** 2
+    return np.where(valid, np.ceil(n), np.nan)
+
+
+def power_proportions(p1, lift, n, alpha=0.05):
+    """Power of the test with `n` impressions per arm (inverse of sample_size_proportions)."""
+    from scipy.stats import norm
+
+    z_a, _ = _z_quantiles(alpha, 0.5)
+    delta, sd_null, sd_alt, valid = _lift_terms(p1, lift)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        power = norm.cdf((delta * np.sqrt(n) - z_a * sd_null) / sd_alt)
+    return np.where(valid & (n > 0), power, np.nan)
+
+
+def minimum_detectable_lift(p1, n, alpha=0.05, power=0.8, iterations=20):
+    """
+    Smallest relative CTR lift detectable with `n` impressions per arm. The sample-size
+    equation has no closed form in the lift, so it is solved by fixed-point iteration
+    (starting from the equal-variance approximation), for all inputs at once.
+    """
+    z_a, z_b = _z_quantiles(alpha, power)
+    p1 = np.asarray(p1, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = (z_a + z_b) * np.sqrt(2 * p1 * (1 - p1) / n)
+        for _ in range(iterations):
+            _, sd_null, sd_alt, _ = _lift_terms(p1, delta / p1)
+            delta = (z_a * sd_null + z_b * sd_alt) / np.sqrt(n)
+        lift = delta / p1
+    return np.where((p1 > 0) & (p1 < 1) & (n > 0) & (p1 + delta < 1), lift, np.nan)
+
+
+def ab_test_plan(
+    baseline_ctr,
+    daily_impressions,
+    lift=0.1,
+    alpha=0.05,
+    power=0.8,
+    arms=2,
+    traffic_share=1.0,
+    max_days=14,
+):
+    """
+    Sample size and duration of a CTR test per campaign. `arms` counts the control, and
+    `traffic_share` is the part of the campaign's daily impressions the test receives.
+    Returns arrays: impressions_per_arm, total_impressions, days (to reach them) and
+    mde_lift (the smallest lift detectable within `max_days`).
+    """
+    per_arm = sample_size_proportions(baseline_ctr, lift, alpha, power)
+    daily = np.asarray(daily_impressions, dtype=float) * traffic_share
+    with np.errstate(invalid="ignore", divide="ignore"):
+        days = np.where(daily > 0, np.ceil(per_arm * arms / daily), np.nan)
+    return {
+        "impressions_per_arm": per_arm,
+        "total_impressions": per_arm * arms,
+        "days": days,
+        "mde_lift": minimum_detectable_lift(baseline_ctr, daily * max_days / arms, alpha, power),
+    }
@@ -0,0 +1,162 @@
+# src/utils/quality.py
+"""
+Vectorized data-quality checks for ad rows.
+
+Every check is a column-wise numpy expression over the whole frame (or chunk). A row's
+result is a bitmask with one bit per reason code in REASONS; 0 means the row is clean. Text
+labels ("ctr_mismatch;duplicate_key") are built only for flagged rows, once per distinct
+bitmask. Dates are parsed once per distinct value, so the cost grows with the number of
+days, not rows.
+
+Stated ratios are compared with the ratio of their components within
+`abs_tol + ratio_rel_tol * |computed|`. The absolute tolerances cover rounding in the
+exports (CTR to 4 decimals, ROAS to 2).
+
+RowValidator keeps the hashed (campaign, adset, date) keys it has seen, so chunked readers
+also catch duplicates that land in different chunks. The first row with a key is kept.
+Duplicates across separately summarized shards are not detected.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+REASONS = {
+    "missing_metric": "spend, revenue, clicks or impressions is empty",
+    "negative_metric": "spend, revenue or a count is negative",
+    "fractional_count": "clicks, impressions or purchases is not a whole number",
+    "impossible_ctr": "more clicks than impressions, clicks without impressions, or CTR outside [0, 1]",
+    "ctr_mismatch": "stated ctr disagrees with clicks / impressions",
+    "roas_mismatch": "stated roas disagrees with revenue / spend",
+    "duplicate_key": "(campaign, adset, date) already seen",
+    "bad_date": "date is missing or not a valid YYYY-MM-DD date",
+}
+CODES = list(REASONS)
+BITS = {code: 1 << i for i, code in enumerate(CODES)}
+
+QUALITY_DEFAULTS = {
+    "ratio_rel_tol": 0.01,
+    "ctr_abs_tol": 1e-4,
+    "roas_abs_tol": 0.01,
+}
+# must be present (DataAgent REQUIRED_COLUMNS); purchases is checked when it is there
+METRIC_COLS = ["spend", "revenue", "clicks", "impressions"]
+COUNT_COLS = ["clicks", "impressions", "purchases"]
+KEY_COLS = ["campaign_name", "adset_name", "date"]
+REASON_COL = "quality_reasons"
+
+
+class RowValidator:
+    """Flags bad rows chunk by chunk and counts them per reason."""
+
+    def __init__(self, options: Dict = None):
+        self.options = {**QUALITY_DEFAULTS, **(options or {})}
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._counts = np.zeros(len(CODES), dtype=np.int64)
+        self.rows_checked = 0
+        self.rows_flagged = 0
+
+    def check(self, df: pd.DataFrame) -> np.ndarray:
+        """Bitmask of failed checks per row (0 = clean)."""
+        n = len(df)
+        bits = np.zeros(n, dtype=np.uint16)
+        if not n:
+            return bits
+        opts = self.options
+
+        def flag(code, mask):
+            bits[np.asarray(mask, dtype=bool)] |= BITS[code]
+
+        values = {c: df[c].to_numpy(dtype=float, na_value=np.nan) for c in METRIC_COLS + ["ctr", "roas", "purchases"] if c in df.columns}
+        flag("missing_metric", np.isnan(np.column_stack([values[c] for c in METRIC_COLS])).any(axis=1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for c in ("spend", "revenue", "purchases", "clicks", "impressions"):
+                if c in values:
+                    flag("negative_metric", values[c] < 0)
+            for c in COUNT_COLS:
+                if c in values:
+                    flag("fractional_count", (np.mod(values[c], 1) != 0) & ~np.isnan(values[c]))
+
+            clicks, imps = values["clicks"], values["impressions"]
+            ctr = values["ctr"]
+            flag("impossible_ctr", (clicks > imps) | ((imps == 0) & (clicks > 0)) | (ctr < 0) | (ctr > 1))
+
+            computed_ctr = np.where(imps > 0, clicks / imps, np.nan)
+            tol = opts["ctr_abs_tol"] + opts["ratio_rel_tol"] * np.abs(computed_ctr)
+            flag("ctr_mismatch", np.abs(ctr - computed_ctr) > tol)
+
+            spend, revenue = values["spend"], values["revenue"]
+            computed_roas = np.where(spend > 0, revenue / spend, np.nan)
+            tol = opts["roas_abs_tol"] + opts["ratio_rel_tol"] * np.abs(computed_roas)
+            flag("roas_mismatch", np.abs(values["roas"] - computed_roas) > tol)
+
+        flag("bad_date", _bad_dates(df["date"]))
+        if all(c in df.columns for c in KEY_COLS):
+            flag("duplicate_key", self._duplicates(df[KEY_COLS]))
+
+        self.rows_checked += n
+        self.rows_flagged += int((bits > 0).sum())
+        self._counts += np.array([int(((bits & BITS[c]) > 0).sum()) for c in CODES])
+        return bits
+
+    def _duplicates(self, keys: pd.DataFrame) -> np.ndarray:
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        dup = pd.Series(hashes).duplicated().to_numpy(copy=True)
+        if len(self._seen):
+            pos = np.minimum(np.searchsorted(self._seen, hashes), len(self._seen) - 1)
+            dup |= self._seen[pos] == hashes
+        # both runs are sorted: the stable sort merges them in linear time
+        self._seen = np.sort(np.concatenate([self._seen, np.unique(hashes[~dup])]), kind="stable")
+        return dup
+
+    def summary(self) -> Dict:
+        """Additive counts for the summary partial (see merge_quality)."""
+        return {
+            "rows_checked": int(self.rows_checked),
+            "rows_flagged": int(self.rows_flagged),
+            "reasons": {c: int(k) for c, k in zip(CODES, self._counts) if k},
+        }
+
+
+def _bad_dates(dates: pd.Series) -> np.ndarray:
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(pd.Series(uniques).astype(str), format="%Y-%m-%d", errors="coerce")
+    # trailing True: missing dates (code -1) are bad
+    return np.append(parsed.isna().to_numpy(), True)[codes]
+
+
+def reason_labels(bits: np.ndarray) -> np.ndarray:
+    """';'-joined reason codes per bitmask ('' for clean rows), built once per distinct mask."""
+    uniques, inverse = np.unique(bits, return_inverse=True)
+    labels = np.array([";".join(c for c in CODES if int(u) & BITS[c]) for u in uniques], dtype=object)
+    return labels[inverse]
+
+
+def quarantine_frame(df: pd.DataFrame, bits: np.ndarray) -> pd.DataFrame:
+    """The flagged rows with their reason codes in REASON_COL."""
+    bad = bits > 0
+    return df[bad].assign(**{REASON_COL: reason_labels(bits[bad])}).reset_index(drop=True)
+
+
+def merge_quality(parts: List[Dict]) -> Dict:
+    merged = {"rows_checked": 0, "rows_flagged": 0, "reasons": {}}
+    for q in parts:
+        merged["rows_checked"] += int(q["rows_checked"])
+        merged["rows_flagged"] += int(q["rows_flagged"])
+        for code, count in q["reasons"].items():
+            merged["reasons"][code] = merged["reasons"].get(code, 0) + int(count)
+    return merged
+
+
+def quality_section(quality: Dict, mode: str) -> Dict:
+    """Summary payload section: counts, share of flagged rows and what happened to them."""
+    checked = quality["rows_checked"]
+    return {
+        "mode": mode,
+        "rows_checked": checked,
+        "rows_flagged": quality["rows_flagged"],
+        "flagged_share": round(quality["rows_flagged"] / checked, 6) if checked else 0.0,
+        "excluded_from_summary": mode == "quarantine",
+        "reasons": {c: quality["reasons"][c] for c in CODES if quality["reasons"].get(c)},
+    }
@@ -0,0 +1,122 @@
+# src/utils/retrieval.py
+"""
+Nearest-neighbour retrieval over historical creative messages.
+
+Each distinct message becomes one L2-normalized TF-IDF vector (word 1-2 grams). Stored
+as a sparse term x message matrix it acts as an inverted index: a batch of queries is
+one sparse matrix product, which only touches messages that share a term with the
+query. Cosine similarities are multiplied by a performance weight, and each query keeps
+its top k with np.argpartition. Queries run in blocks so memory stays bounded for
+thousands of candidates.
+
+Performance weight: CTR (clicks / impressions) and ROAS (revenue / spend) are shrunk
+toward the account rates with a prior of `prior_impressions` / `prior_spend` (so a
+message seen 50 times cannot outrank one seen 50,000 times on noise). The weight is the
+mean of ctr / account_ctr and roas / account_roas (whichever the data has), so 1.0 means
+account average. Only messages with weight >= `min_performance` are retrievable.
+
+With `diversity_threshold` set, messages are also grouped into near-duplicate clusters
+(utils.minhash), and a query returns at most one message per cluster.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils.minhash import cluster_near_duplicates, normalize_text
+
+PERF_COLUMNS = ["clicks", "impressions", "spend", "revenue"]
+
+
+class CreativeIndex:
+    """TF-IDF kNN index over distinct creative messages, weighted by CTR / ROAS."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        text_col: str = "creative_message",
+        prior_impressions: float = 1000.0,
+        prior_spend: float = None,
+        min_performance: float = 1.0,
+        diversity_threshold: float = 0.7,
+    ):
+        rows = df[df[text_col].notna()]
+        if rows.empty:
+            raise ValueError("No creative messages to index")
+        perf_cols = [c for c in PERF_COLUMNS if c in rows.columns]
+        agg = rows.groupby(text_col, sort=False)[perf_cols].sum()
+        self.messages = agg.index.astype(str).tolist()
+
+        # shrunk CTR / ROAS relative to the account; performance = mean of the available ratios
+        self.ctr = self.roas = None
+        relative = []
+        if {"clicks", "impressions"} <= set(perf_cols) and agg["clicks"].sum() > 0:
+            ctr_g = agg["clicks"].sum() / agg["impressions"].sum()
+            self.ctr = ((agg["clicks"] + prior_impressions * ctr_g) / (agg["impressions"] + prior_impressions)).to_numpy()
+            relative.append(self.ctr / ctr_g)
+        if {"spend", "revenue"} <= set(perf_cols) and agg["revenue"].sum() > 0:
+            roas_g = agg["revenue"].sum() / agg["spend"].sum()
+            k = float(prior_spend if prior_spend is not None else agg["spend"].median())
+            self.roas = ((agg["revenue"] + k * roas_g) / (agg["spend"] + k)).to_numpy()
+            relative.append(self.roas / roas_g)
+        self.performance = np.mean(relative, axis=0) if relative else np.ones(len(agg))
+
+        eligible = self.performance >= min_performance
+        # never leave the index empty: fall back to every message
+        self.eligible = eligible if eligible.any() else np.ones(len(agg), dtype=bool)
+
+        self.vectorizer = TfidfVectorizer(preprocessor=normalize_text, ngram_range=(1, 2), sublinear_tf=True)
+        self.matrix = self.vectorizer.fit_transform(self.messages)  # messages x terms, rows L2-normalized
+        self._index_t = self.matrix[self.eligible].T.tocsr()           # terms x eligible messages
+        self._ids = np.flatnonzero(self.eligible)
+        self._weight = self.performance[self.eligible]
+
+        # near-duplicate cluster id per message (identity when diversity is off)
+        self.cluster_of = np.arange(len(self.messages))
+        if diversity_threshold and diversity_threshold > 0:
+            position = {m: i for i, m in enumerate(self.messages)}
+            for cid, cluster in enumerate(cluster_near_duplicates(self.messages, threshold=diversity_threshold)):
+                self.cluster_of[[position[m] for m in cluster["members"]]] = cid
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def query(self, texts: Sequence[str], k: int = 3, block: int = 1024) -> List[List[Dict]]:
+        """
+        For each text, the k best messages by cosine similarity x performance weight:
+        [{"message", "similarity", "performance", "score", "ctr", "roas"}, ...].
+        Messages sharing no term with the query are never returned.
+        """
+        if not len(texts):
+            return []
+        q = self.vectorizer.transform(list(texts))
+        # over-fetch so enough distinct clusters survive the diversity pass
+        pool = max(1, min(k * 4, len(self._ids)))
+        results: List[List[Dict]] = []
+        for start in range(0, q.shape[0], block):
+            sims = (q[start:start + block] @ self._index_t).toarray()
+            scores = sims * self._weight[None, :]
+            top = np.argpartition(-scores, pool - 1, axis=1)[:, :pool]
+            order = np.take_along_axis(-scores, top, axis=1).argsort(axis=1, kind="mergesort")
+            top = np.take_along_axis(top, order, axis=1)
+            for r, cols in enumerate(top):
+                hits, seen = [], set()
+                for c in cols:
+                    i = self._ids[c]
+                    if sims[r, c] <= 0 or self.cluster_of[i] in seen:
+                        continue
+                    if len(hits) == k:
+                        break
+                    seen.add(self.cluster_of[i])
+                    hits.append({
+                        "message": self.messages[i],
+                        "similarity": round(float(sims[r, c]), 4),
+                        "performance": round(float(self.performance[i]), 4),
+                        "score": round(float(scores[r, c]), 4),
+                        "ctr": float(self.ctr[i]) if self.ctr is not None else None,
+                        "roas": float(self.roas[i]) if self.roas is not None else None,
+                    })
+                results.append(hits)
+        return results
@@ -0,0 +1,283 @@
+# src/utils/sampling.py
+"""
+Stratified row sampling with design-based error bounds (DataAgent sampling mode).
+
+Strata are (normalized campaign, date). One chunked pass draws a uniform random key u
+per row and keeps, per stratum, every row with u < p plus the `min_per_stratum` smallest
+keys. The cutoff p is halved whenever the kept set grows past twice the row budget, and
+at the end it is set so the sample holds `budget` rows (more if min_per_stratum x strata
+is larger). Within a stratum the kept rows are exactly those whose key is below a
+threshold, i.e. a simple random sample without replacement of n_h of the M_h rows counted
+during the pass, so each row carries the weight M_h / n_h (column `sample_weight`).
+utils.summary_shards turns weighted rows into unbiased accumulators, so the usual
+finalize step produces the approximate summary.
+
+Error bounds use the stratified SRSWOR variance with linearization for ratios. For a
+group g (a date, a campaign, the account) and ratio R_g = sum w y / sum w x:
+
+    z      = (y - R_g x) * 1[row in g]          (z = y * 1[row in g] for totals)
+    V(Y_g) = sum_h M_h^2 (1 - n_h / M_h) s_h^2(z) / n_h
+    V(R_g) = V(Z_g) / X_g^2
+
+CTR / ROAS in the summary are row means (y = value, x = 1 if present), the period
+ROAS is revenue / spend. `replicate_summaries` draws summaries from the resulting
+normal approximations; EvaluatorAgent re-validates hypotheses on them to flag results
+that could change under the exact computation.
+"""
+
+import copy
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import two_sided_z
+
+WEIGHT_COL = "sample_weight"
+STRATA = ["campaign_norm", "date"]
+
+
+def _prune(pool: pd.DataFrame, p: float, min_per_stratum: int) -> pd.DataFrame:
+    rank = pool.groupby(STRATA, sort=False)["_u"].rank(method="first")
+    return pool[(pool["_u"] < p) | (rank <= min_per_stratum)]
+
+
+def stratified_sample(
+    chunks: Iterable[pd.DataFrame],
+    budget: int,
+    min_per_stratum: int = 2,
+    seed: int = 0,
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    One pass over `chunks` (rows carrying campaign_norm and date). Returns the sample
+    (with `stratum_rows`, `stratum_sampled` and `sample_weight`) and the exact row count
+    per stratum (Series indexed by campaign_norm, date).
+    """
+    rng = np.random.default_rng(seed)
+    kept = None
+    counts = None
+    p = 1.0
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        chunk = chunk.assign(_u=rng.random(len(chunk)))
+        sizes = chunk.groupby(STRATA, sort=False).size()
+        counts = sizes if counts is None else counts.add(sizes, fill_value=0)
+        kept = _prune(chunk if kept is None else pd.concat([kept, chunk], ignore_index=True), p, min_per_stratum)
+        while len(kept) > 2 * budget and p > 1e-9:
+            p /= 2
+            kept = _prune(kept, p, min_per_stratum)
+    if kept is None:
+        return pd.DataFrame(), pd.Series(dtype=float)
+
+    # final cutoff: fill the budget with the smallest keys outside the guaranteed per-stratum minimum
+    rank = kept.groupby(STRATA, sort=False)["_u"].rank(method="first")
+    floor = (rank <= min_per_stratum).to_numpy()
+    extra = np.sort(kept["_u"].to_numpy()[~floor])
+    room = budget - int(floor.sum())
+    cutoff = extra[room - 1] if 0 < room <= len(extra) else (np.inf if room > len(extra) else -np.inf)
+    sample = kept[floor | (kept["_u"].to_numpy() <= cutoff)].drop(columns="_u").reset_index(drop=True)
+
+    counts = counts.astype(float)
+    return weight_sample(sample, counts), counts
+
+
+def weight_sample(sample: pd.DataFrame, counts: pd.Series) -> pd.DataFrame:
+    """Attach M_h (stratum_rows), n_h (stratum_sampled) and the weight M_h / n_h to each sampled row."""
+    key = pd.MultiIndex.from_frame(sample[STRATA])
+    sampled = sample.groupby(STRATA, sort=False).size().astype(float)
+    sample = sample.copy()
+    sample["stratum_rows"] = counts.reindex(key).to_numpy()
+    sample["stratum_sampled"] = sampled.reindex(key).to_numpy()
+    sample[WEIGHT_COL] = sample["stratum_rows"] / sample["stratum_sampled"]
+    return sample
+
+
+def restrict(sample: pd.DataFrame, counts: pd.Series, keep_rows, keep_strata) -> Tuple[pd.DataFrame, pd.Series]:
+    """Apply a stratum-level filter (campaign / date window) after sampling; weights are unchanged."""
+    return sample[np.asarray(keep_rows)].reset_index(drop=True), counts[np.asarray(keep_strata)]
+
+
+# ------------------ error bounds ------------------
+def _group_se(sample: pd.DataFrame, groups: pd.Series, y: np.ndarray, x: np.ndarray = None, ratio: pd.Series = None) -> pd.Series:
+    """Standard error per group of a total (x None) or of the ratio sum w y / sum w x (`ratio` = point values)."""
+    in_group = groups.notna().to_numpy()
+    z = np.where(in_group, y, 0.0)
+    if x is not None:
+        r = groups.map(ratio).to_numpy(dtype=float)
+        z = np.where(in_group, y - np.nan_to_num(r) * x, 0.0)
+    frame = pd.DataFrame({
+        "stratum": sample["_stratum"].to_numpy(),
+        "group": groups.to_numpy(),
+        "z": z,
+        "z2": z * z,
+    })[in_group]
+    dom = frame.groupby(["stratum", "group"], sort=False)[["z", "z2"]].sum()
+    strata = dom.index.get_level_values(0)
+    n = sample.groupby("_stratum")["stratum_sampled"].first().reindex(strata).to_numpy()
+    m = sample.groupby("_stratum")["stratum_rows"].first().reindex(strata).to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_h = np.where(n > 1, (dom["z2"] - dom["z"] ** 2 / n) / (n - 1), 0.0)
+        contrib = m * m * (1 - n / m) * np.maximum(var_h, 0) / n
+    variance = pd.Series(contrib, index=dom.index.get_level_values(1)).groupby(level=0, sort=False).sum()
+    if x is not None:
+        denom = pd.Series(sample[WEIGHT_COL].to_numpy() * x, index=groups.index)[in_group]
+        denom = denom.groupby(groups[in_group].to_numpy(), sort=False).sum()
+        variance = variance / denom.reindex(variance.index) ** 2
+    return np.sqrt(variance)
+
+
+def _bound(value: float, se: float, z: float) -> Dict:
+    se = float(se) if se == se else 0.0
+    return {"se": se, "interval": [max(float(value) - z * se, 0.0), float(value) + z * se]}
+
+
+def sample_intervals(sample: pd.DataFrame, counts: pd.Series, summary: Dict, fuzzy_map: Dict[str, str], confidence: float = 0.95) -> Dict:
+    """The `sampling` section of an approximate summary: sizes, standard errors and intervals."""
+    z = two_sided_z(confidence)
+    sample = sample.assign(_stratum=pd.factorize(pd.MultiIndex.from_frame(sample[STRATA]))[0])
+    values = {}
+    for col in ("ctr", "roas"):
+        values[col] = sample[col].fillna(0).to_numpy(dtype=float)
+        values[f"{col}_n"] = sample[col].notna().to_numpy(dtype=float)
+    for col in ("spend", "revenue", "clicks", "impressions"):
+        values[col] = sample[col].fillna(0).to_numpy(dtype=float)
+
+    def ratio_se(groups, col, points):
+        return _group_se(sample, groups, values[col], values[f"{col}_n"], points)
+
+    def total_se(groups, col):
+        return _group_se(sample, groups, values[col])
+
+    # ---------- account ----------
+    g = summary.get("global", {})
+    everyone = pd.Series("all", index=sample.index)
+    global_bounds = {
+        "avg_ctr": _bound(g.get("avg_ctr", 0), ratio_se(everyone, "ctr", {"all": g.get("avg_ctr", 0)}).get("all", 0), z),
+        "avg_roas": _bound(g.get("avg_roas", 0), ratio_se(everyone, "roas", {"all": g.get("avg_roas", 0)}).get("all", 0), z),
+    }
+    for field, col in (("total_spend", "spend"), ("total_revenue", "revenue"),
+                       ("total_clicks", "clicks"), ("total_impressions", "impressions")):
+        global_bounds[field] = _bound(g.get(field, 0), total_se(everyone, col).get("all", 0), z)
+    # account ROAS as revenue / spend: spend and revenue errors are strongly correlated
+    roas_total = g["total_revenue"] / g["total_spend"] if g.get("total_spend") else 0.0
+    se = _group_se(sample, everyone, values["revenue"], values["spend"], {"all": roas_total}).get("all", 0)
+    global_bounds["revenue_over_spend"] = {"value": float(roas_total), **_bound(roas_total, se, z)}
+
+    # ---------- daily trend ----------
+    dates = sample["date"].astype(str)
+    trend = {str(t["date"]): t for t in summary.get("trend", [])}
+    day_ctr = ratio_se(dates, "ctr", {d: t["ctr"] for d, t in trend.items()})
+    day_roas = ratio_se(dates, "roas", {d: t["roas"] for d, t in trend.items()})
+    day_spend = total_se(dates, "spend")
+    trend_bounds = {
+        d: {"ctr": _bound(t["ctr"], day_ctr.get(d, 0), z),
+            "roas": _bound(t["roas"], day_roas.get(d, 0), z),
+            "spend": _bound(t["spend"], day_spend.get(d, 0), z)}
+        for d, t in trend.items()
+    }
+
+    # ---------- campaigns ----------
+    canon = sample["campaign_norm"].map(lambda n: fuzzy_map.get(n, n))
+    camps = {c["campaign_canon"]: c for c in summary.get("campaign_summaries", [])}
+    c_ctr = ratio_se(canon, "ctr", {k: c["ctr"] for k, c in camps.items()})
+    c_roas = ratio_se(canon, "roas", {k: c["roas"] for k, c in camps.items()})
+    c_spend = total_se(canon, "spend")
+    c_revenue = total_se(canon, "revenue")
+    campaign_bounds = {
+        k: {"ctr": _bound(c["ctr"], c_ctr.get(k, 0), z),
+            "roas": _bound(c["roas"], c_roas.get(k, 0), z),
+            "spend": _bound(c["spend"], c_spend.get(k, 0), z),
+            "revenue": _bound(c["revenue"], c_revenue.get(k, 0), z)}
+        for k, c in camps.items()
+    }
+    cutoff = (summary.get("low_ctr_cutoff") or {}).get("ctr")
+    uncertain = sorted(
+        k for k, b in campaign_bounds.items()
+        if cutoff is not None and b["ctr"]["interval"][0] <= cutoff <= b["ctr"]["interval"][1]
+    )
+
+    section = {
+        "method": "stratified",
+        "strata": list(STRATA),
+        "confidence": float(confidence),
+        "rows_sampled": int(len(sample)),
+        "rows_total": int(counts.sum()),
+        "strata_count": int(len(counts)),
+        "global": global_bounds,
+        "trend": trend_bounds,
+        "campaigns": campaign_bounds,
+        "low_ctr_uncertain": uncertain,
+    }
+
+    # ---------- period-over-period ROAS (revenue / spend per window) ----------
+    comparison = summary.get("period_comparison") or {}
+    roas_totals = (comparison.get("totals") or {}).get("roas")
+    if roas_totals:
+        window = pd.Series(np.nan, index=sample.index, dtype=object)
+        for name in ("baseline", "current"):
+            w = comparison[name]
+            window[(dates >= w["from"]) & (dates <= w["to"])] = name
+        window = window.where(window.notna(), None)
+        points = {name: roas_totals[name] for name in ("baseline", "current")}
+        se = _group_se(sample, window, values["revenue"], values["spend"], points)
+        section["period_roas"] = {name: _bound(points[name], se.get(name, 0), z) for name in points}
+    return section
+
+
+# ------------------ replicate summaries ------------------
+def _draw(rng, bounds: Dict, value: float) -> float:
+    return max(float(value) + rng.normal() * bounds["se"], 0.0)
+
+
+def replicate_summaries(summary: Dict, n: int = 32, seed: int = 0) -> List[Dict]:
+    """
+    `n` summaries with every bounded metric redrawn from N(value, se^2) (independently)
+    and the low-CTR set recomputed at the summary's quantile. Derived sections that are
+    not bounded (trends, forecasts, creatives) are carried over unchanged.
+    """
+    section = summary.get("sampling")
+    if not section or n <= 0:
+        return []
+    rng = np.random.default_rng(seed)
+    quantile = float((summary.get("low_ctr_cutoff") or {}).get("quantile", 0.25))
+    replicates = []
+    for _ in range(n):
+        rep = copy.copy(summary)
+        rep["global"] = dict(summary.get("global", {}))
+        for field, b in section["global"].items():
+            if field in rep["global"]:
+                rep["global"][field] = _draw(rng, b, rep["global"][field])
+        ratio = section["global"].get("revenue_over_spend")
+        if ratio:
+            # keep revenue consistent with spend through the (correlated) ratio
+            rep["global"]["total_revenue"] = _draw(rng, ratio, ratio["value"]) * rep["global"].get("total_spend", 0)
+
+        rep["trend"] = []
+        for t in summary.get("trend", []):
+            t = dict(t)
+            for field, b in section["trend"].get(str(t["date"]), {}).items():
+                t[field] = _draw(rng, b, t[field])
+            rep["trend"].append(t)
+
+        rep["campaign_summaries"] = []
+        for c in summary.get("campaign_summaries", []):
+            c = dict(c)
+            for field, b in section["campaigns"].get(c["campaign_canon"], {}).items():
+                c[field] = _draw(rng, b, c[field])
+            rep["campaign_summaries"].append(c)
+        if rep["campaign_summaries"]:
+            ctrs = np.array([c["ctr"] for c in rep["campaign_summaries"]])
+            cut = float(np.quantile(ctrs, quantile))
+            rep["low_ctr_campaigns"] = [c["campaign_canon"] for c in rep["campaign_summaries"] if c["ctr"] <= cut]
+
+        if section.get("period_roas"):
+            comparison = copy.deepcopy(summary["period_comparison"])
+            roas = comparison["totals"]["roas"]
+            for name, b in section["period_roas"].items():
+                roas[name] = _draw(rng, b, roas[name])
+            roas["delta"] = roas["current"] - roas["baseline"]
+            roas["pct_change"] = roas["delta"] / roas["baseline"] if roas["baseline"] else None
+            rep["period_comparison"] = comparison
+        replicates.append(rep)
+    return replicates
@@ -0,0 +1,111 @@
+# src/utils/shared_dataset.py
+"""
+Export a DataFrame once and attach to it from many worker processes.
+
+`export_frame` writes every column as a memory-mapped `.npy` file in one folder, which is
+also the handle: a plain path that pickles for free and can be passed to process-pool
+workers, or to other commands. The folder goes under `/dev/shm` when available, so the
+files live in RAM.
+
+- numeric, bool and datetime columns are stored as raw arrays;
+- everything else (strings, mixed objects) is dictionary-encoded: one small integer code
+  array plus the list of distinct values (`manifest.json`), -1 for missing.
+
+`attach` maps the files read-only, so the OS page cache holds a single copy however many
+workers attach, and a worker taking `start:stop` only touches the pages of its own rows.
+Numeric columns come back as zero-copy views. Dictionary-encoded columns are decoded for the
+selected rows only, or with `decode=False` returned as zero-copy pandas Categoricals.
+Writes to an attached frame copy the touched column (copy-on-write) and never reach the files.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = "manifest.json"
+# numpy dtype kinds stored as-is (bool, int, uint, float, timedelta, datetime)
+RAW_KINDS = "biufmM"
+
+
+def _default_root() -> Optional[str]:
+    shm = "/dev/shm"
+    return shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+
+
+def export_frame(df: pd.DataFrame, root: str = None) -> str:
+    """Write `df` as memory-mapped columns into a new folder under `root`; returns the handle."""
+    path = tempfile.mkdtemp(prefix="dataset-", dir=root or _default_root())
+    columns = []
+    try:
+        for i, name in enumerate(df.columns):
+            col = df[name]
+            entry = {"name": name, "file": f"c{i}.npy", "dtype": str(col.dtype)}
+            if isinstance(col.dtype, np.dtype) and col.dtype.kind in RAW_KINDS:
+                values = np.ascontiguousarray(col.to_numpy())
+            else:
+                cat = col if isinstance(col.dtype, pd.CategoricalDtype) else col.astype("category")
+                values = np.ascontiguousarray(cat.cat.codes.to_numpy())
+                entry["categories"] = cat.cat.categories.tolist()
+            np.save(os.path.join(path, entry["file"]), values)
+            columns.append(entry)
+        with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({"rows": len(df), "columns": columns}, f, default=str)
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    return path
+
+
+def dataset_rows(handle: str) -> int:
+    return int(_manifest(handle)["rows"])
+
+
+def attach(
+    handle: str,
+    columns: List[str] = None,
+    start: int = 0,
+    stop: int = None,
+    decode: bool = True,
+) -> pd.DataFrame:
+    """
+    Rows `start:stop` of the exported frame (all by default). `columns` limits the mapped
+    columns; names missing from the dataset are ignored, like `usecols` in utils.io.load_csv.
+    """
+    manifest = _manifest(handle)
+    wanted = None if columns is None else set(columns)
+    data = {}
+    for entry in manifest["columns"]:
+        if wanted is not None and entry["name"] not in wanted:
+            continue
+        values = np.load(os.path.join(handle, entry["file"]), mmap_mode="r")[start:stop].view(np.ndarray)
+        if "categories" not in entry:
+            data[entry["name"]] = pd.Series(values, copy=False)
+        elif decode:
+            # trailing None so the missing code (-1) picks it
+            lookup = np.array(entry["categories"] + [None], dtype=object)
+            series = pd.Series(lookup[values])
+            if entry["dtype"] != "category":
+                series = series.astype(entry["dtype"])
+            data[entry["name"]] = series
+        else:
+            cat = pd.Categorical.from_codes(values, categories=entry["categories"])
+            data[entry["name"]] = pd.Series(cat, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+
+def release(handle: str) -> None:
+    """Delete the exported files (attached workers keep their mappings until they exit)."""
+    shutil.rmtree(handle, ignore_errors=True)
+
+
+def _manifest(handle: str) -> dict:
+    path = os.path.join(handle, MANIFEST)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Shared dataset not found: {handle}")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,210 @@
+# src/utils/sketches.py
+"""
+Single-pass, mergeable sketches for bounded-memory metrics.
+
+KLLSketch (quantiles)
+    Compactor hierarchy from Karnin, Lang & Liberty (2016). Memory is O(k) regardless of n.
+    Normalized rank error is about 1.33% at k=200 (99% confidence; 2.296 / k^0.9723 in
+    general, per the Apache DataSketches characterisation of the same compactor scheme).
+    A reported p25 therefore lies between the true p23.7 and p26.3. Sketches built on
+    separate shards merge without extra error.
+
+HyperLogLog (distinct counts)
+    Flajolet et al. (2007) with linear-counting small-range correction. 2^p one-byte registers;
+    relative standard error is 1.04 / sqrt(2^p): 3.25% at p=10, 1.63% at p=12, 0.81% at p=14.
+    Merging is an element-wise max, so unions across shards or campaigns are exact in
+    sketch space. Values are hashed with pandas' stable 64-bit hash.
+"""
+
+import base64
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+KLL_DEFAULT_K = 200
+HLL_DEFAULT_P = 10
+
+
+def kll_rank_error(k: int) -> float:
+    """Approximate normalized rank error (99% confidence) for a KLL sketch of size k."""
+    return 2.296 / (k ** 0.9723)
+
+
+def hll_relative_error(p: int) -> float:
+    """Relative standard error of a HyperLogLog estimate with 2^p registers."""
+    return 1.04 / np.sqrt(2 ** p)
+
+
+# ------------------ KLL quantile sketch ------------------
+class KLLSketch:
+    """
+    Mergeable quantile sketch. `update` takes whole arrays so building it is vectorized;
+    NaNs are ignored (same as pandas' quantile).
+    """
+
+    def __init__(self, k: int = KLL_DEFAULT_K, seed: int = 0):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values) -> "KLLSketch":
+        v = np.asarray(values, dtype=float).ravel()
+        v = v[~np.isnan(v)]
+        if len(v):
+            self.n += len(v)
+            self.levels[0] = np.concatenate([self.levels[0], v])
+            self._compress()
+        return self
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                buf = np.sort(self.levels[h])
+                # odd item stays behind so every promoted item represents exactly 2x weight
+                held, buf = (buf[-1:], buf[:-1]) if len(buf) % 2 else (buf[:0], buf)
+                promoted = buf[int(self._rng.integers(2))::2]
+                self.levels[h] = held
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge KLL sketches with k={self.k} and k={other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, lvl in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], lvl])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0 <= q <= 1); NaN for an empty sketch."""
+        if self.n == 0:
+            return float("nan")
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(l), 2 ** h, dtype=float) for h, l in enumerate(self.levels)])
+        order = np.argsort(items, kind="mergesort")
+        items, cum = items[order], np.cumsum(weights[order])
+        idx = int(np.searchsorted(cum, q * cum[-1], side="left"))
+        return float(items[min(idx, len(items) - 1)])
+
+    def quantiles(self, qs) -> Dict[str, float]:
+        return {f"p{int(round(q * 100))}": self.quantile(q) for q in qs}
+
+    def to_dict(self) -> Dict:
+        return {"k": self.k, "n": self.n, "levels": [l.tolist() for l in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KLLSketch":
+        sk = cls(k=data["k"])
+        sk.n = int(data["n"])
+        sk.levels = [np.asarray(l, dtype=float) for l in data["levels"]] or [np.empty(0)]
+        return sk
+
+
+# ------------------ HyperLogLog ------------------
+def _hash64(values) -> np.ndarray:
+    """Stable 64-bit hash, re-mixed (splitmix64 finalizer) so the top bits are well spread."""
+    x = pd.util.hash_array(np.asarray(values, dtype=object))
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def _leading_zeros64(x: np.ndarray) -> np.ndarray:
+    """Vectorized count of leading zero bits in uint64 values (64 for zero)."""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for s in (32, 16, 8, 4, 2, 1):
+        mask = x < (np.uint64(1) << np.uint64(64 - s))
+        n[mask] += s
+        x[mask] <<= np.uint64(s)
+    n[x == 0] = 64
+    return n
+
+
+def _register_updates(values, p: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (register index, rank) for every value."""
+    h = _hash64(values)
+    idx = (h >> np.uint64(64 - p)).astype(np.int64)
+    rest = h << np.uint64(p)
+    rank = np.minimum(_leading_zeros64(rest) + 1, 64 - p + 1).astype(np.uint8)
+    return idx, rank
+
+
+def hll_estimate(registers: np.ndarray) -> np.ndarray:
+    """
+    Cardinality estimates for a (groups, 2^p) register matrix (or a single register row).
+    """
+    regs = np.atleast_2d(registers).astype(float)
+    m = regs.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+    raw = alpha * m * m / np.power(2.0, -regs).sum(axis=1)
+    zeros = (regs == 0).sum(axis=1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class HyperLogLog:
+    """Single distinct-count sketch (see grouped_hll for one sketch per key)."""
+
+    def __init__(self, p: int = HLL_DEFAULT_P):
+        self.p = int(p)
+        self.registers = np.zeros(2 ** self.p, dtype=np.uint8)
+
+    def update(self, values) -> "HyperLogLog":
+        values = pd.Series(values).dropna().to_numpy()
+        if len(values):
+            idx, rank = _register_updates(values, self.p)
+            np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HLL sketches with p={self.p} and p={other.p}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        return float(hll_estimate(self.registers)[0])
+
+
+def grouped_hll(keys: pd.Series, values: pd.Series, p: int = HLL_DEFAULT_P) -> pd.DataFrame:
+    """
+    One HLL per key in a single vectorized pass. Returns a (keys x 2^p) uint8 register
+    frame; merge frames with `concat(...).groupby(level=0).max()`.
+    """
+    codes, uniques = pd.factorize(keys, sort=False)
+    mask = values.notna().to_numpy() & (codes >= 0)
+    regs = np.zeros((len(uniques), 2 ** p), dtype=np.uint8)
+    if mask.any():
+        idx, rank = _register_updates(values.to_numpy()[mask], p)
+        np.maximum.at(regs, (codes[mask], idx), rank)
+    return pd.DataFrame(regs, index=pd.Index(uniques, name=keys.name))
+
+
+def registers_to_json(regs: pd.DataFrame) -> Dict:
+    return {
+        "index": regs.index.tolist(),
+        "m": int(regs.shape[1]),
+        "registers": base64.b64encode(np.ascontiguousarray(regs.to_numpy(dtype=np.uint8)).tobytes()).decode("ascii"),
+    }
+
+
+def registers_from_json(data: Dict) -> pd.DataFrame:
+    raw = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8)
+    return pd.DataFrame(raw.reshape(len(data["index"]), data["m"]).copy(), index=data["index"])
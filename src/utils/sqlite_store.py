@@ -0,0 +1,312 @@
+# src/utils/sqlite_store.py
+"""
+Embedded, indexed SQLite storage for ad rows.
+
+The CSV is ingested once (chunked reads, one bulk transaction, indexes built after the
+load) together with each row's normalized and canonical campaign name. Summaries are then
+answered with indexed GROUP BY queries that return the same partial layout as
+utils.summary_shards.partial_from_frame, so selective questions (one campaign, one week,
+one country) only touch the matching rows.
+
+With a utils.quality.RowValidator, rows are checked while they are ingested: flagged rows
+go to the `quarantine` table with their reason codes (and are left out of `ads` unless
+`drop_flagged=False`), and the reason counts are kept in the metadata.
+
+Several processes may share one database file. A reload is a single transaction, so
+readers see either the old or the new table, and callers hold `ingest_lock()` around
+is_current + ingest_csv so only one of them reloads.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.io import expand_paths, file_lock, iter_csv, source_fingerprint, window_start
+from utils.lazy import LazyDict
+from utils.quality import RowValidator, quarantine_frame
+from utils.summary_shards import DELTA_DIMENSIONS, MEAN_COLS, PARTIAL_VERSION, SUM_COLS, creative_accumulators
+
+TABLE = "ads"
+ALIAS_TABLE = "campaign_alias"
+QUARANTINE_TABLE = "quarantine"
+# equality-filterable dimensions (all indexed); `campaign` filters on campaign_canon
+DIMENSIONS = ["campaign_canon", "adset_name", "platform", "country", "audience_type", "creative_type"]
+INDEXES = {
+    "idx_ads_date": ["date"],
+    "idx_ads_campaign_date": ["campaign_canon", "date"],
+    "idx_ads_norm": ["campaign_norm"],
+    "idx_ads_adset": ["adset_name"],
+    "idx_ads_platform": ["platform"],
+    "idx_ads_country": ["country"],
+    "idx_ads_audience": ["audience_type"],
+    "idx_ads_creative_type": ["creative_type"],
+}
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def build_where(filters: Optional[Dict]) -> Tuple[str, List]:
+    """
+    Translate a filter dict into a WHERE clause + params.
+
+    Supported keys: date_from / date_to (inclusive, ISO dates), `campaign` (canonical name)
+    and any of DIMENSIONS; a list value becomes IN (...). `last_n_days` must be resolved
+    first (SQLiteStore does this against MAX(date)).
+    """
+    clauses, params = [], []
+    for key, value in (filters or {}).items():
+        if value is None or key == "last_n_days":
+            continue
+        if key == "date_from":
+            clauses.append("date >= ?")
+            params.append(str(value))
+        elif key == "date_to":
+            clauses.append("date <= ?")
+            params.append(str(value))
+        else:
+            column = "campaign_canon" if key == "campaign" else key
+            if column not in DIMENSIONS:
+                raise ValueError(f"Unsupported filter: {key}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+            params.extend(str(v) for v in values)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _fingerprint(csv_path: str, settings: str) -> str:
+    return f"{source_fingerprint(csv_path)}|{settings}" if settings else source_fingerprint(csv_path)
+
+
+class SQLiteStore:
+    """
+    Thin wrapper over one SQLite file holding the `ads` table, the campaign alias table
+    and ingest metadata.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def ingest_lock(self):
+        """Exclusive cross-process lock for checking and reloading the database."""
+        return file_lock(f"{self.path}.lock")
+
+    # ------------------ ingestion ------------------
+    def is_current(self, csv_path: str, settings: str = "") -> bool:
+        """
+        True if the database already holds exactly this version of the CSV, ingested with
+        the same `settings` (e.g. the validation options).
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        if not row:
+            return False
+        try:
+            return row[0] == _fingerprint(csv_path, settings)
+        except FileNotFoundError:
+            return False
+
+    def ingest_csv(
+        self,
+        csv_path: str,
+        normalize: Callable[[str], str],
+        canonicalize: Callable[[Dict[str, int]], Dict[str, str]],
+        chunksize: int = 100_000,
+        validator: RowValidator = None,
+        drop_flagged: bool = True,
+        settings: str = "",
+    ) -> int:
+        """
+        (Re)load the CSV: chunked parse, a single bulk-insert transaction, canonical names
+        resolved over the distinct normalized names, then indexes. Returns rows loaded.
+        `settings` is stored with the source fingerprint (see is_current).
+        """
+        expand_paths(csv_path)  # raises FileNotFoundError before the old table is dropped
+
+        conn = self.conn
+        conn.execute("PRAGMA synchronous=OFF")
+        rows = 0
+        with conn:  # one transaction for the whole load, schema changes included
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            conn.execute(f"DROP TABLE IF EXISTS {ALIAS_TABLE}")
+            conn.execute(f"DROP TABLE IF EXISTS {QUARANTINE_TABLE}")
+            conn.execute("DELETE FROM meta WHERE key = 'quality'")
+            insert_sql = None
+            norm_cache: Dict[str, str] = {}
+            columns = None
+            quarantined = []
+            for chunk in iter_csv(csv_path, chunksize=chunksize):
+                # files of a multi-file source may order their (matching) columns differently
+                columns = columns or list(chunk.columns)
+                chunk = chunk[columns]
+                if validator is not None:
+                    bits = validator.check(chunk)
+                    quarantined.append(quarantine_frame(chunk, bits))
+                    if drop_flagged:
+                        chunk = chunk[bits == 0].copy()
+                chunk["campaign_name"] = chunk["campaign_name"].fillna("").astype(str)
+                for name in chunk["campaign_name"].unique():
+                    if name not in norm_cache:
+                        norm_cache[name] = normalize(name)
+                chunk["campaign_norm"] = chunk["campaign_name"].map(norm_cache)
+                chunk["campaign_canon"] = None
+
+                if insert_sql is None:
+                    cols = ", ".join(f'"{c}" {_sql_type(chunk[c].dtype)}' for c in chunk.columns)
+                    conn.execute(f"CREATE TABLE {TABLE} ({cols})")
+                    insert_sql = (
+                        f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(chunk.columns))})"
+                    )
+                records = chunk.astype(object).where(chunk.notna(), None)
+                conn.executemany(insert_sql, records.itertuples(index=False, name=None))
+                rows += len(chunk)
+
+            if insert_sql is None:
+                raise ValueError(f"CSV has no rows: {csv_path}")
+            if validator is not None:
+                self._write_quarantine(pd.concat(quarantined, ignore_index=True))
+                conn.execute("INSERT INTO meta VALUES ('quality', ?)", (json.dumps(validator.summary()),))
+
+            # canonicalize once over distinct normalized names (frequency-ordered input)
+            counts = dict(conn.execute(
+                f"SELECT campaign_norm, COUNT(*) FROM {TABLE} GROUP BY campaign_norm ORDER BY MIN(rowid)"
+            ).fetchall())
+            mapping = canonicalize(counts)
+            conn.execute(f"CREATE TABLE {ALIAS_TABLE} (norm TEXT PRIMARY KEY, canon TEXT)")
+            conn.executemany(f"INSERT INTO {ALIAS_TABLE} VALUES (?, ?)", mapping.items())
+            conn.execute(
+                f"UPDATE {TABLE} SET campaign_canon = "
+                f"(SELECT canon FROM {ALIAS_TABLE} a WHERE a.norm = {TABLE}.campaign_norm)"
+            )
+
+            for name, cols in INDEXES.items():
+                conn.execute(f"CREATE INDEX {name} ON {TABLE} ({', '.join(cols)})")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('source', ?)", (_fingerprint(csv_path, settings),)
+            )
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute("ANALYZE")
+        return rows
+
+    def _write_quarantine(self, frame: pd.DataFrame) -> None:
+        cols = ", ".join(f'"{c}" {_sql_type(frame[c].dtype)}' for c in frame.columns)
+        self.conn.execute(f"CREATE TABLE {QUARANTINE_TABLE} ({cols})")
+        records = frame.astype(object).where(frame.notna(), None)
+        self.conn.executemany(
+            f"INSERT INTO {QUARANTINE_TABLE} VALUES ({', '.join('?' * len(frame.columns))})",
+            records.itertuples(index=False, name=None),
+        )
+
+    # ------------------ queries ------------------
+    def canonical_map(self) -> Dict[str, str]:
+        return dict(self.conn.execute(f"SELECT norm, canon FROM {ALIAS_TABLE}").fetchall())
+
+    def columns(self) -> List[str]:
+        return [r[1] for r in self.conn.execute(f"PRAGMA table_info({TABLE})").fetchall()]
+
+    def _grouped(self, key, where: str, params: List, extra: str = "") -> pd.DataFrame:
+        """GROUP BY one column (index "key") or a list of columns (MultiIndex of those names)."""
+        keys = [key] if isinstance(key, str) else list(key)
+        select = [f"SUM({c}) AS {c}" for c in SUM_COLS]
+        for c in MEAN_COLS:
+            select += [f"SUM({c}) AS {c}_sum", f"COUNT({c}) AS {c}_n"]
+        select.append("COUNT(*) AS rows")
+        key_filter = " AND ".join(f"{k} IS NOT NULL" for k in keys)
+        where = f"{where} AND {key_filter}" if where else f" WHERE {key_filter}"
+        key_select = f"{key} AS key" if isinstance(key, str) else ", ".join(keys)
+        sql = (
+            f"SELECT {key_select}, {', '.join(select)}{extra} FROM {TABLE}{where} "
+            f"GROUP BY {', '.join(keys)} ORDER BY MIN(rowid)"
+        )
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        df = df.set_index("key" if isinstance(key, str) else keys)
+        return df.fillna({c: 0 for c in SUM_COLS})
+
+    def _resolve_dates(self, filters: Optional[Dict]) -> Dict:
+        """Turn a relative `last_n_days` window into date_from using the indexed MAX(date)."""
+        filters = dict(filters or {})
+        n = filters.pop("last_n_days", None)
+        if n:
+            max_date = self.conn.execute(f"SELECT MAX(date) FROM {TABLE}").fetchone()[0]
+            if max_date:
+                start = window_start(max_date, n)
+                filters["date_from"] = max(start, str(filters.get("date_from", start)))
+        return filters
+
+    def partial(self, filters: Optional[Dict] = None, parts: Optional[List[str]] = None) -> LazyDict:
+        """
+        Indexed GROUP BY queries returning the utils.summary_shards partial layout
+        (keyed by normalized campaign name; finalize with canonical_map()). The quality
+        counts and quarantined rows, if validated at ingest, describe the whole source.
+
+        Only the totals are queried here: each GROUP BY runs on first access, inside the
+        read transaction opened here, so all of them see the same snapshot even if another
+        process re-ingests meanwhile (WAL). Keep the store open until the partial is read.
+        `parts` (default: all) limits the optional entries, by_dimension_date and
+        by_creative, to the ones listed (see utils.summary_shards.section_parts).
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        where, params = build_where(self._resolve_dates(filters))
+
+        select = [f"COALESCE(SUM({c}), 0)" for c in SUM_COLS]
+        for c in MEAN_COLS:
+            select += [f"COALESCE(SUM({c}), 0)", f"COUNT({c})"]
+        row = self.conn.execute(
+            f"SELECT {', '.join(select)}, COUNT(*) FROM {TABLE}{where}", params
+        ).fetchone()
+        totals = {c: float(v) for c, v in zip(SUM_COLS, row)}
+        for i, c in enumerate(MEAN_COLS):
+            totals[f"{c}_sum"] = float(row[len(SUM_COLS) + 2 * i])
+            totals[f"{c}_n"] = int(row[len(SUM_COLS) + 2 * i + 1])
+
+        def by_campaign():
+            grouped = self._grouped("campaign_norm", where, params, extra=", MIN(rowid) AS first_row, campaign_name AS display")
+            return grouped.drop(columns=["first_row"])
+
+        def by_creative():
+            # group by raw text in SQL; normalization runs once per distinct message in pandas
+            keys = ["creative_message", "campaign_norm"] + (["creative_type"] if "creative_type" in present else [])
+            grouped = self._grouped(keys, where, params, extra=", MIN(rowid) AS first_row, campaign_name")
+            return creative_accumulators(grouped.reset_index().drop(columns=["first_row"]))
+
+        present = set(self.columns())
+        partial = LazyDict(version=PARTIAL_VERSION, rows=int(row[-1]), totals=totals)
+        partial.define("by_date", lambda: self._grouped("date", where, params))
+        partial.define("by_campaign", by_campaign)
+        partial.define("by_campaign_date", lambda: self._grouped(["campaign_norm", "date"], where, params))
+        if parts is None or "by_dimension_date" in parts:
+            partial["by_dimension_date"] = LazyDict({
+                dim: (lambda dim=dim: self._grouped([dim, "date"], where, params))
+                for dim in DELTA_DIMENSIONS if dim in present
+            })
+        if "creative_message" in present and (parts is None or "by_creative" in parts):
+            partial.define("by_creative", by_creative)
+        quality = self.conn.execute("SELECT value FROM meta WHERE key = 'quality'").fetchone()
+        if quality:
+            partial["quality"] = json.loads(quality[0])
+            partial["quarantine"] = pd.read_sql_query(f"SELECT * FROM {QUARANTINE_TABLE}", self.conn)
+        return partial
+
+    def query_frame(self, columns: Optional[List[str]] = None, filters: Optional[Dict] = None) -> pd.DataFrame:
+        """Fetch matching rows (optionally only some columns) as a DataFrame."""
+        cols = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        where, params = build_where(self._resolve_dates(filters))
+        return pd.read_sql_query(f"SELECT {cols} FROM {TABLE}{where} ORDER BY rowid", self.conn, params=params)
@@ -0,0 +1,571 @@
+# src/utils/summary_shards.py
+"""
+Mergeable summary partials.
+
+A partial holds only additive accumulators (sums, non-null counts, row counts) keyed by
+date, by normalized campaign name and by (campaign | dimension value, date), so partials built from any split of the data
+(date shards, account shards, file chunks) merge by simple addition. Campaign
+canonicalization and every derived metric (means, ratios, low-CTR cutoff) happen once,
+at finalize time, over the merged accumulators. Merged counts equal those of summarizing
+the concatenated data in one process; float sums and the metrics derived from them are
+equal up to round-off (addition order differs). Labels follow merge order:
+`campaign_display` is the first raw name seen, and canonical names that tie on row count
+go to the first-seen spelling, so different shard orders can pick different labels.
+
+A partial also carries `by_creative`: accumulators per (normalized creative message,
+normalized campaign, creative type), the source of utils.leaderboard.CreativeLeaderboard.
+
+Rows carrying a `sample_weight` column (utils.sampling) are accumulated with their weights,
+so a stratified sample yields estimated totals in the same layout.
+
+Optionally a partial also carries mergeable sketches (utils.sketches): KLL quantile sketches
+of row-level CTR/ROAS and per-campaign HyperLogLog registers for distinct adsets/creatives.
+
+Partials built with row validation (utils.quality) carry `quality` (additive counts per
+reason code) and `quarantine` (the flagged rows); both are merged by addition and
+concatenation.
+
+Nothing is aggregated before it is read. partial_from_frame computes the row and total
+counts and defers every groupby, and finalize_partial returns the summary as a
+utils.lazy.LazyDict whose sections compute on first access. SECTION_PARTS lists the partial
+entries behind each section, and PART_COLUMNS lists the source columns behind each entry
+(`section_parts` / `section_columns` combine the two).
+"""
+
+import json
+import os
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.lazy import LazyDict
+from utils.leaderboard import CreativeLeaderboard
+from utils.minhash import normalize_text
+from utils.quality import merge_quality
+from utils.sampling import WEIGHT_COL
+from utils.sketches import (
+    KLLSketch, grouped_hll, hll_estimate, hll_relative_error, kll_rank_error,
+    registers_from_json, registers_to_json,
+)
+from utils.budget import budget_plan
+from utils.deltas import compare_windows, default_windows
+from utils.forecast import campaign_forecasts
+from utils.timeseries import campaign_trends
+
+PARTIAL_VERSION = 1
+
+# additive columns: summed
+SUM_COLS = ["spend", "revenue", "clicks", "impressions"]
+# mean columns: carried as (sum, non-null count) so means stay exact after merging
+MEAN_COLS = ["ctr", "roas"]
+# distinct-count sketches per campaign: summary field -> source column
+DISTINCT_COLS = {"distinct_adsets": "adset_name", "distinct_creatives": "creative_message"}
+# dimensions with (value, date) accumulators for period-over-period deltas (campaign uses by_campaign_date)
+DELTA_DIMENSIONS = ["adset_name", "audience_type", "platform", "country", "creative_type"]
+QUANTILES = (0.25, 0.5, 0.75)
+# by_creative index levels; "message" / "campaign" keep the first raw text seen
+CREATIVE_KEYS = ["creative_norm", "campaign_norm", "creative_type"]
+CREATIVE_FIRST_COLS = ["message", "campaign"]
+
+_METRIC_COLS = SUM_COLS + MEAN_COLS
+# source columns each accumulator reads (campaign_norm is derived from campaign_name;
+# by_creative is built whenever creative_message is there, creative_type is optional)
+PART_COLUMNS = {
+    "by_date": ["date"] + _METRIC_COLS,
+    "by_campaign": ["campaign_name"] + _METRIC_COLS,
+    "by_campaign_date": ["campaign_name", "date"] + _METRIC_COLS,
+    "by_dimension_date": DELTA_DIMENSIONS + ["date"] + _METRIC_COLS,
+    "by_creative": ["creative_message", "creative_type"],
+    "sketches": ["campaign_name"] + MEAN_COLS + list(DISTINCT_COLS.values()),
+}
+# summary section -> the partial entries it is computed from
+SECTION_PARTS = {
+    "global": ["totals", "by_date"],
+    "trend": ["by_date"],
+    "campaign_summaries": ["by_campaign", "sketches"],
+    "low_ctr_campaigns": ["by_campaign"],
+    "low_ctr_cutoff": ["by_campaign"],
+    "campaign_trends": ["by_campaign_date"],
+    "campaign_forecasts": ["by_campaign_date"],
+    "creative_leaderboard": ["by_creative"],
+    "period_comparison": ["by_date", "by_campaign_date", "by_dimension_date"],
+    "budget_plan": ["by_campaign_date"],
+    "sketches": ["sketches"],
+}
+
+
+def section_parts(*sections: str) -> List[str]:
+    """Partial entries the given summary sections are computed from."""
+    parts: List[str] = []
+    for section in sections:
+        if section not in SECTION_PARTS:
+            raise ValueError(f"Unknown summary section: {section}")
+        parts += [p for p in SECTION_PARTS[section] if p not in parts]
+    return parts
+
+
+def section_columns(*sections: str) -> List[str]:
+    """Source columns the given summary sections are aggregated from."""
+    columns: List[str] = []
+    for part in section_parts(*sections):
+        columns += [c for c in PART_COLUMNS.get(part, _METRIC_COLS) if c not in columns]
+    return columns
+
+
+def _weighted_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Accumulator columns of weighted sample rows: w * value, w * (value present), w."""
+    w = df[WEIGHT_COL].to_numpy(dtype=float)
+    cols = {c: df[c].to_numpy(dtype=float) * w for c in SUM_COLS}
+    for c in MEAN_COLS:
+        cols[f"{c}_sum"] = df[c].to_numpy(dtype=float) * w
+        cols[f"{c}_n"] = df[c].notna().to_numpy() * w
+    cols["rows"] = w
+    return pd.DataFrame(cols, index=df.index)
+
+
+def _accumulators(df: pd.DataFrame, key) -> pd.DataFrame:
+    """Group by `key` (a column or list of columns; first-appearance order) into additive accumulator columns."""
+    if WEIGHT_COL in df.columns:
+        keys = [key] if isinstance(key, str) else list(key)
+        frame = pd.concat([df[keys], _weighted_columns(df)], axis=1)
+        return frame.groupby(key, sort=False).sum()
+    agg = {c: (c, "sum") for c in SUM_COLS}
+    for c in MEAN_COLS:
+        agg[f"{c}_sum"] = (c, "sum")
+        agg[f"{c}_n"] = (c, "count")
+    agg["rows"] = ("date", "size")
+    return df.groupby(key, sort=False).agg(**agg)
+
+
+def _merge_frames(frames: List[pd.DataFrame], first_cols: List[str] = ()) -> pd.DataFrame:
+    frames = [f for f in frames if f is not None and len(f)]
+    if not frames:
+        return pd.DataFrame()
+    stacked = pd.concat(frames)
+    agg = {c: ("first" if c in first_cols else "sum") for c in stacked.columns}
+    return stacked.groupby(level=list(range(stacked.index.nlevels)), sort=False).agg(agg)
+
+
+def creative_accumulators(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per (normalized message, campaign_norm, creative_type) sums for the creative leaderboard.
+    Accepts raw rows or rows already grouped by raw message (with a `rows` count column);
+    each distinct raw message is normalized once.
+    """
+    if "creative_message" not in df.columns:
+        return None
+    rows = df[df["creative_message"].notna()]
+    weight = rows[WEIGHT_COL].to_numpy(dtype=float) if WEIGHT_COL in rows else 1.0
+    codes, uniques = pd.factorize(rows["creative_message"].astype(str))
+    norm = np.array([normalize_text(u) for u in uniques], dtype=object)[codes] if len(uniques) else []
+    frame = pd.DataFrame({
+        "creative_norm": norm,
+        "campaign_norm": rows["campaign_norm"].to_numpy(),
+        "creative_type": rows["creative_type"].fillna("").astype(str).to_numpy() if "creative_type" in rows else "",
+        **{c: rows[c].to_numpy() * weight for c in SUM_COLS},
+        "rows": rows["rows"].to_numpy() if "rows" in rows else weight,
+        "message": rows["creative_message"].astype(str).to_numpy(),
+        "campaign": rows["campaign_name"].to_numpy() if "campaign_name" in rows else rows["campaign_norm"].to_numpy(),
+    })
+    frame = frame[frame["creative_norm"] != ""]
+    agg = {c: (c, "sum") for c in SUM_COLS + ["rows"]}
+    agg.update({c: (c, "first") for c in CREATIVE_FIRST_COLS})
+    return frame.groupby(CREATIVE_KEYS, sort=False).agg(**agg)
+
+
+def partial_from_frame(df: pd.DataFrame, sketches: Dict = None) -> LazyDict:
+    """
+    Build a partial from rows that already carry `campaign_norm`.
+    `sketches` = {"kll_k": int, "hll_precision": int} also builds the sketch section
+    (not for weighted sample rows: the sketches count rows unweighted).
+
+    Row and total counts are computed here; every groupby is a LazyDict entry computed on
+    first access (see PART_COLUMNS), so a summary that never reads, say, the creative
+    leaderboard never normalizes a creative message.
+    """
+    if WEIGHT_COL in df.columns:
+        totals = {c: float(v) for c, v in _weighted_columns(df).drop(columns="rows").sum().items()}
+        sketches = None
+    else:
+        totals = {c: float(df[c].sum()) for c in SUM_COLS}
+        for c in MEAN_COLS:
+            totals[f"{c}_sum"] = float(df[c].sum())
+            totals[f"{c}_n"] = int(df[c].count())
+
+    def by_campaign():
+        frame = _accumulators(df, "campaign_norm")
+        # representative original label = first raw name seen for the normalized name
+        frame["display"] = df.groupby("campaign_norm", sort=False)["campaign_name"].first()
+        return frame
+
+    partial = LazyDict(
+        version=PARTIAL_VERSION,
+        rows=int(round(df[WEIGHT_COL].sum())) if WEIGHT_COL in df.columns else int(len(df)),
+        totals=totals,
+    )
+    partial.define("by_date", lambda: _accumulators(df, "date"))
+    partial.define("by_campaign", by_campaign)
+    # per-campaign daily series for utils.timeseries (trend / anomaly stage)
+    partial.define("by_campaign_date", lambda: _accumulators(df, ["campaign_norm", "date"]))
+    partial.define("by_dimension_date", lambda: LazyDict({
+        dim: (lambda dim=dim: _accumulators(df, [dim, "date"])) for dim in DELTA_DIMENSIONS if dim in df.columns
+    }))
+    if "creative_message" in df.columns:
+        partial.define("by_creative", lambda: creative_accumulators(df))
+    if sketches is not None:
+        k = int(sketches.get("kll_k", 200))
+        p = int(sketches.get("hll_precision", 10))
+        partial["sketches"] = LazyDict(
+            {
+                "quantiles": lambda: {c: KLLSketch(k).update(df[c].to_numpy(dtype=float)) for c in MEAN_COLS},
+                "distinct": lambda: {
+                    field: grouped_hll(df["campaign_norm"], df[col], p=p)
+                    for field, col in DISTINCT_COLS.items() if col in df.columns
+                },
+            },
+            hll_precision=p,
+        )
+    return partial
+
+
+def _merge_sketches(sketch_list: List[Dict]) -> Dict:
+    first = sketch_list[0]
+    quantiles = {}
+    for c in first["quantiles"]:
+        merged = KLLSketch(first["quantiles"][c].k)
+        for sk in sketch_list:
+            merged.merge(sk["quantiles"][c])
+        quantiles[c] = merged
+    distinct = {}
+    for field in first["distinct"]:
+        if all(field in sk["distinct"] for sk in sketch_list):
+            distinct[field] = pd.concat([sk["distinct"][field] for sk in sketch_list]).groupby(level=0, sort=False).max()
+    return {"quantiles": quantiles, "distinct": distinct, "hll_precision": first["hll_precision"]}
+
+
+def merge_partials(partials: List[Dict]) -> Dict:
+    """
+    Merge partials (order matters only for the representative campaign label: first wins).
+    """
+    if not partials:
+        raise ValueError("No partials to merge")
+    for p in partials:
+        if p.get("version") != PARTIAL_VERSION:
+            raise ValueError(f"Unsupported partial version: {p.get('version')}")
+
+    totals: Dict[str, float] = {}
+    for p in partials:
+        for k, v in p["totals"].items():
+            totals[k] = totals.get(k, 0) + v
+
+    merged = {
+        "version": PARTIAL_VERSION,
+        "rows": int(sum(p["rows"] for p in partials)),
+        "totals": totals,
+        "by_date": _merge_frames([p["by_date"] for p in partials]),
+        "by_campaign": _merge_frames([p["by_campaign"] for p in partials], first_cols=["display"]),
+    }
+    # like sketches, the campaign x date series survive only if every partial has them
+    if all(p.get("by_campaign_date") is not None for p in partials):
+        merged["by_campaign_date"] = _merge_frames([p["by_campaign_date"] for p in partials])
+    dims = [set((p.get("by_dimension_date") or {}).keys()) for p in partials]
+    merged["by_dimension_date"] = {
+        dim: _merge_frames([p["by_dimension_date"][dim] for p in partials])
+        for dim in DELTA_DIMENSIONS if all(dim in d for d in dims)
+    }
+    if all(p.get("by_creative") is not None for p in partials):
+        merged["by_creative"] = _merge_frames([p["by_creative"] for p in partials], first_cols=CREATIVE_FIRST_COLS)
+    # sketches survive a merge only if every partial carries them
+    if all(p.get("sketches") for p in partials):
+        if len({p["sketches"]["hll_precision"] for p in partials}) > 1:
+            raise ValueError("Cannot merge partials built with different hll_precision")
+        merged["sketches"] = _merge_sketches([p["sketches"] for p in partials])
+    # quality counts are only meaningful if every partial was validated
+    if all(p.get("quality") is not None for p in partials):
+        merged["quality"] = merge_quality([p["quality"] for p in partials])
+    quarantined = [p["quarantine"] for p in partials if p.get("quarantine") is not None]
+    if quarantined:
+        merged["quarantine"] = pd.concat(quarantined, ignore_index=True)
+    return merged
+
+
+def _ratio(num, den):
+    return num / den if den else float("nan")
+
+
+def _available(partial: Dict, key: str) -> bool:
+    """True if `partial` carries `key` (a pending lazy entry counts; it is not computed)."""
+    if isinstance(partial, LazyDict) and key in partial and not partial.is_computed(key):
+        return True
+    return partial.get(key) is not None
+
+
+def finalize_partial(
+    partial: Dict,
+    fuzzy_map: Dict[str, str],
+    low_ctr_quantile: float = 0.25,
+    trend_options: Dict = None,
+    compare_days: int = None,
+    delta_top_k: int = 5,
+    forecast_horizon: int = 0,
+    forecast_options: Dict = None,
+    leaderboard_k: int = 0,
+    leaderboard_min_impressions: float = 0,
+    leaderboard: Callable[[], CreativeLeaderboard] = None,
+    budget: bool = False,
+    budget_total: float = None,
+    budget_options: Dict = None,
+    budget_limits: Dict[str, Dict[str, float]] = None,
+) -> LazyDict:
+    """
+    Turn (merged) accumulators into the summary payload consumed by InsightAgent,
+    EvaluatorAgent and CreativeGenerator. `fuzzy_map` maps campaign_norm -> canonical.
+
+    The payload is a LazyDict: which sections exist is decided here, but each is computed
+    (from the partial entries listed in SECTION_PARTS) on first access and memoized.
+
+    low_ctr_quantile: campaigns at or below this quantile of the campaign CTRs are listed in
+    `low_ctr_campaigns` (an exact quantile: there is one CTR per campaign).
+    trend_options: overrides for utils.timeseries.TREND_DEFAULTS (per-campaign trends).
+    compare_days: if set, add `period_comparison`: the last `compare_days` days vs the
+    `compare_days` before them, top `delta_top_k` contributors per dimension (utils.deltas).
+    forecast_horizon: if > 0, add `campaign_forecasts` for the next N days (utils.forecast).
+    leaderboard_k: if > 0, add `creative_leaderboard`: the top k messages by CTR and by ROAS
+    among those with at least `leaderboard_min_impressions` (pass `leaderboard`, a callable
+    returning the CreativeLeaderboard of this partial, to share one with the caller).
+    budget: if set, add `budget_plan`: the daily budget `budget_total` (default: current
+    spend) reallocated over fitted response curves (utils.budget; `budget_options` overrides
+    BUDGET_DEFAULTS, `budget_limits` sets per-campaign daily min/max by canonical name).
+    """
+    def canon(name):
+        return fuzzy_map.get(name, name)
+
+    # ---------- Global Metrics ----------
+    def global_summary():
+        totals = partial["totals"]
+        by_date = partial["by_date"]
+        dates = by_date.index if len(by_date) else pd.Index([])
+        return {
+            "total_spend": float(totals["spend"]),
+            "total_revenue": float(totals["revenue"]),
+            "avg_ctr": float(_ratio(totals["ctr_sum"], totals["ctr_n"])),
+            "avg_roas": float(_ratio(totals["roas_sum"], totals["roas_n"])),
+            "total_clicks": int(totals["clicks"]),
+            "total_impressions": int(totals["impressions"]),
+            "date_range": {
+                "min": str(dates.min()) if len(dates) else "nan",
+                "max": str(dates.max()) if len(dates) else "nan",
+            }
+        }
+
+    # ---------- Daily Trend ----------
+    def daily_trend():
+        by_date = partial["by_date"]
+        if not len(by_date):
+            return []
+        daily = by_date.sort_index()
+        return (
+            pd.DataFrame({
+                "date": daily.index,
+                "roas": daily["roas_sum"] / daily["roas_n"],
+                "ctr": daily["ctr_sum"] / daily["ctr_n"],
+                "spend": daily["spend"],
+                "clicks": daily["clicks"],
+                "impressions": daily["impressions"],
+            })
+            .to_dict(orient="records")
+        )
+
+    # ---------- Campaign Summary (grouped by canonical name) ----------
+    def campaign_table():
+        by_campaign = partial["by_campaign"]
+        if not len(by_campaign):
+            return None
+        agg = {c: "sum" for c in by_campaign.columns}
+        agg["display"] = "first"
+        campaign_agg = by_campaign.groupby(by_campaign.index.map(canon), sort=True).agg(agg)
+        campaign_agg["ctr"] = campaign_agg["ctr_sum"] / campaign_agg["ctr_n"]
+        campaign_agg["roas"] = campaign_agg["roas_sum"] / campaign_agg["roas_n"]
+        return campaign_agg
+
+    def campaign_summaries():
+        campaign_agg = tables["campaigns"]
+        if campaign_agg is None:
+            return []
+        # distinct counts: union the per-name HLL registers of each canonical group
+        distinct = {}
+        if partial.get("sketches"):
+            for field, regs in partial["sketches"]["distinct"].items():
+                canon_regs = regs.groupby(regs.index.map(canon)).max()
+                estimates = pd.Series(hll_estimate(canon_regs.to_numpy()), index=canon_regs.index)
+                distinct[field] = estimates.reindex(campaign_agg.index).fillna(0).round()
+
+        entries = pd.DataFrame({
+            "campaign_canon": campaign_agg.index,
+            "campaign_display": campaign_agg["display"].to_numpy(),
+            **{c: campaign_agg[c].to_numpy(dtype=float) for c in ("ctr", "roas", "spend", "revenue")},
+            **{c: campaign_agg[c].to_numpy().astype(np.int64) for c in ("clicks", "impressions")},
+            **{field: estimates.to_numpy().astype(np.int64) for field, estimates in distinct.items()},
+        })
+        return entries.to_dict("records")
+
+    # ---------- LOW CTR campaigns (canonical strings) ----------
+    def ctr_threshold():
+        campaign_agg = tables["campaigns"]
+        if campaign_agg is None:
+            return float("nan")
+        return campaign_agg["ctr"].quantile(low_ctr_quantile)
+
+    def low_ctr():
+        campaign_agg = tables["campaigns"]
+        if campaign_agg is None:
+            return []
+        return campaign_agg.index[campaign_agg["ctr"] <= tables["ctr_threshold"]].tolist()
+
+    # intermediates shared by several sections
+    tables = LazyDict({"campaigns": campaign_table, "ctr_threshold": ctr_threshold})
+
+    summary = LazyDict({
+        "global": global_summary,
+        "trend": daily_trend,
+        "campaign_summaries": campaign_summaries,
+        "low_ctr_campaigns": low_ctr,
+        "low_ctr_cutoff": lambda: {"ctr": float(tables["ctr_threshold"]), "quantile": low_ctr_quantile},
+    })
+
+    # ---------- Per-campaign trends / anomalies ----------
+    if _available(partial, "by_campaign_date"):
+        summary.define("campaign_trends", lambda: campaign_trends(partial["by_campaign_date"], fuzzy_map, trend_options))
+        if forecast_horizon:
+            summary.define("campaign_forecasts", lambda: campaign_forecasts(
+                partial["by_campaign_date"], fuzzy_map, int(forecast_horizon), forecast_options
+            ))
+
+    # ---------- Creative leaderboard ----------
+    if leaderboard_k and _available(partial, "by_creative"):
+        def creative_leaderboard():
+            board = leaderboard() if leaderboard is not None else CreativeLeaderboard(partial["by_creative"], fuzzy_map)
+            return {
+                "min_impressions": float(leaderboard_min_impressions),
+                **{f"top_{metric}": board.top_k(metric, int(leaderboard_k), leaderboard_min_impressions)
+                   for metric in ("ctr", "roas")},
+            }
+        summary.define("creative_leaderboard", creative_leaderboard)
+
+    # ---------- Period-over-period deltas ----------
+    if compare_days and partial["rows"] and _available(partial, "by_campaign_date"):
+        def period_comparison():
+            by_date = partial["by_date"]
+            if not len(by_date):
+                return {}
+            baseline, current = default_windows(str(by_date.index.max()), int(compare_days))
+            dimension_frames = {"campaign": partial["by_campaign_date"], **(partial.get("by_dimension_date") or {})}
+            return compare_windows(dimension_frames, baseline, current, fuzzy_map=fuzzy_map, k=delta_top_k)
+        summary.define("period_comparison", period_comparison)
+
+    # ---------- Budget reallocation ----------
+    if budget and _available(partial, "by_campaign_date"):
+        summary.define("budget_plan", lambda: budget_plan(
+            partial["by_campaign_date"], fuzzy_map, budget_total, budget_options, budget_limits
+        ))
+
+    # ---------- Approximate row-level distributions (sketch mode) ----------
+    if partial.get("sketches"):
+        def sketch_section():
+            sketches = partial["sketches"]
+            any_kll = next(iter(sketches["quantiles"].values()))
+            return {
+                **{f"{c}_quantiles": sk.quantiles(QUANTILES) for c, sk in sketches["quantiles"].items()},
+                "error_bounds": {
+                    "quantile_rank_error": round(kll_rank_error(any_kll.k), 4),
+                    "distinct_relative_std_error": round(float(hll_relative_error(sketches["hll_precision"])), 4),
+                },
+            }
+        summary.define("sketches", sketch_section)
+    return summary
+
+
+# ------------------ serialization ------------------
+def _frame_to_json(df: pd.DataFrame) -> Dict:
+    return df.reset_index(names="key").to_dict(orient="split", index=False)
+
+
+def _frame_from_json(data: Dict) -> pd.DataFrame:
+    if not data or not data.get("data"):
+        return pd.DataFrame()
+    return pd.DataFrame(data["data"], columns=data["columns"]).set_index("key")
+
+
+def write_partial(path: str, partial: Dict) -> None:
+    """Write a partial as JSON (small: one row per date and per normalized campaign)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = {
+        "version": partial["version"],
+        "rows": partial["rows"],
+        "totals": partial["totals"],
+        "by_date": _frame_to_json(partial["by_date"]),
+        "by_campaign": _frame_to_json(partial["by_campaign"]),
+    }
+    if partial.get("by_campaign_date") is not None:
+        data["by_campaign_date"] = partial["by_campaign_date"].reset_index().to_dict(orient="split", index=False)
+    if partial.get("by_dimension_date"):
+        data["by_dimension_date"] = {
+            dim: frame.reset_index().to_dict(orient="split", index=False)
+            for dim, frame in partial["by_dimension_date"].items()
+        }
+    if partial.get("by_creative") is not None:
+        data["by_creative"] = partial["by_creative"].reset_index().to_dict(orient="split", index=False)
+    if partial.get("sketches"):
+        sk = partial["sketches"]
+        data["sketches"] = {
+            "quantiles": {c: s.to_dict() for c, s in sk["quantiles"].items()},
+            "distinct": {f: registers_to_json(r) for f, r in sk["distinct"].items()},
+            "hll_precision": sk["hll_precision"],
+        }
+    if partial.get("quality") is not None:
+        data["quality"] = partial["quality"]
+    if partial.get("quarantine") is not None:
+        data["quarantine"] = partial["quarantine"].to_dict(orient="split", index=False)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+
+
+def read_partial(path: str) -> Dict:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Partial file not found: {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    partial = {
+        "version": data.get("version"),
+        "rows": data["rows"],
+        "totals": data["totals"],
+        "by_date": _frame_from_json(data["by_date"]),
+        "by_campaign": _frame_from_json(data["by_campaign"]),
+    }
+    if data.get("by_campaign_date"):
+        cd = data["by_campaign_date"]
+        partial["by_campaign_date"] = pd.DataFrame(cd["data"], columns=cd["columns"]).set_index(["campaign_norm", "date"])
+    if data.get("by_dimension_date"):
+        partial["by_dimension_date"] = {
+            dim: pd.DataFrame(fd["data"], columns=fd["columns"]).set_index([dim, "date"])
+            for dim, fd in data["by_dimension_date"].items()
+        }
+    if data.get("by_creative"):
+        bc = data["by_creative"]
+        partial["by_creative"] = pd.DataFrame(bc["data"], columns=bc["columns"]).set_index(CREATIVE_KEYS)
+    if data.get("sketches"):
+        sk = data["sketches"]
+        partial["sketches"] = {
+            "quantiles": {c: KLLSketch.from_dict(s) for c, s in sk["quantiles"].items()},
+            "distinct": {f: registers_from_json(r) for f, r in sk["distinct"].items()},
+            "hll_precision": sk["hll_precision"],
+        }
+    if data.get("quality") is not None:
+        partial["quality"] = data["quality"]
+    if data.get("quarantine") is not None:
+        q = data["quarantine"]
+        partial["quarantine"] = pd.DataFrame(q["data"], columns=q["columns"])
+    return partial
@@ -0,0 +1,117 @@
+# src/utils/tail.py
+"""
+Incremental reads of a CSV file that is only ever appended to.
+
+AppendReader remembers how far it has parsed (the byte offset after the last complete
+line) and on the next read parses only the bytes written since, under the saved header.
+A trailing line without its newline is left for the next read, so rows a writer is still
+flushing are never split.
+
+Anything other than an append resets the reader and the whole file is read again:
+- a different file at the path (new inode, e.g. an export written to a temp file and renamed);
+- a file shorter than the offset (truncated);
+- changed bytes in the first block or the block just before the offset (rewritten in place).
+
+Only plain, single-file CSVs can be tailed (see `tailable`). Compressed files and globs
+must be re-read whenever their fingerprint changes.
+"""
+
+import hashlib
+import io
+import os
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from utils.io import expand_paths
+
+# bytes hashed at the start of the file and before the offset to detect rewrites
+CHECK_BLOCK = 4096
+
+
+def tailable(source) -> bool:
+    """True if `source` is one plain .csv file."""
+    try:
+        paths = expand_paths(source)
+    except FileNotFoundError:
+        return False
+    return len(paths) == 1 and paths[0].endswith(".csv")
+
+
+class AppendReader:
+    """Read only the rows appended since the previous read()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._header: Optional[bytes] = None
+        self._inode = None
+        self._head_digest = None
+        self._head_size = 0
+        self._tail_digest = None
+
+    def changed(self) -> bool:
+        """Cheap check (one stat) for whether read() has anything to do."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return self._header is None or st.st_ino != self._inode or st.st_size != self.offset
+
+    def read(self) -> Tuple[pd.DataFrame, bool]:
+        """
+        (new rows, reset): with reset=True the frame holds the whole file and any state
+        built from earlier reads must be discarded.
+        """
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if self._header is not None and not self._is_append(f, st):
+                self._header = None
+            if self._header is None:
+                return self._read_all(f, st), True
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return pd.DataFrame(columns=self._columns), False
+        self.offset += end
+        self._tail_digest = self._digest_before_offset()
+        return pd.read_csv(io.BytesIO(self._header + data[:end]), names=self._columns, header=0), False
+
+    # ------------------------------------------------
+    def _is_append(self, f, st) -> bool:
+        if st.st_ino != self._inode or st.st_size < self.offset:
+            return False
+        f.seek(0)
+        if _digest(f.read(self._head_size)) != self._head_digest:
+            return False
+        return self._digest_before_offset(f) == self._tail_digest
+
+    def _digest_before_offset(self, f=None) -> str:
+        if f is None:
+            with open(self.path, "rb") as fh:
+                return self._digest_before_offset(fh)
+        start = max(0, self.offset - CHECK_BLOCK)
+        f.seek(start)
+        return _digest(f.read(self.offset - start))
+
+    def _read_all(self, f, st) -> pd.DataFrame:
+        f.seek(0)
+        data = f.read(st.st_size)
+        end = data.rfind(b"\n") + 1
+        header_end = data.find(b"\n") + 1
+        if not header_end:
+            raise ValueError(f"CSV has no complete header line: {self.path}")
+        self._header = data[:header_end]
+        self._inode = st.st_ino
+        self._head_size = min(CHECK_BLOCK, end)
+        self._head_digest = _digest(data[: self._head_size])
+        self.offset = end
+        self._tail_digest = _digest(data[max(0, end - CHECK_BLOCK):end])
+        df = pd.read_csv(io.BytesIO(data[:end]))
+        self._columns = list(df.columns)
+        return df
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
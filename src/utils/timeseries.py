@@ -0,0 +1,182 @@
+# src/utils/timeseries.py
+"""
+Vectorized per-campaign time-series statistics.
+
+Everything works on a (campaigns x days) matrix, NaN where a campaign has no rows that
+day, so the cost is a few numpy / pandas passes over the matrix regardless of campaign
+count; there are no per-campaign Python loops.
+
+    ols_slopes        closed-form least-squares slope per row (NaN-aware)
+    ewma              exponentially weighted baseline per row
+    rolling_zscores   z-score of each day vs the trailing window (window excludes the day)
+    change_points     best single mean-shift split per row, with a two-sample t statistic
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+TREND_DEFAULTS = {"ewma_alpha": 0.3, "z_window": 7, "anomaly_z": 3.0, "min_days": 6, "min_segment": 3}
+
+
+def ols_slopes(y: np.ndarray) -> np.ndarray:
+    """Slope of y against the column index, per row, ignoring NaNs (NaN if < 2 points)."""
+    y = np.asarray(y, dtype=float)
+    mask = ~np.isnan(y)
+    n = mask.sum(axis=1)
+    x = np.broadcast_to(np.arange(y.shape[1], dtype=float), y.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0).sum(axis=1) / n
+        y_mean = np.where(mask, y, 0).sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0)
+        dy = np.where(mask, y - y_mean[:, None], 0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    return np.where(n >= 2, slope, np.nan)
+
+
+def ewma(y: np.ndarray, alpha: float = 0.3) -> np.ndarray:
+    """Exponentially weighted mean per row; missing days are skipped, not zero-filled."""
+    frame = pd.DataFrame(np.asarray(y, dtype=float).T)
+    return frame.ewm(alpha=alpha, ignore_na=True).mean().to_numpy().T
+
+
+def rolling_zscores(y: np.ndarray, window: int = 7) -> np.ndarray:
+    """
+    (y - trailing mean) / trailing std, where the trailing window holds the previous
+    `window` days (NaN until at least 3 observed days precede it).
+    """
+    frame = pd.DataFrame(np.asarray(y, dtype=float).T)
+    rolled = frame.rolling(window, min_periods=3)
+    mean = rolled.mean().shift(1)
+    std = rolled.std().shift(1)
+    z = (frame - mean) / std.where(std > 0)
+    return z.to_numpy().T
+
+
+def change_points(y: np.ndarray, min_segment: int = 3) -> Dict[str, np.ndarray]:
+    """
+    Best single mean shift per row: the split maximizing the between-segment sum of
+    squares, found for all rows and all split points at once from cumulative sums.
+
+    Returns arrays: index (first column of the second segment, -1 if none),
+    before / after (segment means) and t (Welch-style t statistic of the shift).
+    """
+    y = np.asarray(y, dtype=float)
+    mask = ~np.isnan(y)
+    v = np.where(mask, y, 0.0)
+    n_cum = np.cumsum(mask, axis=1)
+    s_cum = np.cumsum(v, axis=1)
+    q_cum = np.cumsum(v * v, axis=1)
+    n_tot, s_tot, q_tot = n_cum[:, -1:], s_cum[:, -1:], q_cum[:, -1:]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n_l, n_r = n_cum, n_tot - n_cum
+        m_l, m_r = s_cum / n_l, (s_tot - s_cum) / n_r
+        gain = n_l * n_r / n_tot * (m_l - m_r) ** 2
+        valid = (n_l >= min_segment) & (n_r >= min_segment)
+        gain = np.where(valid, gain, -np.inf)
+
+        best = np.argmax(gain, axis=1)
+        rows = np.arange(len(y))
+        has = np.isfinite(gain[rows, best])
+        nl, nr = n_l[rows, best].astype(float), n_r[rows, best].astype(float)
+        ml, mr = m_l[rows, best], m_r[rows, best]
+        var_l = (q_cum[rows, best] - nl * ml ** 2) / (nl - 1)
+        var_r = (q_tot[:, 0] - q_cum[rows, best] - nr * mr ** 2) / (nr - 1)
+        se = np.sqrt(np.maximum(var_l, 0) / nl + np.maximum(var_r, 0) / nr)
+        t = (mr - ml) / np.where(se > 0, se, np.nan)
+
+    # the split is "after column `best`", i.e. the new level starts at best + 1
+    return {
+        "index": np.where(has, best + 1, -1),
+        "before": np.where(has, ml, np.nan),
+        "after": np.where(has, mr, np.nan),
+        "t": np.where(has, t, np.nan),
+    }
+
+
+def campaign_day_frames(by_campaign_date: pd.DataFrame, fuzzy_map: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """
+    Collapse (campaign_norm, date) accumulators to canonical campaigns and pivot them into
+    (campaign x date) matrices of daily ROAS / CTR (row means, as in the account trend),
+    spend and revenue.
+    """
+    acc = by_campaign_date
+    norms = acc.index.get_level_values(0)
+    canon = pd.Index(norms.map(lambda x: fuzzy_map.get(x, x)), name="campaign")
+    dates = pd.Index(acc.index.get_level_values(1), name="date")
+    grouped = acc.groupby([canon, dates]).sum()
+    wide = grouped.unstack("date")
+    # one column per calendar day so slopes are per day even when some days are missing
+    all_days = pd.date_range(min(wide.columns.levels[1]), max(wide.columns.levels[1]), freq="D").strftime("%Y-%m-%d")
+    wide = wide.reindex(columns=pd.MultiIndex.from_product([wide.columns.levels[0], all_days], names=wide.columns.names))
+    return {
+        "roas": wide["roas_sum"] / wide["roas_n"].where(wide["roas_n"] > 0),
+        "ctr": wide["ctr_sum"] / wide["ctr_n"].where(wide["ctr_n"] > 0),
+        "spend": wide["spend"],
+        "revenue": wide["revenue"],
+    }
+
+
+def campaign_trends(by_campaign_date: pd.DataFrame, fuzzy_map: Dict[str, str], options: Dict = None) -> List[Dict]:
+    """
+    One record per canonical campaign with ROAS/CTR slopes, EWMA baseline, latest
+    z-score, anomaly days and the strongest ROAS change point.
+    """
+    opts = {**TREND_DEFAULTS, **(options or {})}
+    if by_campaign_date is None or not len(by_campaign_date):
+        return []
+    frames = campaign_day_frames(by_campaign_date, fuzzy_map)
+    roas = frames["roas"].to_numpy(dtype=float)
+    ctr = frames["ctr"].to_numpy(dtype=float)
+    days = frames["roas"].columns.to_numpy()
+
+    observed = (~np.isnan(roas)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        roas_mean = np.where(observed > 0, np.nansum(roas, axis=1) / observed, np.nan)
+    roas_slope = ols_slopes(roas)
+    ctr_slope = ols_slopes(ctr)
+    baseline = ewma(roas, opts["ewma_alpha"])
+    z = rolling_zscores(roas, opts["z_window"])
+    anomalies = np.abs(np.nan_to_num(z)) >= opts["anomaly_z"]
+    cp = change_points(roas, opts["min_segment"])
+
+    # first / last observed column per row (max / min over masked positions)
+    pos = np.arange(roas.shape[1])
+    last_pos = np.where(~np.isnan(roas), pos, -1).max(axis=1)
+    first_pos = np.where(~np.isnan(roas), pos, roas.shape[1]).min(axis=1)
+    rows = np.arange(len(roas))
+    safe_last = np.maximum(last_pos, 0)
+    latest = roas[rows, safe_last]
+    latest_z = z[rows, safe_last]
+    latest_ewma = baseline[rows, safe_last]
+    anomaly_pos = np.where(anomalies, pos, -1).max(axis=1)
+    span = np.maximum(last_pos - first_pos, 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # fitted change across the observed span, relative to the campaign mean
+        roas_trend_pct = roas_slope * span / np.where(roas_mean > 0, roas_mean, np.nan)
+
+    table = pd.DataFrame({
+        "campaign_canon": frames["roas"].index.to_numpy(),
+        "days": observed,
+        "roas_slope": roas_slope,
+        "ctr_slope": ctr_slope,
+        "roas_trend_pct": roas_trend_pct,
+        "roas_latest": latest,
+        "roas_ewma": latest_ewma,
+        "roas_z_latest": latest_z,
+        "anomaly_days": anomalies.sum(axis=1),
+        "last_anomaly": np.where(anomaly_pos >= 0, days[np.maximum(anomaly_pos, 0)], None),
+        "change_point": np.where(cp["index"] >= 0, days[np.clip(cp["index"], 0, len(days) - 1)], None),
+        "roas_before": cp["before"],
+        "roas_after": cp["after"],
+        "change_t": cp["t"],
+    })
+    enough = table["days"] >= opts["min_days"]
+    stat_cols = ["roas_slope", "ctr_slope", "roas_trend_pct", "roas_z_latest", "roas_before", "roas_after", "change_t"]
+    table.loc[~enough, stat_cols] = np.nan
+    table.loc[~enough, "change_point"] = None
+    table = table.astype(object).where(table.notna(), None)
+    return table.to_dict(orient="records")
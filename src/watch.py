@@ -0,0 +1,210 @@
+"""
+Watch mode: keep the reports for one question fresh while `data_csv` grows.
+
+The question is planned once. Then every `watch_interval_s` the data file is checked with a
+single stat, and when it has grown only the appended bytes are parsed (utils.tail). Their
+partial is merged into the in-memory accumulators, and the summary is finalized again from
+those accumulators. The file is read in full again only when it was truncated, replaced
+or rewritten. Campaign names first seen in an append are added to the existing canonical
+groups (as with `alias_store`) instead of re-clustering every name.
+
+Downstream agents run again only when their inputs changed: the insight agent when the
+summary changed, the evaluator when the summary or hypotheses changed, the creative
+generator when the summary or the creative leaderboard changed. "The summary" is only the
+sections the agent reads (its SUMMARY_SECTIONS); the summary is lazy (utils.lazy), so a
+section no agent reads is never computed. An append whose rows are all filtered out or
+quarantined keeps the previous summary object, with only `data_quality` updated, so its
+memoized sections are reused and no agent runs again.
+
+Usage:
+    python src/watch.py "<analysis query>" [--interval SECONDS] [--events PATH|-] [--once]
+
+Sources that cannot be tailed (globs, manifests, gzip/zstd files) are re-summarized in full
+whenever their fingerprint changes. Planner filters that depend on the whole dataset do the
+same: a `campaign` filter (resolved over all campaign names) and `last_n_days` (a window
+that moves with the latest date). SQLite storage, sampling and `summary_partials` are
+not supported in watch mode.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+
+from agents.data_agent import extend_fuzzy_groups
+from run import build_agents, plan_tasks, run_task, write_reports
+from utils.events import EventStream
+from utils.io import filter_frame, load_config, source_fingerprint
+from utils.logger import log_agent
+from utils.quality import RowValidator, quality_section
+from utils.summary_shards import merge_partials
+from utils.tail import AppendReader, tailable
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class Watcher:
+    """Planned tasks, in-memory accumulators and the last inputs each agent ran on."""
+
+    def __init__(self, user_query: str, config: Dict, output_dir: str = None, stream: EventStream = None):
+        if config.get("storage", "csv") != "csv" or config.get("sampling") or config.get("summary_partials"):
+            raise ValueError("Watch mode needs CSV storage without sampling or summary_partials")
+        self.user_query = user_query
+        self.config = config
+        self.output_dir = output_dir or config.get("output_dir", "reports")
+        self.stream = stream or EventStream(None)
+        self.source = config["data_csv"]
+
+        self.tasks = plan_tasks(user_query, config, self.stream)
+        self.agents = build_agents(config)
+        data_task = next((t for t in self.tasks if t["agent"] == "data_agent"), {})
+        self.data_params = data_task.get("params", {}) or {}
+        filters = self.data_params.get("filters") or {}
+        self.row_filters = {k: v for k, v in filters.items() if k != "campaign"}
+        self.incremental = tailable(self.source) and not (filters.get("campaign") or filters.get("last_n_days"))
+
+        self.reader = AppendReader(self.source) if self.incremental else None
+        self._fingerprint: Optional[str] = None
+        self._partial = None
+        self._validator = None
+        self._fuzzy_map: Optional[Dict[str, str]] = None
+        self._inputs: Dict[str, str] = {}
+        self.context: Dict = {}
+
+    # ------------------------------------------------
+    def poll(self) -> Optional[Dict]:
+        """Refresh if the data changed; returns what was done (None when nothing changed)."""
+        started = time.perf_counter()
+        if self.incremental:
+            if not self.reader.changed():
+                return None
+            rows, reset = self.reader.read()
+            if not reset and not len(rows):
+                return None
+            self._update_summary(rows, reset)
+            update = {"rows_read": len(rows), "full_reload": reset}
+        else:
+            fingerprint = source_fingerprint(self.source)
+            if fingerprint == self._fingerprint:
+                return None
+            self._fingerprint = fingerprint
+            run_task("data_agent", self.data_params, self.agents, self.context, self.stream)
+            update = {"rows_read": None, "full_reload": True}
+
+        update["agents_run"] = self._run_downstream()
+        if "insight_agent" not in update["agents_run"]:
+            # run_task streams it after the insight agent; otherwise after the checks that read it
+            self.stream.emit("summary", self.context.get("summary", {}))
+        reports = write_reports(self.user_query, self.context, self.config, self.output_dir)
+        update["elapsed_s"] = round(time.perf_counter() - started, 3)
+        update["reports"] = reports
+        self.stream.emit("refresh", update)
+        log_agent("watch", f"Refreshed reports: {update['rows_read']} rows read, reran {update['agents_run'] or 'no agents'}")
+        return update
+
+    def _update_summary(self, rows: pd.DataFrame, reset: bool) -> None:
+        agent = self.agents["data_agent"]
+        if reset:
+            self._validator = RowValidator(self.config.get("quality_options"))
+        partial = agent.build_partial(filter_frame(rows, self.row_filters), validator=self._validator)
+        # no appended row reached the accumulators: every section read so far still holds
+        unchanged = not reset and not partial["rows"] and "summary" in self.context
+        if not reset:
+            partial = merge_partials([self._partial, partial])
+        if "quality" in partial:
+            # the validator counts every row seen since the last full read
+            partial["quality"] = self._validator.summary()
+        self._partial = partial
+
+        if unchanged:
+            summary, artifacts = self.context["summary"], self.context["artifacts"]
+            if "quality" in partial:
+                summary["data_quality"] = quality_section(partial["quality"], agent._validation_mode())
+            artifacts["quarantine"] = partial.get("quarantine")
+        else:
+            compare_days = self.data_params.get("compare_days") or self.config.get("compare_days")
+            summary, artifacts = agent._finalize(partial, fuzzy_map=self._campaign_map(reset), compare_days=compare_days)
+        self.context["summary"] = summary
+        self.context["artifacts"] = artifacts
+
+    def _campaign_map(self, reset: bool) -> Dict[str, str]:
+        by_campaign = self._partial["by_campaign"]
+        counts = {n: int(c) for n, c in by_campaign["rows"].items()} if len(by_campaign) else {}
+        if reset or self._fuzzy_map is None or self.config.get("alias_store"):
+            # the alias store is incremental by itself
+            self._fuzzy_map = self.agents["data_agent"]._canonical_map(counts)
+        else:
+            new_names = [n for n in counts if n not in self._fuzzy_map]
+            if new_names:
+                threshold = float(self.config.get("similarity_threshold", 0.78))
+                self._fuzzy_map.update(extend_fuzzy_groups(new_names, counts, self._fuzzy_map, threshold=threshold))
+        return self._fuzzy_map
+
+    def _run_downstream(self) -> list:
+        """Run each downstream task whose inputs differ from its previous run."""
+        ran = []
+        for task in self.tasks:
+            name = task["agent"]
+            if name == "data_agent":
+                continue
+            digest = self._task_inputs(name, task.get("params", {}))
+            if digest == self._inputs.get(name):
+                continue
+            run_task(name, task.get("params", {}), self.agents, self.context, self.stream)
+            self._inputs[name] = digest
+            ran.append(name)
+        return ran
+
+    def _task_inputs(self, name: str, params: Dict) -> str:
+        # only the sections the agent reads: the others stay uncomputed
+        summary = self.context.get("summary", {})
+        sections = getattr(self.agents[name], "SUMMARY_SECTIONS", None) or [k for k in summary if k != "data_quality"]
+        summary = {k: summary[k] for k in sections if k in summary}
+        if name == "evaluator":
+            return _digest(params, summary, self.context.get("hypotheses", []))
+        if name == "creative_generator":
+            leaderboard = self.context.get("artifacts", {}).get("creative_leaderboard")
+            return _digest(params, summary, leaderboard.rows() if leaderboard is not None else None)
+        return _digest(params, summary)
+
+    def run(self, interval_s: float = 2.0, once: bool = False) -> None:
+        """Poll until interrupted (or once, for a single refresh)."""
+        while True:
+            self.poll()
+            if once:
+                return
+            time.sleep(interval_s)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the reports for one query fresh as data_csv grows.")
+    parser.add_argument("query", nargs="+", help="Analysis query")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--interval", type=float, default=None, help="Seconds between checks (default: watch_interval_s)")
+    parser.add_argument("--events", default=None, help='Stream JSON Lines events to a file, or "-" for stdout')
+    parser.add_argument("--once", action="store_true", help="Refresh once and exit")
+    args = parser.parse_args()
+
+    cfg = load_config(args.config)
+    interval = args.interval if args.interval is not None else float(cfg.get("watch_interval_s", 2))
+    with EventStream(args.events if args.events is not None else cfg.get("event_stream")) as events:
+        try:
+            watcher = Watcher(" ".join(args.query), cfg, stream=events)
+            watcher.run(interval_s=interval, once=args.once)
+        except KeyboardInterrupt:
+            pass
+        except (RuntimeError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
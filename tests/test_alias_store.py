@@ -0,0 +1,51 @@
+# tests/test_alias_store.py
+from agents.data_agent import CampaignAliasStore, build_fuzzy_groups
+
+
+def test_alias_store_is_incremental_and_stable(tmp_path):
+    path = str(tmp_path / "aliases.json")
+    counts = {"men comfortmax launch": 10, "men comfortmax lau ch": 1, "women seamless everyday": 5}
+
+    store = CampaignAliasStore(path)
+    first = store.resolve(list(counts), counts, threshold=0.78)
+    store.save()
+    assert first == build_fuzzy_groups(list(counts), counts, threshold=0.78)
+
+    # A later run where the misspelling dominates must keep the earlier canonical label
+    counts2 = {"men comfortmax lau ch": 50, "men comfortmax launch": 1, "women seamless everyday pack": 3}
+    store2 = CampaignAliasStore(path)
+    second = store2.resolve(list(counts2), counts2, threshold=0.78)
+    assert second["men comfortmax lau ch"] == first["men comfortmax lau ch"]
+    # only the unseen name was clustered, against existing canonicals
+    assert second["women seamless everyday pack"] == "women seamless everyday"
+
+
+def test_alias_store_overrides_win(tmp_path):
+    path = str(tmp_path / "aliases.json")
+    counts = {"men comfortmax launch": 10, "women seamless": 5}
+    store = CampaignAliasStore(path)
+    store.resolve(list(counts), counts)
+    store.set_override("Women Seamless", "men comfortmax launch")
+    store.save()
+
+    mapping = CampaignAliasStore(path).resolve(list(counts), counts)
+    assert mapping["women seamless"] == "men comfortmax launch"
+
+
+def test_alias_store_merges_concurrent_writers(tmp_path):
+    path = str(tmp_path / "aliases.json")
+    first = CampaignAliasStore(path)
+    second = CampaignAliasStore(path)
+    first.resolve(["men comfortmax launch"], {"men comfortmax launch": 10})
+    second.resolve(["women seamless everyday"], {"women seamless everyday": 5})
+    second.set_override("Kids Sport", "women seamless everyday")
+    first.save()
+    second.save()
+
+    merged = CampaignAliasStore(path)
+    assert merged.aliases == {
+        "men comfortmax launch": "men comfortmax launch",
+        "women seamless everyday": "women seamless everyday",
+    }
+    assert merged.overrides == {"kids sport": "women seamless everyday"}
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
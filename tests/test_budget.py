@@ -0,0 +1,56 @@
+# tests/test_budget.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataAgent
+from utils.budget import allocate, fit_response_curves, marginal_roas
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def test_allocation_equalizes_marginal_roas_within_bounds():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    a, b = rng.uniform(1, 10, n), rng.uniform(0.2, 0.9, n)
+    current = rng.uniform(10, 1000, n)
+    lo, hi = 0.5 * current, 2.0 * current
+
+    spend = allocate(a, b, lo, hi, current.sum())
+
+    assert spend.sum() == pytest.approx(current.sum(), rel=1e-9)
+    assert (spend >= lo - 1e-9).all() and (spend <= hi + 1e-9).all()
+    marginal = marginal_roas(a, b, spend)
+    free = (spend > lo + 1e-6) & (spend < hi - 1e-6)
+    lam = np.median(marginal[free])
+    assert marginal[free] == pytest.approx(lam, rel=1e-6)
+    # rows held at a bound would move the wrong way if freed
+    assert (marginal[spend <= lo + 1e-6] <= lam * (1 + 1e-6)).all()
+    assert (marginal[spend >= hi - 1e-6] >= lam * (1 - 1e-6)).all()
+
+
+def test_response_curves_recover_elasticity():
+    rng = np.random.default_rng(1)
+    spend = rng.uniform(50, 500, (3, 30))
+    spend[2, 5:] = np.nan  # too few days: default elasticity
+    revenue = np.array([[2.0], [5.0], [3.0]]) * spend ** np.array([[0.4], [0.7], [0.6]])
+
+    curves = fit_response_curves(spend, revenue)
+
+    assert curves["b"][:2] == pytest.approx([0.4, 0.7])
+    assert curves["a"][:2] == pytest.approx([2.0, 5.0])
+    assert not curves["fitted"][2] and curves["b"][2] == 0.5
+
+
+def test_budget_plan_section_respects_total_and_limits():
+    agent = DataAgent({
+        "data_csv": CSV, "budget_optimizer": True, "budget_total": 20_000,
+        "budget_limits": {"Men ComfortMax Launch": {"min": 3000, "max": 3000}},
+    })
+    summary = agent.finalize(agent.build_partial(pd.read_csv(CSV)))
+    plan = summary["budget_plan"]
+
+    assert plan["daily_budget"] == pytest.approx(20_000, abs=0.5)
+    rows = {r["campaign_canon"]: r for r in plan["campaigns"]}
+    assert rows["men comfortmax launch"]["recommended_spend"] == pytest.approx(3000)
+    assert sum(r["recommended_spend"] for r in plan["campaigns"]) == pytest.approx(20_000, abs=1)
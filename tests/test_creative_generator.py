@@ -1,4 +1,6 @@
 # tests/test_creative_generator.py
+import pytest
+
 from agents.creative_generator import CreativeGenerator
 
 def test_creative_generator_structure():
@@ -20,3 +22,94 @@ def test_creative_generator_structure():
     assert len(first["generated"]) > 0
     g = first["generated"][0]
     assert "headline" in g and "message" in g and "cta" in g
+
+
+def test_near_duplicate_messages_collapse_into_weighted_clusters():
+    from agents.creative_generator import _collapse_messages
+
+    msgs = (
+        ["No ride‑up guarantee — best‑selling women briefs."] * 3      # non-breaking hyphen
+        + ["No ride-up guarantee - best-selling women briefs!"] * 2    # ASCII variant
+        + ["Cooling mesh panels for workouts — men boxers you’ll love."]
+    )
+    reps, counts = _collapse_messages(msgs, threshold=0.7)
+    assert counts == [5.0, 1.0]
+    assert reps[0] == msgs[0]
+
+    out = CreativeGenerator({"data_csv": "data/sample_fb_ads.csv"}).run({"summary": {"low_ctr_campaigns": []}})
+    anchors = out["payload"]["creatives"][0]["generated"][0]["anchor_examples"]
+    assert len(set(anchors)) == len(anchors) == 3
+
+
+def test_creative_index_prefers_similar_high_performers():
+    import pandas as pd
+    from utils.retrieval import CreativeIndex
+
+    df = pd.DataFrame({
+        "creative_message": [
+            "Breathable cotton briefs for all-day comfort",
+            "Breathable cotton briefs for everyday comfort",
+            "Seamless bralette with lace trim",
+            "Cooling mesh boxers for the gym",
+        ],
+        "clicks": [400, 80, 300, 100],
+        "impressions": [10000, 10000, 10000, 10000],
+        "spend": [100, 100, 100, 100],
+        "revenue": [500, 50, 300, 100],
+    })
+    index = CreativeIndex(df, diversity_threshold=0)
+    # the weak duplicate is below account average and never retrievable
+    assert not index.eligible[1]
+    hits = index.query(["Cotton briefs that breathe"], k=3)[0]
+    assert hits[0]["message"] == "Breathable cotton briefs for all-day comfort"
+    assert all(h["similarity"] > 0 for h in hits)
+    assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+
+
+def test_candidates_carry_test_plans():
+    from agents.data_agent import DataAgent
+
+    cfg = {"data_csv": "data/sample_fb_ads.csv", "forecast_horizon": 0}
+    summary = DataAgent(cfg).run({})["payload"]
+    out = CreativeGenerator(cfg).run({"summary": summary})
+    creatives = out["payload"]["creatives"]
+    assert len(creatives) == len({c["campaign_norm"] for c in creatives})
+
+    first = creatives[0]
+    campaign = next(c for c in summary["campaign_summaries"] if c["campaign_canon"] == summary["low_ctr_campaigns"][0])
+    plan = first["generated"][0]["test_plan"]
+    assert plan["baseline_ctr"] == pytest.approx(campaign["clicks"] / campaign["impressions"], abs=1e-6)
+    assert plan["total_impressions"] == 2 * plan["impressions_per_arm"]
+    assert plan["days"] >= 1 and 0 < plan["mde_lift"]
+    assert all(g["test_plan"] == plan for g in first["generated"])
+
+
+def test_leaderboard_sources_each_campaign_from_its_top_messages():
+    import pandas as pd
+    from utils.leaderboard import CreativeLeaderboard
+    from utils.summary_shards import creative_accumulators
+
+    rows = pd.DataFrame({
+        "campaign_norm": ["men boxers"] * 4 + ["women briefs"] * 3,
+        "campaign_name": ["Men Boxers"] * 4 + ["Women Briefs"] * 3,
+        "creative_message": [
+            "Cooling mesh boxers for the gym", "Breathable cotton boxers all day",
+            "Stretch waistband boxers that stay put", "Flash sale boxers tiny reach",
+            "Seamless lace briefs", "No ride-up briefs", "Soft modal briefs",
+        ],
+        "creative_type": "Image",
+        "spend": 100.0, "revenue": 200.0,
+        "clicks": [300, 200, 100, 90, 50, 50, 50],
+        "impressions": [10000, 10000, 10000, 100] + [10000] * 3,
+    })
+    leaderboard = CreativeLeaderboard(creative_accumulators(rows))
+    assert len(leaderboard.rows(campaign="men boxers")) == 4
+
+    out = CreativeGenerator({"leaderboard_min_impressions": 1000}).run({
+        "summary": {"low_ctr_campaigns": ["men boxers"]}, "leaderboard": leaderboard,
+    })
+    generated = out["payload"]["creatives"][0]["generated"]
+    text = " ".join(f"{g['headline']} {g['message']}" for g in generated).lower()
+    # the high-CTR message under the impression floor and other campaigns' messages are not sources
+    assert "flash" not in text and "briefs" not in text
+    assert generated[0]["confidence"] == 0.55
@@ -15,3 +15,79 @@ def test_data_agent_runs_and_has_payload():
     assert "low_ctr_campaigns" in payload
     # low_ctr should be a list
     assert isinstance(payload["low_ctr_campaigns"], list)
+
+
+def test_data_agent_sqlite_backend_matches_csv_and_filters(tmp_path):
+    import pytest
+
+    csv_cfg = {"data_csv": "data/sample_fb_ads.csv"}
+    sql_cfg = dict(csv_cfg, storage="sqlite", sqlite_path=str(tmp_path / "ads.sqlite"))
+
+    expected = DataAgent(csv_cfg).run({})["payload"]
+    got = DataAgent(sql_cfg).run({})["payload"]
+    assert got["low_ctr_campaigns"] == expected["low_ctr_campaigns"]
+    assert got["global"]["total_clicks"] == expected["global"]["total_clicks"]
+    assert got["global"]["avg_roas"] == pytest.approx(expected["global"]["avg_roas"])
+    assert len(got["trend"]) == len(expected["trend"])
+
+    # selective query: one canonical campaign, one week
+    biggest = max(expected["campaign_summaries"], key=lambda c: c["impressions"])
+    filters = {"campaign": biggest["campaign_display"], "date_from": "2025-01-01", "date_to": "2025-01-31"}
+    narrow = DataAgent(sql_cfg).run({"filters": filters})["payload"]
+    assert [c["campaign_canon"] for c in narrow["campaign_summaries"]] == [biggest["campaign_canon"]]
+    assert narrow["trend"] and all("2025-01-01" <= t["date"] <= "2025-01-31" for t in narrow["trend"])
+
+
+def test_data_agent_applies_pushdown_filters():
+    import pandas as pd
+
+    cfg = {"data_csv": "data/sample_fb_ads.csv"}
+    params = {
+        "filters": {"country": "US", "platform": "Instagram", "last_n_days": 7},
+        "columns": ["campaign_name", "date", "country", "platform"],
+    }
+    payload = DataAgent(cfg).run(params)["payload"]
+
+    df = pd.read_csv("data/sample_fb_ads.csv")
+    df = df[(df["country"] == "US") & (df["platform"] == "Instagram") & (df["date"] >= "2025-03-25")]
+    assert payload["global"]["total_clicks"] == int(df["clicks"].sum())
+    assert len(payload["trend"]) == df["date"].nunique()
+
+
+def test_narrow_metric_query_reads_only_the_columns_it_needs(monkeypatch):
+    import agents.data_agent as data_agent
+    from agents.planner import PlannerAgent
+
+    read = []
+    load_csv = data_agent.load_csv
+
+    def recording_load_csv(path, **kwargs):
+        df = load_csv(path, **kwargs)
+        read.append(list(df.columns))
+        return df
+
+    monkeypatch.setattr(data_agent, "load_csv", recording_load_csv)
+    tasks = {t["agent"]: t for t in PlannerAgent({}).run({"query": "ROAS in US on Instagram"})["tasks"]}
+    out = DataAgent({"data_csv": "data/sample_fb_ads.csv"}).run(tasks["data_agent"]["params"])
+
+    assert out["status"] == "ok" and len(read) == 1
+    assert {"spend", "revenue", "roas", "country", "platform"} <= set(read[0])
+    assert not {"creative_message", "creative_type", "adset_name"} & set(read[0])
+    assert out["artifacts"]["creative_leaderboard"] is None
+
+
+def test_sqlite_partial_runs_only_the_group_bys_that_are_read(tmp_path):
+    from utils.sqlite_store import SQLiteStore
+
+    cfg = {"data_csv": "data/sample_fb_ads.csv", "storage": "sqlite", "sqlite_path": str(tmp_path / "ads.sqlite")}
+    out = DataAgent(cfg).run({"sections": ["global", "low_ctr_campaigns"], "needs_creatives": False})
+    summary = out["payload"]
+    assert summary["global"]["total_clicks"] > 0 and "creative_leaderboard" not in summary
+    assert not summary.is_computed("campaign_trends")
+
+    store = SQLiteStore(cfg["sqlite_path"])
+    partial = store.partial(parts=["by_date", "by_campaign"])
+    assert "by_creative" not in partial and "by_dimension_date" not in partial
+    assert not partial.is_computed("by_campaign_date")
+    assert len(partial["by_date"]) == len(summary["trend"])
+    store.close()
@@ -0,0 +1,33 @@
+# tests/test_deltas.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataAgent
+from utils.deltas import _top_k
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def test_contributions_add_up_to_account_delta_on_every_dimension():
+    summary = DataAgent({"data_csv": CSV}).run({"compare_days": 14})["payload"]
+    comparison = summary["period_comparison"]
+    assert comparison["current"]["to"] == "2025-03-31"
+    assert comparison["baseline"]["to"] == "2025-03-17"
+
+    df = pd.read_csv(CSV)
+    cur = df[df["date"] >= "2025-03-18"]
+    assert comparison["totals"]["roas"]["current"] == pytest.approx(cur["revenue"].sum() / cur["spend"].sum())
+
+    # dimensions with few segments return all of them, so contributions are complete
+    for dim in ("platform", "country", "audience_type"):
+        roas = comparison["dimensions"][dim]["roas"]
+        assert sum(t["contribution"] for t in roas["top"]) == pytest.approx(roas["delta"])
+        for t in roas["top"]:
+            assert t["mix_effect"] + t["rate_effect"] == pytest.approx(t["contribution"])
+
+
+def test_top_k_matches_full_sort():
+    values = np.random.default_rng(3).normal(size=100_000)
+    expected = np.argsort(-np.abs(values))[:10]
+    assert _top_k(values, 10).tolist() == expected.tolist()
@@ -0,0 +1,51 @@
+# tests/test_drilldown.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataAgent, _normalize_campaign_name
+from utils.drilldown import DrillDown
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def test_expansions_match_groupby_and_are_cached():
+    df = pd.read_csv(CSV)
+    drill = DrillDown(df, _normalize_campaign_name, cache_size=2)
+    campaigns = drill.expand()
+    norms = df["campaign_name"].fillna("").astype(str).map(_normalize_campaign_name)
+    assert campaigns["spend"].sum() == pytest.approx(df["spend"].sum())
+
+    campaign = campaigns.index[0]
+    rows = df[norms == campaign]
+    adsets = drill.expand(campaign)
+    expected = rows.groupby("adset_name")[["spend", "clicks"]].sum()
+    assert np.allclose(adsets[["spend", "clicks"]].sort_index(), expected.sort_index())
+    assert adsets["spend_share"].sum() == pytest.approx(1.0)
+
+    adset = adsets.index[0]
+    creatives = drill.expand(campaign.upper(), adset)  # raw names resolve through the normalizer
+    assert creatives["rows"].sum() == (rows["adset_name"] == adset).sum()
+
+    drill.expand(campaign)
+    assert drill.cache_info() == {"hits": 1, "misses": 3, "size": 2, "max_size": 2}
+    with pytest.raises(KeyError):
+        drill.expand(campaign, "no such adset")
+    with pytest.raises(ValueError):
+        drill.expand(campaign, adset, creatives.index[0])
+
+
+def test_data_agent_returns_drilldown_over_summarized_rows():
+    out = DataAgent({"data_csv": CSV, "validation": "quarantine", "drilldown": True}).run({})
+    campaigns = out["artifacts"]["drilldown"].expand()
+    by_canon = {c["campaign_canon"]: c for c in out["payload"]["campaign_summaries"]}
+    assert set(campaigns.index) == set(by_canon)
+    name = campaigns.index[0]
+    assert campaigns.loc[name, "clicks"] == by_canon[name]["clicks"]
+
+
+def test_data_agent_builds_drilldown_only_when_enabled():
+    out = DataAgent({"data_csv": CSV}).run({"columns": ["spend"], "needs_creatives": False})
+    assert "drilldown" not in out["artifacts"]
+    assert "adset_name" not in DataAgent({"data_csv": CSV})._usecols(["spend"], parts=[])
+    assert "adset_name" in DataAgent({"data_csv": CSV, "drilldown": True})._usecols(["spend"], parts=[])
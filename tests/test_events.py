@@ -0,0 +1,51 @@
+# tests/test_events.py
+import json
+import os
+
+from run import run_pipeline
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "data", "sample_fb_ads.csv")
+
+
+def test_run_pipeline_streams_events_in_order(tmp_path):
+    cfg = {"data_csv": SAMPLE, "similarity_threshold": 0.78, "confidence_min": 0.6}
+    events_path = tmp_path / "events.jsonl"
+    reports = run_pipeline("Why did CTR drop? Suggest new creatives", config=cfg, output_dir=str(tmp_path / "out"), events=str(events_path))
+
+    events = [json.loads(line) for line in events_path.read_text().splitlines()]
+    kinds = [e["event"] for e in events]
+    assert [e["seq"] for e in events] == list(range(len(events)))
+    assert kinds[0] == "plan" and kinds[1] == "summary" and kinds[-1] == "done"
+    assert "hypothesis" in kinds and "evaluation" in kinds
+    # every hypothesis is streamed before its evaluation, and creatives arrive one campaign at a time
+    assert kinds.index("hypothesis") < kinds.index("evaluation") < kinds.index("creatives")
+
+    with open(reports["creatives"]) as f:
+        creatives = json.load(f)["creatives"]
+    assert [e["data"] for e in events if e["event"] == "creatives"] == creatives
+    assert events[-1]["data"]["report"] == reports["report"]
+    with open(reports["report"], encoding="utf-8") as f:
+        assert "*Filters applied:* none (all rows)" in f.read()
+    with open(reports["insights"]) as f:
+        insights = json.load(f)
+    # the default report_summary ("all") keeps every section, including ones no agent read
+    assert {"low_ctr_cutoff", "creative_leaderboard"} <= set(insights["summary"])
+    assert "summary_sections_skipped" not in insights
+    # the streamed summary only carries what was computed when it was emitted: the sections
+    # the insight agent read, not just data_quality
+    assert set(events[1]["data"]) <= set(insights["summary"])
+    assert {"global", "trend", "campaign_summaries", "low_ctr_campaigns"} <= set(events[1]["data"])
+    assert kinds.index("summary") < kinds.index("hypothesis")
+
+
+def test_read_only_report_summary_lists_skipped_sections(tmp_path):
+    from run import write_reports
+    from utils.lazy import LazyDict
+
+    summary = LazyDict({"global": lambda: {"total_spend": 1.0}, "sketches": lambda: 1 / 0})
+    summary["global"]
+    reports = write_reports("q", {"summary": summary}, {"report_summary": "read"}, str(tmp_path))
+    with open(reports["insights"]) as f:
+        insights = json.load(f)
+    assert insights["summary"] == {"global": {"total_spend": 1.0}}
+    assert insights["summary_sections_skipped"] == ["sketches"]
@@ -0,0 +1,58 @@
+# tests/test_forecast.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.insight_rules import rule_hypotheses
+from utils.forecast import campaign_forecasts, fit_holt, holt_batch
+
+
+def _holt_reference(y, alpha, beta, horizon):
+    level, trend = y[0], 0.0
+    for obs in y[1:]:
+        pred = level + trend
+        level, trend = pred + alpha * (obs - pred), trend + alpha * beta * (obs - pred)
+    return level + trend * np.arange(1, horizon + 1)
+
+
+def test_batched_holt_matches_per_series_loop():
+    y = np.random.default_rng(0).normal(10, 2, (5, 30)).cumsum(axis=1)
+    alpha, beta = np.array([0.2, 0.4, 0.6, 0.8, 0.5]), np.array([0.05, 0.1, 0.2, 0.3, 0.0])
+    out = holt_batch(y, alpha, beta, horizon=7)
+    for i in range(len(y)):
+        assert out["forecast"][i] == pytest.approx(_holt_reference(y[i], alpha[i], beta[i], 7))
+
+    # the grid may be given as numpy arrays
+    fit = fit_holt(y, 7, alphas=np.array([0.2, 0.6]), betas=np.array([0.1]))
+    assert set(fit["alpha"]) <= {0.2, 0.6} and set(fit["beta"]) == {0.1}
+
+
+def test_declining_campaign_is_flagged_below_break_even():
+    days = pd.date_range("2025-01-01", periods=60).strftime("%Y-%m-%d")
+    rng = np.random.default_rng(1)
+    rows = []
+    for name, roas in (("steady", np.full(60, 3.0)), ("sinking", np.linspace(2.0, 0.4, 60))):
+        spend = 100 + rng.normal(0, 5, 60)
+        revenue = spend * (roas + rng.normal(0, 0.05, 60))
+        for d, s, r in zip(days, spend, revenue):
+            rows.append({"campaign_norm": name, "date": d, "spend": s, "revenue": r,
+                         "clicks": 10, "impressions": 1000, "ctr_sum": 0.01, "ctr_n": 1,
+                         "roas_sum": r / s, "roas_n": 1, "rows": 1})
+    acc = pd.DataFrame(rows).set_index(["campaign_norm", "date"])
+
+    forecasts = {f["campaign_canon"]: f for f in campaign_forecasts(acc, {}, horizon=7)}
+    assert forecasts["sinking"]["roas_below_1"] == "likely"
+    assert forecasts["steady"]["roas_below_1"] is None
+    lo, hi = forecasts["steady"]["roas_interval"]
+    assert lo < 3.0 < hi
+
+    summary = {
+        "global": {"avg_ctr": 0.01, "total_spend": 12000.0, "total_revenue": 24000.0},
+        "campaign_summaries": [
+            {"campaign_canon": n, "campaign_display": n, "ctr": 0.01, "roas": 2.0, "spend": 6000.0,
+             "revenue": 12000.0, "clicks": 600, "impressions": 60000} for n in ("steady", "sinking")
+        ],
+        "campaign_forecasts": list(forecasts.values()),
+    }
+    hits = {(h["rule"], h["campaign"]) for h in rule_hypotheses(summary)}
+    assert ("forecast_below_break_even", "sinking") in hits
@@ -0,0 +1,68 @@
+# tests/test_insight_rules.py
+import numpy as np
+
+from agents.evaluator import EvaluatorAgent
+from agents.insight_agent import InsightAgent
+from agents.insight_rules import campaign_frame, evaluate_rules, rule_context
+
+
+def _summary(n=5):
+    campaigns = [
+        {"campaign_canon": f"c{i}", "campaign_display": f"C{i}", "ctr": 0.02, "roas": 3.0,
+         "spend": 100.0, "revenue": 300.0, "clicks": 200, "impressions": 10000}
+        for i in range(n)
+    ]
+    campaigns[0].update(ctr=0.005, impressions=50000, clicks=250)  # low CTR + fatigue
+    campaigns[1].update(revenue=50.0, spend=400.0)                 # unprofitable
+    total_spend = sum(c["spend"] for c in campaigns)
+    total_rev = sum(c["revenue"] for c in campaigns)
+    return {
+        "global": {"avg_ctr": 0.02, "total_spend": total_spend, "total_revenue": total_rev, "avg_roas": 3.0},
+        "trend": [],
+        "campaign_summaries": campaigns,
+        "low_ctr_campaigns": ["c0"],
+    }
+
+
+def test_rules_flag_expected_campaigns_and_evaluator_validates():
+    summary = _summary()
+    hyps = [h for h in InsightAgent({}).run({"summary": summary})["payload"]["hypotheses"] if h.get("rule")]
+    flagged = {(h["rule"], h["campaign"]) for h in hyps}
+    assert ("low_ctr", "c0") in flagged
+    assert ("audience_fatigue", "c0") in flagged
+    assert ("unprofitable", "c1") in flagged
+    assert [h["rank"] for h in hyps] == sorted(h["rank"] for h in hyps)
+
+    evals = EvaluatorAgent({}).run({"hypotheses": hyps, "summary": summary})["payload"]["evaluations"]
+    assert all(e["validated"] for e in evals)
+    assert next(e for e in evals if e["hypothesis_id"] == "hc_low_ctr::c0")["p_value"] < 0.05
+
+
+def test_evaluator_rejects_rule_hits_its_check_does_not_confirm():
+    summary = _summary()
+    # CTR far below average on too few impressions to be significant; ROAS just under 1
+    summary["campaign_summaries"][0].update(ctr=0.005, impressions=200, clicks=1)
+    summary["campaign_summaries"][1].update(revenue=380.0, spend=400.0)
+    hyps = [h for h in InsightAgent({}).run({"summary": summary})["payload"]["hypotheses"] if h.get("rule")]
+    assert {("low_ctr", "c0"), ("unprofitable", "c1")} <= {(h["rule"], h["campaign"]) for h in hyps}
+
+    evals = {e["hypothesis_id"]: e for e in EvaluatorAgent({}).run({"hypotheses": hyps, "summary": summary})["payload"]["evaluations"]}
+    assert not evals["hc_low_ctr::c0"]["validated"] and evals["hc_low_ctr::c0"]["p_value"] > 0.05
+    assert not evals["hc_unprofitable::c1"]["validated"]
+
+
+def test_rule_engine_scales_without_row_loops():
+    n = 100_000
+    rng = np.random.default_rng(0)
+    spend = rng.uniform(10, 1000, n)
+    summary = {
+        "global": {"avg_ctr": 0.015, "total_spend": float(spend.sum()), "total_revenue": float(spend.sum() * 2)},
+        "campaign_summaries": [
+            {"campaign_canon": f"c{i}", "campaign_display": f"c{i}", "ctr": c, "roas": 2.0,
+             "spend": s, "revenue": s * r, "clicks": 1, "impressions": int(m)}
+            for i, (c, s, r, m) in enumerate(zip(rng.uniform(0.001, 0.03, n), spend, rng.uniform(0.2, 5, n), rng.integers(100, 10**6, n)))
+        ],
+    }
+    f = campaign_frame(summary)
+    hits = evaluate_rules(f, rule_context(summary, f))
+    assert len(hits) > 0 and hits["score"].is_monotonic_decreasing
@@ -0,0 +1,61 @@
+# tests/test_io.py
+import json
+
+import pandas as pd
+import pytest
+
+from utils.io import expand_paths, iter_csv, load_csv
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def _write_shards(tmp_path):
+    df = pd.read_csv(CSV)
+    bounds = [0, 1500, 3000, len(df)]
+    paths = []
+    for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        shard = df.iloc[lo:hi]
+        if i == 2:
+            shard = shard[shard.columns[::-1]]  # same schema, different column order
+        path = tmp_path / (f"part{i}.csv" if i == 0 else f"part{i}.csv.gz")
+        shard.to_csv(path, index=False)
+        paths.append(path)
+    return df, paths
+
+
+def test_glob_and_manifest_of_compressed_shards_match_single_file(tmp_path):
+    df, paths = _write_shards(tmp_path)
+    manifest = tmp_path / "shards.json"
+    manifest.write_text(json.dumps([p.name for p in paths]))
+
+    by_glob = load_csv(str(tmp_path / "part*.csv*"), workers=3)
+    by_manifest = load_csv(str(manifest), workers=2)
+    pd.testing.assert_frame_equal(by_glob, df)
+    pd.testing.assert_frame_equal(by_manifest, df)
+    assert expand_paths([str(manifest), str(paths[0])]) == [str(p) for p in paths]
+    # summary partials are .json data files, not manifests
+    assert expand_paths(str(tmp_path / "*.json"), manifests=False) == [str(manifest)]
+
+    filters = {"platform": "Instagram", "last_n_days": 7}
+    expected = load_csv(CSV, usecols=["date", "spend", "campaign_name"], filters=filters)
+    got = load_csv(str(tmp_path / "part*"), usecols=["date", "spend", "campaign_name"], filters=filters)
+    pd.testing.assert_frame_equal(got, expected)
+    assert sum(len(c) for c in iter_csv(str(manifest), filters={"platform": "Instagram"}, chunksize=500)) == (
+        (df["platform"] == "Instagram").sum()
+    )
+
+
+def test_mismatched_shards_are_rejected(tmp_path):
+    df = pd.read_csv(CSV).head(20)
+    df.to_csv(tmp_path / "a.csv", index=False)
+    df.drop(columns=["country"]).to_csv(tmp_path / "b.csv", index=False)
+    with pytest.raises(ValueError, match="missing \\['country'\\]"):
+        load_csv(str(tmp_path / "*.csv"))
+
+    (tmp_path / "b.csv").unlink()
+    df.assign(spend="pending").to_csv(tmp_path / "c.csv.gz", index=False)
+    with pytest.raises(ValueError, match="'spend' is numeric"):
+        load_csv(str(tmp_path / "*.csv*"))
+
+    with pytest.raises(FileNotFoundError):
+        load_csv(str(tmp_path / "nothing-*.csv"))
@@ -0,0 +1,75 @@
+# tests/test_job_queue.py
+import os
+
+from job_queue import work
+from utils.job_store import JobStore
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "data", "sample_fb_ads.csv")
+
+
+def test_claim_follows_priority_and_skips_cancelled(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    low = store.submit("low", priority=0)
+    high = store.submit("high", priority=5)
+    mid = store.submit("mid", priority=1)
+    also_low = store.submit("also low", priority=0)
+
+    assert store.cancel(mid)
+    assert [store.claim("w")["id"] for _ in range(3)] == [high, low, also_low]
+    assert store.claim("w") is None
+    assert not store.cancel(high)  # running jobs are not interrupted
+    assert store.counts() == {"running": 3, "cancelled": 1}
+    assert store.requeue_running("w") == 3 and store.counts()["queued"] == 3
+
+
+def test_worker_pool_drains_queue_and_records_results(tmp_path):
+    cfg = {
+        "data_csv": SAMPLE,
+        "similarity_threshold": 0.78,
+        "confidence_min": 0.6,
+        "job_store": str(tmp_path / "jobs.sqlite"),
+        "output_dir": str(tmp_path / "reports"),
+        "shared_dataset_dir": str(tmp_path / "shm"),
+    }
+    os.makedirs(cfg["shared_dataset_dir"])
+    store = JobStore(cfg["job_store"])
+    ok_ids = [store.submit("Analyze ROAS drop", priority=p) for p in (0, 1, 2)]
+    bad_id = store.submit("Analyze ROAS drop", dataset=str(tmp_path / "missing.csv"))
+
+    assert work(cfg, workers=2, drain=True) == {"done": 3, "failed": 1}
+
+    for job_id in ok_ids:
+        job = store.get(job_id)
+        assert job["status"] == "done"
+        assert os.path.exists(job["result"]["report"])
+        assert job["queued_s"] >= 0 and job["elapsed_s"] > 0
+    assert "FileNotFoundError" in store.get(bad_id)["error"]
+    assert os.listdir(cfg["shared_dataset_dir"]) == []  # warm export released on exit
+
+
+def test_sqlite_jobs_share_a_warm_database_across_workers(tmp_path):
+    other = tmp_path / "other.csv"
+    other.write_bytes(open(SAMPLE, "rb").read())
+    cfg = {
+        "data_csv": SAMPLE,
+        "storage": "sqlite",
+        "sqlite_path": str(tmp_path / "cache" / "ads.sqlite"),
+        "alias_store": str(tmp_path / "cache" / "aliases.json"),
+        "validation": "flag",
+        "similarity_threshold": 0.78,
+        "confidence_min": 0.6,
+        "job_store": str(tmp_path / "jobs.sqlite"),
+        "output_dir": str(tmp_path / "reports"),
+    }
+    store = JobStore(cfg["job_store"])
+    for p in range(4):
+        store.submit("Analyze ROAS drop", priority=p)
+    store.submit("Analyze ROAS drop", dataset=str(other))
+    store.submit("Analyze ROAS drop", dataset=str(other))
+
+    assert work(cfg, workers=3, drain=True) == {"done": 6, "failed": 0}
+
+    databases = [os.path.join(d, f) for d, _, files in os.walk(tmp_path / "cache") for f in files if f == "ads.sqlite"]
+    assert len(databases) == 2  # the configured one and one for the other dataset
+    assert os.path.exists(cfg["alias_store"])
+    assert not [f for f in os.listdir(tmp_path / "cache") if f.endswith(".tmp")]
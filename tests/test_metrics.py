@@ -0,0 +1,36 @@
+# tests/test_metrics.py
+import numpy as np
+import pytest
+
+from utils.metrics import ab_test_plan, minimum_detectable_lift, power_proportions, sample_size_proportions, two_sided_z
+
+
+def test_sample_size_matches_reference_and_inverts():
+    # 2% CTR, +10% relative lift, alpha 0.05, power 0.8: the textbook ~80.7k impressions per arm
+    n = sample_size_proportions(0.02, 0.1)
+    assert n == 80682
+    assert power_proportions(0.02, 0.1, n) == pytest.approx(0.8, abs=1e-4)
+    assert minimum_detectable_lift(0.02, n) == pytest.approx(0.1, rel=1e-4)
+
+
+def test_plan_is_vectorized_and_flags_undefined_inputs():
+    rng = np.random.default_rng(0)
+    ctr = rng.uniform(0.002, 0.05, 5000)
+    daily = rng.uniform(1e3, 1e6, 5000)
+    plan = ab_test_plan(ctr, daily, lift=0.1, max_days=14)
+
+    assert plan["impressions_per_arm"].shape == (5000,)
+    assert np.array_equal(plan["days"], np.ceil(plan["total_impressions"] / daily))
+    # the MDE within 14 days needs exactly the impressions 14 days deliver
+    reachable = sample_size_proportions(ctr, plan["mde_lift"])
+    assert np.allclose(reachable, daily * 14 / 2, rtol=1e-3)
+
+    edge = ab_test_plan([0.0, 0.02], [1000, 0])
+    assert np.isnan(edge["impressions_per_arm"][0]) and np.isnan(edge["days"][1])
+
+
+def test_two_sided_z_covers_any_level():
+    assert two_sided_z(0.95) == pytest.approx(1.959964, abs=1e-6)
+    assert two_sided_z(0.85) == pytest.approx(1.439531, abs=1e-6)
+    with pytest.raises(ValueError):
+        two_sided_z(95)
@@ -0,0 +1,42 @@
+# tests/test_planner.py
+from agents.planner import PlannerAgent
+
+
+def _plan(query):
+    out = PlannerAgent({}).run({"query": query})
+    assert out["status"] == "ok"
+    return {t["agent"]: t for t in out["tasks"]}
+
+
+def test_narrow_roas_query_pushes_filters_and_skips_creatives():
+    tasks = _plan("ROAS in US on Instagram")
+    params = tasks["data_agent"]["params"]
+    assert params["filters"] == {"country": "US", "platform": "Instagram"}
+    assert "creative_message" not in params["columns"]
+    assert {"country", "platform"} <= set(params["columns"])
+    assert "creative_generator" not in tasks
+
+
+def test_change_query_loads_baseline_window_and_creative_query_keeps_generator():
+    tasks = _plan("Why did ROAS drop in the last 7 days?")
+    assert tasks["data_agent"]["params"]["filters"]["last_n_days"] == 14
+    assert tasks["data_agent"]["params"]["compare_days"] == 7
+    assert "audience_type" in tasks["data_agent"]["params"]["columns"]
+
+    tasks = _plan("Suggest new creatives for low CTR campaigns")
+    assert "creative_generator" in tasks
+
+
+def test_ordinary_words_do_not_become_filters():
+    for query in [
+        "Give me a broad overview of our Facebook ads",
+        "Suggest image and video ideas for campaigns selling to america",
+        "Estimate ROAS for us using the latest data",
+    ]:
+        filters = _plan(query)["data_agent"]["params"]["filters"]
+        assert not {"country", "platform", "audience_type", "creative_type"} & set(filters), query
+
+
+def test_explicit_dimension_phrasing_becomes_filters():
+    filters = _plan("CTR of video creatives for a broad audience in the UK")["data_agent"]["params"]["filters"]
+    assert filters == {"creative_type": "Video", "audience_type": "Broad", "country": "UK"}
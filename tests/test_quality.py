@@ -0,0 +1,67 @@
+# tests/test_quality.py
+import numpy as np
+import pandas as pd
+
+from agents.data_agent import DataAgent
+from utils.quality import BITS, REASON_COL, RowValidator, quarantine_frame
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def _clean_rows():
+    df = pd.read_csv(CSV)
+    return df.dropna(subset=["spend", "revenue", "clicks", "impressions"]).head(40).reset_index(drop=True)
+
+
+def test_injected_bad_rows_get_their_reason_codes():
+    df = _clean_rows().astype({"purchases": float})
+    df.loc[1, "clicks"] = df.loc[1, "impressions"] + 1
+    df.loc[2, "ctr"] = 0.5
+    df.loc[3, "roas"] = df.loc[3, "roas"] + 1
+    df.loc[4, "spend"] = -1.0
+    df.loc[5, "date"] = "2025-02-30"
+    df.loc[6, "impressions"] = np.nan
+    df.loc[7, "purchases"] = 2.5
+
+    validator = RowValidator()
+    bits = validator.check(df)
+
+    assert bits[0] == 0 and not bits[8:].any()
+    assert bits[1] & BITS["impossible_ctr"] and bits[1] & BITS["ctr_mismatch"]
+    assert bits[2] == BITS["ctr_mismatch"]
+    assert bits[3] == BITS["roas_mismatch"]
+    assert bits[4] & BITS["negative_metric"]
+    assert bits[5] == BITS["bad_date"]
+    assert bits[6] & BITS["missing_metric"]
+    assert bits[7] == BITS["fractional_count"]
+    assert validator.summary()["rows_flagged"] == 7
+
+    quarantined = quarantine_frame(df, bits)
+    assert len(quarantined) == 7
+    assert quarantined.loc[1, REASON_COL] == "ctr_mismatch"
+
+
+def test_duplicates_are_caught_across_chunks():
+    df = _clean_rows()
+    repeated = pd.concat([df, df.iloc[[3, 10]]], ignore_index=True)
+
+    validator = RowValidator()
+    bits = np.concatenate([validator.check(chunk) for chunk in (repeated.iloc[:25], repeated.iloc[25:])])
+
+    assert np.flatnonzero(bits).tolist() == [40, 41]
+    assert validator.summary()["reasons"] == {"duplicate_key": 2}
+
+
+def test_quarantine_mode_excludes_flagged_rows_from_summary():
+    raw = pd.read_csv(CSV)
+    clean = raw.dropna(subset=["spend", "revenue", "clicks", "impressions"])
+
+    flagged = DataAgent({"data_csv": CSV, "validation": "flag"}).run({})
+    quarantined = DataAgent({"data_csv": CSV, "validation": "quarantine"}).run({})
+
+    quality = quarantined["payload"]["data_quality"]
+    assert quality["rows_checked"] == len(raw)
+    assert quality["rows_flagged"] == len(raw) - len(clean) == len(quarantined["artifacts"]["quarantine"])
+    assert quality["excluded_from_summary"] and not flagged["payload"]["data_quality"]["excluded_from_summary"]
+    assert quarantined["payload"]["global"]["total_clicks"] == int(clean["clicks"].sum())
+    assert flagged["payload"]["global"]["total_impressions"] == int(raw["impressions"].sum())
@@ -0,0 +1,43 @@
+# tests/test_run_batch.py
+import json
+import os
+import shutil
+
+from run_batch import account_config, discover_accounts, run_batch
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "data", "sample_fb_ads.csv")
+
+
+def test_run_batch_isolates_failing_account(tmp_path):
+    accounts = tmp_path / "accounts"
+    accounts.mkdir()
+    shutil.copy(SAMPLE, accounts / "acct_a.csv")
+    (accounts / "acct_b.csv").write_text("campaign_name,date\nx,2025-01-01\n")
+
+    assert [a for a, _ in discover_accounts(str(accounts))] == ["acct_a", "acct_b"]
+
+    cfg = {"similarity_threshold": 0.78, "confidence_min": 0.6}
+    out_dir = tmp_path / "out"
+    index = run_batch(str(accounts), "Analyze ROAS drop", config=cfg, workers=2, output_dir=str(out_dir))
+
+    by_account = {r["account"]: r for r in index["accounts"]}
+    assert by_account["acct_a"]["status"] == "ok"
+    assert by_account["acct_b"]["status"] == "error"
+    assert index["succeeded"] == 1 and index["failed"] == 1
+    assert (out_dir / "acct_a" / "report.md").exists()
+    with open(out_dir / "index.json") as f:
+        assert json.load(f)["total"] == 2
+
+
+def test_discover_accounts_from_manifest(tmp_path):
+    manifest = tmp_path / "accounts.yaml"
+    manifest.write_text("north: data/north.csv\nsouth: /abs/south.csv\n")
+    accounts = dict(discover_accounts(str(manifest)))
+    assert accounts["north"] == os.path.join(str(tmp_path), "data/north.csv")
+    assert accounts["south"] == "/abs/south.csv"
+
+
+def test_account_config_keeps_stateful_files_per_account():
+    cfg = account_config({"storage": "sqlite", "alias_store": "cache/aliases.json"}, "north", "north.csv")
+    assert cfg["alias_store"] == os.path.join("cache", "north", "aliases.json")
+    assert cfg["sqlite_path"] == os.path.join("cache", "north", "ads.sqlite")
@@ -0,0 +1,62 @@
+# tests/test_sampling.py
+import pytest
+
+from agents.data_agent import DataAgent
+from agents.evaluator import EvaluatorAgent
+from agents.insight_agent import InsightAgent
+from agents.planner import PlannerAgent
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def test_sample_covering_every_row_is_exact():
+    cfg = {"data_csv": CSV, "sample_rows": 10_000}
+    exact = DataAgent(cfg).run({})["payload"]
+    census = DataAgent(cfg).run({"sample": True})["payload"]
+
+    assert census["sampling"]["rows_sampled"] == census["sampling"]["rows_total"] == 4500
+    assert census["global"]["total_spend"] == pytest.approx(exact["global"]["total_spend"])
+    assert census["global"]["avg_roas"] == pytest.approx(exact["global"]["avg_roas"])
+    assert census["low_ctr_campaigns"] == exact["low_ctr_campaigns"]
+    assert census["sampling"]["global"]["avg_ctr"]["se"] == pytest.approx(0, abs=1e-12)
+
+
+def test_stratified_sample_bounds_cover_exact_values_and_flag_fragile_verdicts():
+    cfg = {"data_csv": CSV, "sample_rows": 2500, "random_seed": 7}
+    exact = DataAgent(cfg).run({})["payload"]
+    out = DataAgent(cfg).run({"sample": True})
+    assert out["status"] == "ok"
+    approx = out["payload"]
+    section = approx["sampling"]
+
+    # every (campaign, date) stratum is represented, and the sample stays near the budget
+    assert 2500 <= section["rows_sampled"] < section["rows_total"]
+    assert {str(t["date"]) for t in approx["trend"]} == {str(t["date"]) for t in exact["trend"]}
+    for field in ("total_spend", "total_revenue", "avg_ctr", "avg_roas"):
+        lo, hi = section["global"][field]["interval"]
+        assert lo <= exact["global"][field] <= hi
+    assert set(section["low_ctr_uncertain"]) <= {c["campaign_canon"] for c in approx["campaign_summaries"]}
+
+    hypotheses = InsightAgent(cfg).run({"summary": approx})["payload"]["hypotheses"]
+    evaluations = EvaluatorAgent(cfg).run({"hypotheses": hypotheses, "summary": approx})["payload"]["evaluations"]
+    assert all(0.0 <= e["sampling"]["flip_rate"] <= 1.0 for e in evaluations)
+    assert all(e["sampling"]["fragile"] == (e["sampling"]["flip_rate"] > 0.1) for e in evaluations)
+
+
+def test_planner_requests_sampling_for_exploratory_queries():
+    data_task = lambda q: next(t for t in PlannerAgent({}).run({"query": q})["tasks"] if t["agent"] == "data_agent")
+    assert data_task("Quick rough look at ROAS by campaign")["params"]["sample"] is True
+    assert data_task("ROAS by campaign")["params"]["sample"] is None
+    # ordinary wording does not silently switch to an approximate answer
+    assert data_task("Quick question: estimate next week's ROAS by campaign")["params"]["sample"] is None
+
+
+def test_sampled_report_says_it_is_approximate(tmp_path):
+    from run import write_reports
+
+    cfg = {"data_csv": CSV, "sample_rows": 2500, "sample_confidence": 0.85}
+    summary = DataAgent(cfg).run({"sample": True})["payload"]
+    assert summary["sampling"]["confidence"] == 0.85
+    reports = write_reports("ROAS, roughly", {"summary": summary}, cfg, str(tmp_path))
+    with open(reports["report"], encoding="utf-8") as f:
+        assert "*Approximate:* computed on a stratified sample of" in f.read()
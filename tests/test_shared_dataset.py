@@ -0,0 +1,52 @@
+# tests/test_shared_dataset.py
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataAgent
+from shards import summarize_parallel
+from utils.io import load_csv
+from utils.shared_dataset import attach, export_frame, release
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def test_attach_round_trips_and_maps_numeric_columns(tmp_path):
+    df = load_csv(CSV)
+    df.loc[3, "creative_message"] = None
+    handle = export_frame(df, root=str(tmp_path))
+    try:
+        pd.testing.assert_frame_equal(attach(handle), df)
+
+        part = attach(handle, columns=["spend", "campaign_name", "not_a_column"], start=10, stop=20)
+        assert list(part.columns) == ["campaign_name", "spend"]
+        pd.testing.assert_frame_equal(part, df.loc[10:19, ["campaign_name", "spend"]].reset_index(drop=True))
+        # numeric columns are read-only views on the mapped file, not copies
+        assert not part["spend"].to_numpy().flags.writeable
+
+        codes = attach(handle, columns=["campaign_name"], decode=False)["campaign_name"]
+        assert codes.dtype == "category"
+        assert codes.astype(str).tolist() == df["campaign_name"].astype(str).tolist()
+    finally:
+        release(handle)
+
+
+def test_parallel_partitions_match_single_process(tmp_path):
+    cfg = {"data_csv": CSV, "shared_dataset_dir": str(tmp_path)}
+    agent = DataAgent(cfg)
+    expected = agent.finalize(agent.build_partial(load_csv(CSV)))
+
+    merged = agent.finalize(summarize_parallel(CSV, cfg, workers=3))
+    assert merged["global"]["total_clicks"] == expected["global"]["total_clicks"]
+    assert merged["global"]["avg_roas"] == pytest.approx(expected["global"]["avg_roas"])
+    assert merged["low_ctr_campaigns"] == expected["low_ctr_campaigns"]
+    assert list(tmp_path.iterdir()) == []  # export released
+
+    # an agent handed the handle attaches instead of reading the CSV
+    handle = export_frame(load_csv(CSV), root=str(tmp_path))
+    try:
+        out = DataAgent({"data_csv": "missing.csv"}).run({"dataset": handle, "filters": {"platform": "Instagram"}})
+        direct = DataAgent(cfg).run({"filters": {"platform": "Instagram"}})
+        assert out["status"] == "ok"
+        assert out["payload"]["global"] == direct["payload"]["global"]
+    finally:
+        release(handle)
@@ -0,0 +1,45 @@
+# tests/test_similarity.py
+import random
+
+import numpy as np
+import pandas as pd
+
+from agents.data_agent import _normalize_campaign_name, build_fuzzy_groups, combined_similarity
+from utils.similarity import SimilarityIndex
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def _names():
+    raw = pd.read_csv(CSV)["campaign_name"].dropna().astype(str)
+    return raw.map(_normalize_campaign_name).value_counts().to_dict()
+
+
+def test_batched_scores_bound_combined_similarity():
+    random.seed(0)
+    names = list(_names())[:60] + ["", "a", "x" * 70, "ab " * 30]
+    index = SimilarityIndex(names)
+    for query in random.sample(names, 15) + ["", "x" * 68]:
+        exact = np.array([combined_similarity(query, n) for n in names])
+        excess = index.scores(query) - exact
+        assert excess.min() >= -1e-12
+        assert excess.max() <= 0.45  # the sequence term is the only approximate part
+    # identical strings score 1 in both
+    assert index.scores(names[0])[0] == 1.0
+
+
+def test_fuzzy_groups_match_pairwise_greedy_clustering():
+    counts = _names()
+    names = sorted(counts, key=lambda x: -counts[x])
+    for threshold in (0.7, 0.78):
+        # reference: compare each name with every member of every earlier group
+        groups, expected = [], {}
+        for name in names:
+            target = next((g for g in groups if any(combined_similarity(name, m) >= threshold for m in g)), None)
+            if target is None:
+                target = [name]
+                groups.append(target)
+            else:
+                target.append(name)
+            expected[name] = target[0]
+        assert build_fuzzy_groups(list(counts), counts, threshold=threshold) == expected
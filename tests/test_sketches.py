@@ -0,0 +1,22 @@
+# tests/test_sketches.py
+import numpy as np
+
+from utils.sketches import HyperLogLog, KLLSketch, hll_relative_error, kll_rank_error
+
+
+def test_kll_quantiles_within_rank_error_after_merge():
+    x = np.random.default_rng(7).lognormal(size=200_000)
+    a = KLLSketch(k=200).update(x[:120_000])
+    b = KLLSketch(k=200).update(x[120_000:])
+    a.merge(KLLSketch.from_dict(b.to_dict()))
+    assert a.n == len(x)
+    for q in (0.1, 0.25, 0.5, 0.9):
+        assert abs((x <= a.quantile(q)).mean() - q) <= kll_rank_error(200)
+
+
+def test_hll_estimate_within_four_sigma():
+    values = np.arange(50_000).astype(str)
+    left = HyperLogLog(p=12).update(values[:30_000])
+    right = HyperLogLog(p=12).update(values[20_000:])  # overlapping shards
+    est = left.merge(right).estimate()
+    assert abs(est / len(values) - 1) <= 4 * hll_relative_error(12)
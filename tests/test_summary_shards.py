@@ -0,0 +1,103 @@
+# tests/test_summary_shards.py
+import json
+import pickle
+
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataAgent
+from utils.summary_shards import merge_partials, read_partial, section_columns, write_partial
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def test_merged_shards_match_single_pass(tmp_path):
+    agent = DataAgent({"data_csv": CSV})
+    df = pd.read_csv(CSV)
+    expected = agent._summarize(df)
+
+    # split by date so shards overlap in campaigns but not in days
+    cut = sorted(df["date"].unique())[len(df["date"].unique()) // 2]
+    paths = []
+    for i, shard in enumerate([df[df["date"] < cut], df[df["date"] >= cut]]):
+        path = str(tmp_path / f"part{i}.json")
+        write_partial(path, agent.build_partial(shard))
+        paths.append(path)
+
+    merged = agent.finalize(merge_partials([read_partial(p) for p in paths]))
+
+    assert merged["low_ctr_campaigns"] == expected["low_ctr_campaigns"]
+    assert merged["global"]["total_clicks"] == expected["global"]["total_clicks"]
+    assert merged["global"]["avg_ctr"] == pytest.approx(expected["global"]["avg_ctr"])
+    assert [t["date"] for t in merged["trend"]] == [t["date"] for t in expected["trend"]]
+    for got, want in zip(merged["campaign_summaries"], expected["campaign_summaries"]):
+        assert got["campaign_canon"] == want["campaign_canon"]
+        assert got["roas"] == pytest.approx(want["roas"])
+        assert got["spend"] == pytest.approx(want["spend"])
+
+
+def test_sketches_merge_and_stay_within_bounds(tmp_path):
+    agent = DataAgent({"data_csv": CSV, "use_sketches": True})
+    df = pd.read_csv(CSV)
+
+    paths = []
+    for i, shard in enumerate([df.iloc[::2], df.iloc[1::2]]):
+        path = str(tmp_path / f"part{i}.json")
+        write_partial(path, agent.build_partial(shard))
+        paths.append(path)
+    merged = agent.finalize(merge_partials([read_partial(p) for p in paths]))
+
+    bounds = merged["sketches"]["error_bounds"]
+    p50 = merged["sketches"]["ctr_quantiles"]["p50"]
+    assert abs((df["ctr"] <= p50).mean() - 0.5) <= bounds["quantile_rank_error"]
+
+    total_adsets = df["adset_name"].nunique()
+    assert all(1 <= c["distinct_adsets"] <= total_adsets + 1 for c in merged["campaign_summaries"])
+    assert merged["low_ctr_campaigns"]
+
+
+def test_creative_leaderboard_survives_shard_merge(tmp_path):
+    from utils.leaderboard import CreativeLeaderboard
+
+    agent = DataAgent({"data_csv": CSV})
+    df = pd.read_csv(CSV)
+    paths = []
+    for i, shard in enumerate([df.iloc[::2], df.iloc[1::2]]):
+        path = str(tmp_path / f"part{i}.json")
+        write_partial(path, agent.build_partial(shard))
+        paths.append(path)
+    merged = CreativeLeaderboard(merge_partials([read_partial(p) for p in paths])["by_creative"])
+    single = CreativeLeaderboard(agent.build_partial(df)["by_creative"])
+
+    assert len(merged) == len(single) > 0
+    top = merged.top_k("roas", k=5, min_impressions=500_000)
+    assert top == single.top_k("roas", k=5, min_impressions=500_000)
+    assert [t["roas"] for t in top] == sorted((t["roas"] for t in top), reverse=True)
+    assert all(t["impressions"] >= 500_000 for t in top)
+
+    # lookup is keyed by the normalized text, and matches a direct aggregation of the rows
+    msg = top[0]["message"]
+    rows = df[df["creative_message"] == msg]
+    hit = merged.lookup(msg.upper())
+    assert hit["clicks"] == rows["clicks"].sum()
+    assert hit["rows"] == len(rows)
+
+
+def test_summary_sections_compute_only_what_is_read():
+    agent = DataAgent({"data_csv": CSV, "use_sketches": True})
+    partial = agent.build_partial(pd.read_csv(CSV))
+    summary = agent.finalize(partial, compare_days=7)
+
+    assert summary["low_ctr_campaigns"] and summary["global"]["total_clicks"] > 0
+    assert "period_comparison" in summary and "creative_leaderboard" in summary
+    for section in ("period_comparison", "creative_leaderboard", "campaign_trends", "sketches"):
+        assert not summary.is_computed(section)
+    for part in ("by_campaign_date", "by_dimension_date", "by_creative"):
+        assert not partial.is_computed(part)
+    assert not partial["sketches"].is_computed("quantiles")
+    assert section_columns("creative_leaderboard") == ["creative_message", "creative_type"]
+
+    # every section matches the one computed from a fully materialized partial
+    eager = agent.finalize(pickle.loads(pickle.dumps(partial)), compare_days=7)
+    assert isinstance(pickle.loads(pickle.dumps(partial)), dict)
+    assert json.dumps(summary.to_dict(), default=str) == json.dumps(eager.to_dict(), default=str)
@@ -0,0 +1,44 @@
+# tests/test_timeseries.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataAgent
+from agents.insight_rules import rule_hypotheses
+from utils.timeseries import change_points, ols_slopes, rolling_zscores
+
+
+def test_vectorized_kernels_match_per_row_reference():
+    rng = np.random.default_rng(1)
+    y = rng.normal(5, 1, (50, 40))
+    y[rng.random(y.shape) < 0.2] = np.nan
+
+    slopes = ols_slopes(y)
+    for row, got in zip(y, slopes):
+        x = np.arange(len(row))[~np.isnan(row)]
+        assert got == pytest.approx(np.polyfit(x, row[~np.isnan(row)], 1)[0])
+
+    step = np.r_[np.full(20, 4.0), np.full(20, 2.0)] + rng.normal(0, 0.1, 40)
+    cp = change_points(step[None, :])
+    assert cp["index"][0] == 20 and cp["t"][0] < -10
+
+    spike = np.r_[rng.normal(3, 0.1, 30), 0.5]
+    assert rolling_zscores(spike[None, :])[0, -1] < -10
+
+
+def test_campaign_trends_flow_into_rules():
+    df = pd.read_csv("data/sample_fb_ads.csv")
+    # make one long-running campaign collapse halfway through the window
+    name = df["campaign_name"].value_counts().index[0]
+    late = (df["campaign_name"] == name) & (df["date"] >= "2025-02-15")
+    df.loc[late, "roas"] *= 0.2
+    df.loc[late, "revenue"] *= 0.2
+
+    summary = DataAgent({"data_csv": "unused.csv"})._summarize(df)
+    trends = {t["campaign_canon"]: t for t in summary["campaign_trends"]}
+    assert len(trends) == len(summary["campaign_summaries"])
+
+    declining = [h for h in rule_hypotheses(summary, top_n=50) if h["rule"] == "roas_declining"]
+    assert declining
+    hit = trends[declining[0]["campaign"]]
+    assert hit["roas_after"] < hit["roas_before"] and hit["change_point"] is not None
@@ -0,0 +1,61 @@
+# tests/test_watch.py
+import os
+
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataAgent
+from utils.tail import AppendReader
+from watch import Watcher
+
+CSV = "data/sample_fb_ads.csv"
+
+
+def test_append_reader_reads_only_complete_appended_lines(tmp_path):
+    df = pd.read_csv(CSV)
+    path = tmp_path / "ads.csv"
+    df.iloc[:100].to_csv(path, index=False)
+    reader = AppendReader(str(path))
+    assert reader.read()[1] is True and not reader.changed()
+
+    with open(path, "a") as f:
+        f.write(df.iloc[100:150].to_csv(index=False, header=False) + "Half written")
+    rows, reset = reader.read()
+    assert not reset and len(rows) == 50
+    assert rows["campaign_name"].tolist() == df["campaign_name"].iloc[100:150].tolist()
+
+    # replaced by a shorter export: full reload
+    df.iloc[:10].to_csv(tmp_path / "tmp.csv", index=False)
+    os.replace(tmp_path / "tmp.csv", path)
+    rows, reset = reader.read()
+    assert reset and len(rows) == 10
+
+
+def test_watcher_merges_appends_and_skips_unchanged_agents(tmp_path):
+    df = pd.read_csv(CSV)
+    path = tmp_path / "ads.csv"
+    df.iloc[:3000].to_csv(path, index=False)
+    cfg = {"data_csv": str(path), "validation": "quarantine", "forecast_horizon": 0}
+    watcher = Watcher("Why did ROAS drop?", cfg, output_dir=str(tmp_path / "reports"))
+
+    first = watcher.poll()
+    assert first["full_reload"] and first["agents_run"] == ["insight_agent", "evaluator"]
+    assert watcher.poll() is None
+
+    with open(path, "a") as f:
+        f.write(df.iloc[3000:].to_csv(index=False, header=False))
+    update = watcher.poll()
+    assert update["rows_read"] == 1500 and not update["full_reload"]
+    expected = DataAgent(cfg).run({})["payload"]
+    got = watcher.context["summary"]
+    assert got["global"]["total_spend"] == pytest.approx(expected["global"]["total_spend"])
+    assert got["global"]["total_clicks"] == expected["global"]["total_clicks"]
+    assert got["data_quality"] == expected["data_quality"]
+
+    # a row that is quarantined changes nothing downstream
+    bad = df.iloc[[5]].assign(spend=None)
+    with open(path, "a") as f:
+        f.write(bad.to_csv(index=False, header=False))
+    update = watcher.poll()
+    assert update["agents_run"] == []
+    assert watcher.context["summary"]["data_quality"]["rows_flagged"] == expected["data_quality"]["rows_flagged"] + 1